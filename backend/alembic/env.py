@@ -30,6 +30,8 @@ from app.models import (
     scooter_price,
     llm,
     no_parking_zone,
+    scooter_track,
+    scooter_change,
 )
 from app.db.session import Base
 
@@ -0,0 +1,17 @@
+from .fleet import (
+    FleetColumns,
+    average_duration_by_period,
+    demand_heatmap,
+    load_fleet_columns,
+    revenue_by_model,
+    scooter_utilisation,
+)
+
+__all__ = [
+    "FleetColumns",
+    "load_fleet_columns",
+    "scooter_utilisation",
+    "revenue_by_model",
+    "demand_heatmap",
+    "average_duration_by_period",
+]
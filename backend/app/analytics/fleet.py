@@ -0,0 +1,240 @@
+"""
+车队运营分析
+
+一次性将滑板车、租赁和支付数据按列读入 NumPy 数组，所有指标都通过向量化运算
+（bincount、unique 等）计算，不逐行构造 ORM 对象。
+"""
+
+from datetime import datetime
+from functools import cached_property
+from typing import Dict, List
+
+import numpy as np
+from sqlalchemy import BigInteger, Integer, case, func, or_, select
+from sqlalchemy.orm import Session
+
+from app.models.payment import Payment, PaymentStatus
+from app.models.rental import Rental
+from app.models.scooter import Scooter
+from app.schemas.rental import RentalPeriod
+
+SECONDS_PER_HOUR = 3600
+HOURS_PER_WEEK = 7 * 24
+# 租赁时长编码：rental_period_codes 中的值是这里的下标，-1 表示未记录
+PERIODS = [period.value for period in RentalPeriod]
+
+
+class FleetColumns:
+    """按列存储的车队数据，租赁相关数组一一对应"""
+
+    def __init__(
+        self,
+        *,
+        scooter_ids: np.ndarray,
+        scooter_models: np.ndarray,
+        rental_scooter_ids: np.ndarray,
+        rental_starts: np.ndarray,
+        rental_ends: np.ndarray,
+        rental_period_codes: np.ndarray,
+        rental_revenue: np.ndarray,
+    ):
+        order = np.argsort(scooter_ids)
+        self.scooter_ids = scooter_ids[order]  # 已排序，便于 searchsorted
+        self.scooter_models = scooter_models[order]
+        self.rental_scooter_ids = rental_scooter_ids
+        self.rental_starts = rental_starts.astype("datetime64[s]")
+        self.rental_ends = rental_ends.astype("datetime64[s]")  # 未结束为 NaT
+        self.rental_period_codes = rental_period_codes
+        self.rental_revenue = rental_revenue  # 每个租赁已完成支付的金额
+
+    @property
+    def rental_count(self) -> int:
+        return len(self.rental_starts)
+
+    @cached_property
+    def rental_scooter_index(self) -> np.ndarray:
+        """每个租赁对应的滑板车在 scooter_ids 中的下标，找不到时为 -1"""
+        if len(self.scooter_ids) == 0:
+            return np.full(self.rental_count, -1)
+        index = np.searchsorted(self.scooter_ids, self.rental_scooter_ids)
+        index = np.minimum(index, len(self.scooter_ids) - 1)
+        found = self.scooter_ids[index] == self.rental_scooter_ids
+        return np.where(found, index, -1)
+
+    def started_between(self, start: datetime, end: datetime) -> np.ndarray:
+        """开始时间在 [start, end) 内的租赁的布尔掩码"""
+        return (self.rental_starts >= np.datetime64(start, "s")) & (
+            self.rental_starts < np.datetime64(end, "s")
+        )
+
+
+def epoch_seconds(column, dialect_name: str):
+    """返回时间列对应的 Unix 时间戳（秒）的SQL表达式
+
+    直接读取数值比逐行解析 datetime 快得多。
+    """
+    if dialect_name == "sqlite":
+        return func.strftime("%s", column).cast(Integer)
+    return func.extract("epoch", column).cast(BigInteger)
+
+
+def _to_datetime64(seconds) -> np.ndarray:
+    """将时间戳列转换为 datetime64，NULL 转换为 NaT"""
+    # numpy 直接把整数按距纪元的秒数转换，None 转换为 NaT
+    return np.array(seconds, dtype="datetime64[s]")
+
+
+def load_fleet_columns(db: Session, *, start: datetime, end: datetime) -> FleetColumns:
+    """读取所有滑板车和与 [start, end) 有交集的租赁，每张表只查询一次"""
+    dialect_name = db.get_bind().dialect.name
+    scooters = db.execute(select(Scooter.id, Scooter.model)).all()
+
+    revenue = (
+        select(
+            Payment.rental_id.label("rental_id"),
+            func.sum(Payment.amount).label("amount"),
+        )
+        .where(Payment.status == PaymentStatus.COMPLETED)
+        .group_by(Payment.rental_id)
+        .subquery()
+    )
+    period_code = case(
+        *[
+            (Rental.rental_period == period, code)
+            for code, period in enumerate(RentalPeriod)
+        ],
+        else_=-1,
+    )
+    rentals = db.execute(
+        select(
+            func.coalesce(Rental.scooter_id, -1),
+            epoch_seconds(Rental.start_time, dialect_name),
+            epoch_seconds(Rental.end_time, dialect_name),
+            period_code,
+            func.coalesce(revenue.c.amount, 0.0),
+        )
+        .outerjoin(revenue, revenue.c.rental_id == Rental.id)
+        .where(
+            Rental.start_time.is_not(None),
+            Rental.start_time < end,
+            or_(Rental.end_time.is_(None), Rental.end_time > start),
+        )
+    ).all()
+
+    scooter_ids, scooter_models = zip(*scooters) if scooters else ((), ())
+    scooter_column, starts, ends, period_codes, amounts = (
+        zip(*rentals) if rentals else ((), (), (), (), ())
+    )
+    return FleetColumns(
+        scooter_ids=np.array(scooter_ids, dtype=np.int64),
+        scooter_models=np.array(
+            [model or "" for model in scooter_models], dtype=object
+        ),
+        rental_scooter_ids=np.array(scooter_column, dtype=np.int64),
+        rental_starts=_to_datetime64(starts),
+        rental_ends=_to_datetime64(ends),
+        rental_period_codes=np.array(period_codes, dtype=np.int8),
+        rental_revenue=np.array(amounts, dtype=np.float64),
+    )
+
+
+def scooter_utilisation(
+    fleet: FleetColumns, *, start: datetime, end: datetime, now: datetime
+) -> List[Dict]:
+    """每辆滑板车在 [start, end) 内处于租赁中的时间占比
+
+    未结束的租赁按截至 now 计算。
+    """
+    window_start = np.datetime64(start, "s")
+    window_end = np.datetime64(end, "s")
+    window_seconds = (window_end - window_start).astype(np.int64)
+    ends = np.where(
+        np.isnat(fleet.rental_ends), np.datetime64(now, "s"), fleet.rental_ends
+    )
+    busy = (
+        np.minimum(ends, window_end) - np.maximum(fleet.rental_starts, window_start)
+    ).astype(np.int64)
+    busy = np.clip(busy, 0, None)
+
+    index = fleet.rental_scooter_index
+    known = index >= 0
+    busy_seconds = np.bincount(
+        index[known], weights=busy[known], minlength=len(fleet.scooter_ids)
+    )
+    utilisation = busy_seconds / window_seconds if window_seconds > 0 else busy_seconds
+
+    return [
+        {
+            "scooter_id": int(scooter_id),
+            "model": model,
+            "busy_hours": float(seconds / SECONDS_PER_HOUR),
+            "utilisation": float(ratio),
+        }
+        for scooter_id, model, seconds, ratio in zip(
+            fleet.scooter_ids, fleet.scooter_models, busy_seconds, utilisation
+        )
+    ]
+
+
+def revenue_by_model(
+    fleet: FleetColumns, *, start: datetime, end: datetime
+) -> List[Dict]:
+    """按滑板车型号汇总 [start, end) 内开始的租赁的订单数和收入，按收入降序"""
+    models, model_index = np.unique(
+        fleet.scooter_models.astype(str), return_inverse=True
+    )
+    scooter_index = fleet.rental_scooter_index
+    mask = fleet.started_between(start, end) & (scooter_index >= 0)
+    rental_model = model_index[scooter_index[mask]]
+
+    counts = np.bincount(rental_model, minlength=len(models))
+    revenue = np.bincount(
+        rental_model, weights=fleet.rental_revenue[mask], minlength=len(models)
+    )
+    order = np.argsort(-revenue, kind="stable")
+    return [
+        {
+            "model": str(models[i]),
+            "rental_count": int(counts[i]),
+            "revenue": float(revenue[i]),
+        }
+        for i in order
+    ]
+
+
+def demand_heatmap(
+    fleet: FleetColumns, *, start: datetime, end: datetime
+) -> List[List[int]]:
+    """按开始时间统计租赁数，返回 7x24 矩阵，行是周一到周日，列是小时"""
+    starts = fleet.rental_starts[fleet.started_between(start, end)]
+    seconds = starts.astype(np.int64)
+    # 1970-01-01 是周四，加 3 后周一为 0
+    weekday = (seconds // 86400 + 3) % 7
+    hour = (seconds // SECONDS_PER_HOUR) % 24
+    counts = np.bincount(weekday * 24 + hour, minlength=HOURS_PER_WEEK)
+    return counts.reshape(7, 24).tolist()
+
+
+def average_duration_by_period(
+    fleet: FleetColumns, *, start: datetime, end: datetime
+) -> List[Dict]:
+    """[start, end) 内开始且已结束的租赁，按预订时长统计平均实际骑行时长（小时）"""
+    mask = fleet.started_between(start, end) & ~np.isnat(fleet.rental_ends)
+    hours = (fleet.rental_ends[mask] - fleet.rental_starts[mask]).astype(
+        np.int64
+    ) / SECONDS_PER_HOUR
+
+    # 没有记录预订时长的租赁不参与统计
+    codes = fleet.rental_period_codes[mask]
+    known = codes >= 0
+    counts = np.bincount(codes[known], minlength=len(PERIODS))
+    totals = np.bincount(codes[known], weights=hours[known], minlength=len(PERIODS))
+    averages = np.divide(totals, counts, out=np.zeros(len(PERIODS)), where=counts > 0)
+    return [
+        {
+            "rental_period": period,
+            "rental_count": int(count),
+            "average_hours": float(average),
+        }
+        for period, count, average in zip(PERIODS, counts, averages)
+    ]
@@ -1,13 +1,16 @@
-from typing import Generator
+from typing import AsyncGenerator, Generator, Optional
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
 from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.db.session import SessionLocal
+from app.db.session import SessionLocal, get_async_sessionmaker
+from app.core.auth_cache import UserSnapshot, auth_cache
 from app.core.config import settings
+from app.core.pagination import decode_cursor
 from app.core.security import verify_password
 from app.models.user import User
 from app.schemas.token import TokenPayload
@@ -23,12 +26,25 @@ def get_db() -> Generator:
         db.close()
 
 
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    async with get_async_sessionmaker()() as db:
+        yield db
+
+
 def get_current_user(
     db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)
-) -> User:
+) -> UserSnapshot:
     """
-    Validate token and return current user
+    Validate token and return a snapshot of the current user
+
+    Verified tokens are cached, so repeated requests with the same token skip
+    both JWT decoding and the user query. Use get_current_db_user when the
+    endpoint needs a live ORM object.
     """
+    snapshot = auth_cache.get(token)
+    if snapshot is not None:
+        return snapshot
+
     try:
         payload = jwt.decode(
             token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
@@ -46,6 +62,25 @@ def get_current_user(
         raise HTTPException(status_code=404, detail="User not found")
     if not user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
+    snapshot = UserSnapshot.from_user(user)
+    auth_cache.set(token, snapshot, expires_at=token_data.exp)
+    return snapshot
+
+
+def get_current_db_user(
+    db: Session = Depends(get_db),
+    current_user: UserSnapshot = Depends(get_current_user),
+) -> User:
+    """
+    Return the current user as an ORM object bound to the request session
+
+    Use this instead of get_current_user when the endpoint modifies the user or
+    needs columns and relationships that are not in the snapshot. It costs one
+    primary-key query per request.
+    """
+    user = db.get(User, current_user.id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
     return user
 
 
@@ -59,3 +94,19 @@ def authenticate_user(db: Session, email: str, password: str) -> User:
     if not verify_password(password, user.hashed_password):
         return None
     return user
+
+
+def get_after_id(
+    cursor: Optional[str] = Query(
+        None, description="上一页响应头 X-Next-Cursor 中返回的游标"
+    )
+) -> Optional[int]:
+    """解析分页游标，返回上一页最后一条记录的ID"""
+    if cursor is None:
+        return None
+    try:
+        return decode_cursor(cursor)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
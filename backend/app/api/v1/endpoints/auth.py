@@ -31,7 +31,7 @@ router = APIRouter()
 
 
 @router.post("/login", response_model=Token)
-async def login_access_token(
+def login_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)
 ) -> Any:
     """
@@ -73,7 +73,7 @@ async def test_token() -> Any:
 
 
 @router.post("/password-reset-request", status_code=status.HTTP_202_ACCEPTED)
-async def request_password_reset(
+def request_password_reset(
     reset_request: PasswordResetRequest,
     background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
@@ -123,7 +123,7 @@ async def reset_password_form(
 
 
 @router.post("/reset-password", response_class=HTMLResponse)
-async def reset_password(
+def reset_password(
     token: str = Form(...),
     password: str = Form(...),
     confirm_password: str = Form(...),
@@ -1,10 +1,12 @@
 from typing import Any, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, Response, status, Query
 from sqlalchemy.orm import Session
 
-from app import crud, models
-from app.api.deps import get_db, get_current_user
+from app import crud
+from app.api.deps import get_after_id, get_db, get_current_user
+from app.core.auth_cache import UserSnapshot
+from app.core.pagination import set_next_cursor
 from app.models.feedback import FeedbackPriority, FeedbackStatus, FeedbackType
 from app.schemas.feedback import (
     Feedback,
@@ -59,10 +61,10 @@ async def get_feedback_types() -> Any:
 
 
 @router.post("/", response_model=Feedback, status_code=status.HTTP_201_CREATED)
-async def create_feedback(
+def create_feedback(
     feedback_in: FeedbackCreate,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
+    current_user: UserSnapshot = Depends(get_current_user),
 ) -> Any:
     """创建新的反馈"""
     # 根据反馈类型设置默认优先级（如果未提供）
@@ -113,17 +115,20 @@ async def create_feedback(
 
 
 @router.get("/", response_model=List[Feedback])
-async def read_feedbacks(
+def read_feedbacks(
+    response: Response,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
+    current_user: UserSnapshot = Depends(get_current_user),
     skip: int = 0,
     limit: int = 100,
     status: Optional[str] = None,
+    after_id: Optional[int] = Depends(get_after_id),
 ) -> Any:
-    """获取当前用户的所有反馈"""
+    """获取当前用户的所有反馈，下一页的游标在响应头 X-Next-Cursor 中返回"""
     feedbacks = crud.feedback.get_by_user(
-        db=db, user_id=current_user.id, skip=skip, limit=limit
+        db=db, user_id=current_user.id, skip=skip, limit=limit, after_id=after_id
     )
+    set_next_cursor(response, feedbacks)
 
     # 如果指定了状态，过滤结果
     if status:
@@ -133,10 +138,10 @@ async def read_feedbacks(
 
 
 @router.get("/{feedback_id}", response_model=Feedback)
-async def read_feedback(
+def read_feedback(
     feedback_id: int,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
+    current_user: UserSnapshot = Depends(get_current_user),
 ) -> Any:
     """获取特定反馈"""
     feedback = crud.feedback.get_by_id_and_user(
@@ -150,11 +155,11 @@ async def read_feedback(
 
 
 @router.put("/{feedback_id}", response_model=Feedback)
-async def update_feedback(
+def update_feedback(
     feedback_id: int,
     feedback_in: FeedbackUpdate,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
+    current_user: UserSnapshot = Depends(get_current_user),
 ) -> Any:
     """更新反馈"""
     feedback = crud.feedback.get_by_id_and_user(
@@ -182,19 +187,24 @@ async def update_feedback(
 
 
 @router.get("/admin/all", response_model=List[FeedbackWithDetails])
-async def read_all_feedbacks(
+def read_all_feedbacks(
+    response: Response,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
+    current_user: UserSnapshot = Depends(get_current_user),
     skip: int = 0,
     limit: int = 100,
     priority: Optional[str] = None,
     status: Optional[str] = None,
+    after_id: Optional[int] = Depends(get_after_id),
 ) -> Any:
-    """获取所有反馈（管理员）"""
+    """获取所有反馈（管理员），下一页的游标在响应头 X-Next-Cursor 中返回"""
     # TODO: 添加管理员权限检查
 
     # 获取所有反馈
-    feedbacks = crud.feedback.get_multi(db=db, skip=skip, limit=limit)
+    feedbacks = crud.feedback.get_multi_with_details(
+        db=db, skip=skip, limit=limit, after_id=after_id
+    )
+    set_next_cursor(response, feedbacks)
 
     # 根据优先级和状态过滤
     if priority:
@@ -225,17 +235,22 @@ async def read_all_feedbacks(
 
 
 @router.get("/admin/high-priority", response_model=List[FeedbackWithDetails])
-async def read_high_priority_feedbacks(
+def read_high_priority_feedbacks(
+    response: Response,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
+    current_user: UserSnapshot = Depends(get_current_user),
     skip: int = 0,
     limit: int = 100,
+    after_id: Optional[int] = Depends(get_after_id),
 ) -> Any:
-    """获取所有高优先级反馈（管理员）"""
+    """获取所有高优先级反馈（管理员），下一页的游标在响应头 X-Next-Cursor 中返回"""
     # TODO: 添加管理员权限检查
 
     # 获取高优先级反馈
-    feedbacks = crud.feedback.get_high_priority(db=db, skip=skip, limit=limit)
+    feedbacks = crud.feedback.get_high_priority(
+        db=db, skip=skip, limit=limit, after_id=after_id
+    )
+    set_next_cursor(response, feedbacks)
 
     # 添加详细信息
     result = []
@@ -260,11 +275,11 @@ async def read_high_priority_feedbacks(
 
 
 @router.put("/admin/{feedback_id}", response_model=Feedback)
-async def admin_update_feedback(
+def admin_update_feedback(
     feedback_id: int,
     feedback_in: FeedbackUpdate,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
+    current_user: UserSnapshot = Depends(get_current_user),
 ) -> Any:
     """管理员更新反馈"""
     # TODO: 添加管理员权限检查
@@ -287,11 +302,11 @@ async def admin_update_feedback(
 
 
 @router.post("/admin/{feedback_id}/resolve", response_model=Feedback)
-async def resolve_feedback(
+def resolve_feedback(
     feedback_id: int,
     resolution_notes: str = Query(..., description="解决方案说明"),
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
+    current_user: UserSnapshot = Depends(get_current_user),
 ) -> Any:
     """解决反馈（管理员）"""
     # TODO: 添加管理员权限检查
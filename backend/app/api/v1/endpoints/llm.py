@@ -1,10 +1,14 @@
 import json
-from typing import AsyncGenerator, List
+from typing import AsyncGenerator, List, Optional
 from fastapi import APIRouter, Depends, HTTPException
 import httpx
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
-from app.api.deps import get_current_user, get_db
+from app.core.metrics import track_external_call
+from app.api.deps import get_current_user, get_async_db
+from app.core.auth_cache import UserSnapshot
 from app.models.llm import Conversation, Message
 from app.schemas.llm import (
     LLMRequest,
@@ -35,27 +39,30 @@ async def call_llm_api(
 
     url = str(settings.LLM_URL)
 
-    async with httpx.AsyncClient() as client:
-        async with client.stream(
-            "POST", url, json=request_data, timeout=60.0
-        ) as response:
-            if response.status_code != 200:
-                error_msg = json.dumps(
-                    {
-                        "status": -1,
-                        "error": f"LLM API请求失败: {response.status_code}",
-                        "answer": "",
-                    }
-                )
-                yield f"data:{error_msg}\n\n"
-                return
-
-            async for chunk in response.aiter_text():
-                if chunk.startswith("data:"):
-                    yield chunk
-                else:
-                    # 确保格式正确
-                    yield f"data:{chunk}\n\n"
+    # 耗时包括整个流式响应的传输时间
+    with track_external_call("llm") as call:
+        async with httpx.AsyncClient() as client:
+            async with client.stream(
+                "POST", url, json=request_data, timeout=60.0
+            ) as response:
+                if response.status_code != 200:
+                    call.outcome = "error"
+                    error_msg = json.dumps(
+                        {
+                            "status": -1,
+                            "error": f"LLM API请求失败: {response.status_code}",
+                            "answer": "",
+                        }
+                    )
+                    yield f"data:{error_msg}\n\n"
+                    return
+
+                async for chunk in response.aiter_text():
+                    if chunk.startswith("data:"):
+                        yield chunk
+                    else:
+                        # 确保格式正确
+                        yield f"data:{chunk}\n\n"
 
 
 async def format_history_for_llm(conversation_messages) -> List[str]:
@@ -81,52 +88,63 @@ async def process_llm_request(request: LLMRequest) -> EventSourceResponse:
     )
 
 
+async def get_user_conversation(
+    db: AsyncSession, conversation_id: int, user_id: int
+) -> Optional[Conversation]:
+    """
+    获取属于指定用户的对话
+    """
+    result = await db.execute(
+        select(Conversation).filter(
+            Conversation.id == conversation_id, Conversation.user_id == user_id
+        )
+    )
+    return result.scalars().first()
+
+
 # 创建新对话
 @router.post("/api/conversations", response_model=ConversationResponse)
 async def create_conversation(
     conversation: ConversationCreate,
-    current_user=Depends(get_current_user),
-    db=Depends(get_db),
+    current_user: UserSnapshot = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     创建新的对话
     """
     db_conversation = Conversation(title=conversation.title, user_id=current_user.id)
     db.add(db_conversation)
-    db.commit()
-    db.refresh(db_conversation)
+    await db.commit()
+    await db.refresh(db_conversation)
     return db_conversation
 
 
 # 获取用户的所有对话
 @router.get("/api/conversations", response_model=List[ConversationResponse])
-async def get_conversations(current_user=Depends(get_current_user), db=Depends(get_db)):
+async def get_conversations(
+    current_user: UserSnapshot = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
     """
     获取当前用户的所有对话列表
     """
-    conversations = (
-        db.query(Conversation).filter(Conversation.user_id == current_user.id).all()
+    result = await db.execute(
+        select(Conversation).filter(Conversation.user_id == current_user.id)
     )
-    return conversations
+    return result.scalars().all()
 
 
 # 获取特定对话
 @router.get("/api/conversations/{conversation_id}", response_model=ConversationResponse)
 async def get_conversation(
     conversation_id: int,
-    current_user=Depends(get_current_user),
-    db=Depends(get_db),
+    current_user: UserSnapshot = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     获取指定ID的对话信息
     """
-    conversation = (
-        db.query(Conversation)
-        .filter(
-            Conversation.id == conversation_id, Conversation.user_id == current_user.id
-        )
-        .first()
-    )
+    conversation = await get_user_conversation(db, conversation_id, current_user.id)
     if not conversation:
         raise HTTPException(status_code=404, detail="对话不存在")
     return conversation
@@ -139,30 +157,23 @@ async def get_conversation(
 )
 async def get_messages(
     conversation_id: int,
-    current_user=Depends(get_current_user),
-    db=Depends(get_db),
+    current_user: UserSnapshot = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     获取指定对话的所有消息
     """
     # 验证对话存在且属于当前用户
-    conversation = (
-        db.query(Conversation)
-        .filter(
-            Conversation.id == conversation_id, Conversation.user_id == current_user.id
-        )
-        .first()
-    )
+    conversation = await get_user_conversation(db, conversation_id, current_user.id)
     if not conversation:
         raise HTTPException(status_code=404, detail="对话不存在")
 
-    messages = (
-        db.query(Message)
+    result = await db.execute(
+        select(Message)
         .filter(Message.conversation_id == conversation_id)
         .order_by(Message.created_at)
-        .all()
     )
-    return messages
+    return result.scalars().all()
 
 
 # 创建新消息并获取LLM回复
@@ -170,20 +181,14 @@ async def get_messages(
 async def create_message(
     conversation_id: int,
     message: MessageCreate,
-    current_user=Depends(get_current_user),
-    db=Depends(get_db),
+    current_user: UserSnapshot = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     创建新消息并获取LLM的回复
     """
     # 验证对话存在且属于当前用户
-    conversation = (
-        db.query(Conversation)
-        .filter(
-            Conversation.id == conversation_id, Conversation.user_id == current_user.id
-        )
-        .first()
-    )
+    conversation = await get_user_conversation(db, conversation_id, current_user.id)
     if not conversation:
         raise HTTPException(status_code=404, detail="对话不存在")
 
@@ -192,11 +197,13 @@ async def create_message(
         conversation_id=conversation_id, content=message.content, is_user=True
     )
     db.add(db_message)
-    db.commit()
+    await db.commit()
 
     # 检查是否是第一条消息，如果是则更新对话标题
-    message_count = (
-        db.query(Message).filter(Message.conversation_id == conversation_id).count()
+    message_count = await db.scalar(
+        select(func.count(Message.id)).filter(
+            Message.conversation_id == conversation_id
+        )
     )
     if message_count == 1:
         # 截取用户消息的前30个字符作为标题，如果超过30个字符则添加...
@@ -204,22 +211,20 @@ async def create_message(
         conversation.title = new_title
 
     # 更新对话的更新时间
-    conversation.updated_at = (
-        db.query(Message)
-        .filter(Message.conversation_id == conversation_id)
-        .order_by(Message.created_at.desc())
-        .first()
-        .created_at
+    conversation.updated_at = await db.scalar(
+        select(func.max(Message.created_at)).filter(
+            Message.conversation_id == conversation_id
+        )
     )
-    db.commit()
+    await db.commit()
 
     # 获取历史消息
-    messages = (
-        db.query(Message)
+    result = await db.execute(
+        select(Message)
         .filter(Message.conversation_id == conversation_id)
         .order_by(Message.created_at)
-        .all()
     )
+    messages = result.scalars().all()
     history_chat = await format_history_for_llm(messages)
 
     # 创建LLM请求
@@ -1,11 +1,14 @@
 from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 
-from app import crud, models
+from app import crud
 from app.api import deps
+from app.core.auth_cache import UserSnapshot
 from app.schemas.no_parking_zone import (
     NoParkingZone,
+    NoParkingZoneBatchCreate,
+    NoParkingZoneBatchUpdate,
     NoParkingZoneCreate,
     NoParkingZoneUpdate,
 )
@@ -14,7 +17,7 @@ router = APIRouter()
 
 
 @router.get("/", response_model=List[NoParkingZone])
-async def read_no_parking_zones(
+def read_no_parking_zones(
     db: Session = Depends(deps.get_db),
     skip: int = 0,
     limit: int = 100,
@@ -27,11 +30,11 @@ async def read_no_parking_zones(
 
 
 @router.post("/", response_model=NoParkingZone, status_code=status.HTTP_201_CREATED)
-async def create_no_parking_zone(
+def create_no_parking_zone(
     *,
     db: Session = Depends(deps.get_db),
     zone_in: NoParkingZoneCreate,
-    current_user: models.User = Depends(deps.get_current_user),
+    current_user: UserSnapshot = Depends(deps.get_current_user),
 ) -> Any:
     """
     创建新的禁停区
@@ -41,8 +44,66 @@ async def create_no_parking_zone(
     return zone
 
 
+@router.post(
+    "/batch",
+    response_model=List[NoParkingZone],
+    status_code=status.HTTP_201_CREATED,
+)
+def create_no_parking_zones(
+    *,
+    db: Session = Depends(deps.get_db),
+    batch_in: NoParkingZoneBatchCreate,
+    current_user: UserSnapshot = Depends(deps.get_current_user),
+) -> Any:
+    """
+    在一个事务中批量创建禁停区
+    """
+    return crud.no_parking_zone.create_many(db=db, objs_in=batch_in.items)
+
+
+@router.patch("/batch", response_model=List[NoParkingZone])
+def update_no_parking_zones(
+    *,
+    db: Session = Depends(deps.get_db),
+    batch_in: NoParkingZoneBatchUpdate,
+    current_user: UserSnapshot = Depends(deps.get_current_user),
+) -> Any:
+    """
+    在一个事务中批量更新禁停区，任何一个ID不存在时不做修改
+    """
+    missing = crud.no_parking_zone.missing_ids(db, (item.id for item in batch_in.items))
+    if missing:
+        raise HTTPException(
+            status_code=404, detail=f"No parking zones not found: {missing}"
+        )
+    return crud.no_parking_zone.update_many(
+        db=db,
+        objs_in=[
+            item.model_dump(mode="json", exclude_unset=True) for item in batch_in.items
+        ],
+    )
+
+
+@router.delete("/batch", response_model=List[int])
+def delete_no_parking_zones(
+    *,
+    db: Session = Depends(deps.get_db),
+    ids: List[int] = Query(..., min_length=1, max_length=1000),
+    current_user: UserSnapshot = Depends(deps.get_current_user),
+) -> Any:
+    """
+    在一个事务中批量删除禁停区，返回删除的ID
+    """
+    missing = crud.no_parking_zone.missing_ids(db, ids)
+    if missing:
+        raise HTTPException(
+            status_code=404, detail=f"No parking zones not found: {missing}"
+        )
+    return sorted(crud.no_parking_zone.remove_many(db=db, ids=ids))
+
+
 @router.get("/{zone_id}", response_model=NoParkingZone)
-async def read_no_parking_zone(
+def read_no_parking_zone(
     *,
     db: Session = Depends(deps.get_db),
     zone_id: int,
@@ -57,12 +118,12 @@ async def read_no_parking_zone(
 
 
 @router.put("/{zone_id}", response_model=NoParkingZone)
-async def update_no_parking_zone(
+def update_no_parking_zone(
     *,
     db: Session = Depends(deps.get_db),
     zone_id: int,
     zone_in: NoParkingZoneUpdate,
-    current_user: models.User = Depends(deps.get_current_user),
+    current_user: UserSnapshot = Depends(deps.get_current_user),
 ) -> Any:
     """
     更新禁停区
@@ -77,11 +138,11 @@ async def update_no_parking_zone(
 
 
 @router.delete("/{zone_id}", response_model=NoParkingZone)
-async def delete_no_parking_zone(
+def delete_no_parking_zone(
     *,
     db: Session = Depends(deps.get_db),
     zone_id: int,
-    current_user: models.User = Depends(deps.get_current_user),
+    current_user: UserSnapshot = Depends(deps.get_current_user),
 ) -> Any:
     """
     删除禁停区
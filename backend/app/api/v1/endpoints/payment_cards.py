@@ -1,38 +1,43 @@
-from typing import Any, List
+from typing import Any, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
 
-from app import crud, models, schemas
+from app import crud, schemas
 from app.api import deps
+from app.core.auth_cache import UserSnapshot
+from app.core.pagination import set_next_cursor
 
 router = APIRouter()
 
 
 @router.get("/", response_model=List[schemas.PaymentCard])
-async def read_payment_cards(
+def read_payment_cards(
+    response: Response,
     db: Session = Depends(deps.get_db),
-    current_user: models.User = Depends(deps.get_current_user),
+    current_user: UserSnapshot = Depends(deps.get_current_user),
     skip: int = 0,
     limit: int = 100,
+    after_id: Optional[int] = Depends(deps.get_after_id),
 ) -> Any:
     """
-    获取当前用户的所有支付卡
+    获取当前用户的所有支付卡，下一页的游标在响应头 X-Next-Cursor 中返回
     """
     cards = crud.payment_card.get_by_user(
-        db=db, user_id=current_user.id, skip=skip, limit=limit
+        db=db, user_id=current_user.id, skip=skip, limit=limit, after_id=after_id
     )
+    set_next_cursor(response, cards)
     return cards
 
 
 @router.post(
     "/", response_model=schemas.PaymentCard, status_code=status.HTTP_201_CREATED
 )
-async def create_payment_card(
+def create_payment_card(
     *,
     db: Session = Depends(deps.get_db),
     card_in: schemas.PaymentCardCreate,
-    current_user: models.User = Depends(deps.get_current_user),
+    current_user: UserSnapshot = Depends(deps.get_current_user),
 ) -> Any:
     """
     创建新的支付卡
@@ -49,9 +54,9 @@ async def create_payment_card(
 
 
 @router.get("/default", response_model=schemas.PaymentCard)
-async def read_default_payment_card(
+def read_default_payment_card(
     db: Session = Depends(deps.get_db),
-    current_user: models.User = Depends(deps.get_current_user),
+    current_user: UserSnapshot = Depends(deps.get_current_user),
 ) -> Any:
     """
     获取当前用户的默认支付卡
@@ -66,11 +71,11 @@ async def read_default_payment_card(
 
 
 @router.get("/{card_id}", response_model=schemas.PaymentCard)
-async def read_payment_card(
+def read_payment_card(
     *,
     db: Session = Depends(deps.get_db),
     card_id: int,
-    current_user: models.User = Depends(deps.get_current_user),
+    current_user: UserSnapshot = Depends(deps.get_current_user),
 ) -> Any:
     """
     获取特定支付卡
@@ -86,12 +91,12 @@ async def read_payment_card(
 
 
 @router.put("/{card_id}", response_model=schemas.PaymentCard)
-async def update_payment_card(
+def update_payment_card(
     *,
     db: Session = Depends(deps.get_db),
     card_id: int,
     card_in: schemas.PaymentCardUpdate,
-    current_user: models.User = Depends(deps.get_current_user),
+    current_user: UserSnapshot = Depends(deps.get_current_user),
 ) -> Any:
     """
     更新支付卡
@@ -109,11 +114,11 @@ async def update_payment_card(
 
 
 @router.put("/{card_id}/set_default", response_model=schemas.PaymentCard)
-async def set_default_payment_card(
+def set_default_payment_card(
     *,
     db: Session = Depends(deps.get_db),
     card_id: int,
-    current_user: models.User = Depends(deps.get_current_user),
+    current_user: UserSnapshot = Depends(deps.get_current_user),
 ) -> Any:
     """
     设置指定支付卡为默认卡
@@ -135,11 +140,11 @@ async def set_default_payment_card(
 
 
 @router.delete("/{card_id}", response_model=schemas.PaymentCard)
-async def delete_payment_card(
+def delete_payment_card(
     *,
     db: Session = Depends(deps.get_db),
     card_id: int,
-    current_user: models.User = Depends(deps.get_current_user),
+    current_user: UserSnapshot = Depends(deps.get_current_user),
 ) -> Any:
     """
     删除支付卡
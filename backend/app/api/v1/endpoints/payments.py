@@ -1,41 +1,56 @@
-from typing import Any, List
-from datetime import datetime
+from typing import Any, List, Optional
+from datetime import date, datetime, timedelta
 
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Query,
+    Response,
+    status,
+    BackgroundTasks,
+)
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
-from app import crud, models, schemas
+from app import crud, schemas
 from app.api import deps
+from app.core.auth_cache import UserSnapshot
 from app.core.payment import process_payment
 from app.core.email import send_payment_confirmation
-from app.models.payment import PaymentStatus, PaymentMethod
+from app.core.export import EXPORT_FORMATS, ExportFormat
+from app.core.pagination import set_next_cursor
+from app.models.payment import PaymentMethod, PaymentStatus
 from app.models.rental import RentalStatus
 
 router = APIRouter()
 
 
 @router.get("/", response_model=List[schemas.Payment])
-async def read_payments(
+def read_payments(
+    response: Response,
     db: Session = Depends(deps.get_db),
-    current_user: models.User = Depends(deps.get_current_user),
+    current_user: UserSnapshot = Depends(deps.get_current_user),
     skip: int = 0,
     limit: int = 100,
+    after_id: Optional[int] = Depends(deps.get_after_id),
 ) -> Any:
     """
-    获取当前用户的所有支付记录
+    获取当前用户的所有支付记录，下一页的游标在响应头 X-Next-Cursor 中返回
     """
     payments = crud.payment.get_by_user(
-        db=db, user_id=current_user.id, skip=skip, limit=limit
+        db=db, user_id=current_user.id, skip=skip, limit=limit, after_id=after_id
     )
+    set_next_cursor(response, payments)
     return payments
 
 
 @router.post("/process", response_model=schemas.PaymentConfirmation)
-async def process_payment_endpoint(
+def process_payment_endpoint(
     *,
     db: Session = Depends(deps.get_db),
     payment_in: schemas.PaymentCreate,
-    current_user: models.User = Depends(deps.get_current_user),
+    current_user: UserSnapshot = Depends(deps.get_current_user),
     background_tasks: BackgroundTasks,
 ) -> Any:
     """
@@ -104,7 +119,7 @@ async def process_payment_endpoint(
 
             # 保存卡信息
             saved_card = crud.payment_card.create_with_user(
-                db=db, obj_in=card_create, user_id=current_user.id
+                db=db, obj_in=card_create, user_id=current_user.id, commit=False
             )
             saved_card_id = saved_card.id
 
@@ -132,7 +147,8 @@ async def process_payment_endpoint(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid payment method"
         )
 
-    # 创建支付记录
+    # 先提交一条待处理的支付记录（以及要保存的卡），之后的写入失败时已扣款的交易
+    # 仍有记录可查。提交后不再访问数据库，调用网关期间不保持事务
     payment = crud.payment.create_with_user_and_rental(
         db=db,
         obj_in=schemas.PaymentCreate(
@@ -144,39 +160,63 @@ async def process_payment_endpoint(
             status=PaymentStatus.PENDING,
         ),
         user_id=current_user.id,
+        commit=False,
     )
+    db.commit()
 
-    # 模拟支付处理
     payment_result = process_payment(
         amount=payment_in.amount, card_data=card_data, saved_card_id=saved_card_id
     )
 
-    # 更新支付状态
+    # 支付状态、租赁状态、收入统计和滑板车状态在第二个短事务中一起提交
     payment = crud.payment.update_payment_status(
         db=db,
         db_obj=payment,
         status=payment_result["status"],
         transaction_id=payment_result.get("transaction_id"),
+        commit=False,
     )
 
     # 如果支付成功，更新租赁状态
     if payment_result["success"]:
         # 在实际应用中，可能需要更新租赁状态为已支付
-        crud.rental.update_rental_status(db=db, rental=rental, status=RentalStatus.PAID)
+        crud.rental.update_rental_status(
+            db=db, rental=rental, status=RentalStatus.PAID, commit=False
+        )
+
+        # 增量更新当天的收入统计
+        crud.revenue_stats.apply_payment(
+            db=db, payment=payment, rental=rental, commit=False
+        )
 
         crud.scooter.update_scooter_status(
-            db=db, scooter_id=rental.scooter_id, status="available"
+            db=db, scooter_id=rental.scooter_id, status="available", commit=False
         )
 
+    # 提交前生成响应，提交后不需要再从数据库刷新
+    confirmation = schemas.PaymentConfirmation(
+        payment_id=payment.id,
+        status=payment.status,
+        transaction_id=payment.transaction_id,
+        message=payment_result.get("message", ""),
+        rental_id=payment.rental_id,
+        amount=payment.amount,
+        currency=payment.currency,
+        payment_method=payment.payment_method,
+        payment_date=payment.created_at,
+    )
+    db.commit()
+
+    if payment_result["success"]:
         # 发送支付确认邮件
         payment_info = {
-            "id": payment.id,
-            "rental_id": payment.rental_id,
-            "amount": payment.amount,
-            "currency": payment.currency,
-            "status": payment.status,
+            "id": confirmation.payment_id,
+            "rental_id": confirmation.rental_id,
+            "amount": confirmation.amount,
+            "currency": confirmation.currency,
+            "status": confirmation.status,
             "payment_date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "transaction_id": payment.transaction_id,
+            "transaction_id": confirmation.transaction_id,
         }
 
         background_tasks.add_task(
@@ -186,25 +226,59 @@ async def process_payment_endpoint(
         )
 
     # 返回支付确认信息
-    return schemas.PaymentConfirmation(
-        payment_id=payment.id,
-        status=payment.status,
-        transaction_id=payment.transaction_id,
-        message=payment_result.get("message", ""),
-        rental_id=payment.rental_id,
-        amount=payment.amount,
-        currency=payment.currency,
-        payment_method=payment.payment_method,
-        payment_date=payment.created_at,
+    return confirmation
+
+
+@router.get("/export")
+def export_payments(
+    *,
+    db: Session = Depends(deps.get_db),
+    start_date: date = Query(..., description="导出开始日期"),
+    end_date: date = Query(..., description="导出结束日期（包含）"),
+    format: ExportFormat = Query(ExportFormat.CSV, description="导出格式"),
+    current_user: UserSnapshot = Depends(deps.get_current_user),
+) -> Any:
+    """
+    按日期范围流式导出当前用户的支付记录及其租赁信息
+
+    还没有管理员角色，在此之前只能导出自己的记录，不能导出其他用户的支付数据。
+    """
+    if start_date > end_date:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Start date must be before or equal to end date",
+        )
+
+    media_type, write = EXPORT_FORMATS[format]
+    batches = crud.payment.iter_export_batches(
+        db,
+        start=datetime.combine(start_date, datetime.min.time()),
+        end=datetime.combine(end_date + timedelta(days=1), datetime.min.time()),
+        user_id=current_user.id,
+    )
+
+    def content():
+        # 依赖项的清理代码在响应发送前就会执行，导出结束后由这里关闭会话
+        try:
+            yield from write(batches)
+        finally:
+            batches.close()
+            db.close()
+
+    filename = f"payments_{start_date}_{end_date}.{format.value}"
+    return StreamingResponse(
+        content(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
     )
 
 
 @router.get("/{payment_id}", response_model=schemas.Payment)
-async def read_payment(
+def read_payment(
     *,
     db: Session = Depends(deps.get_db),
     payment_id: int,
-    current_user: models.User = Depends(deps.get_current_user),
+    current_user: UserSnapshot = Depends(deps.get_current_user),
 ) -> Any:
     """
     获取特定支付记录
@@ -14,7 +14,7 @@ router = APIRouter()
 
 
 @router.get("/", response_model=List[RentalConfig])
-async def read_rental_configs(
+def read_rental_configs(
     db: Session = Depends(deps.get_db),
     skip: int = 0,
     limit: int = 100,
@@ -25,7 +25,7 @@ async def read_rental_configs(
 
 
 @router.get("/active", response_model=RentalConfig)
-async def get_active_config(db: Session = Depends(deps.get_db)) -> Any:
+def get_active_config(db: Session = Depends(deps.get_db)) -> Any:
     """获取当前生效的租赁配置"""
     config = crud.rental_config.get_active_config(db)
     if not config:
@@ -36,7 +36,7 @@ async def get_active_config(db: Session = Depends(deps.get_db)) -> Any:
 
 
 @router.post("/", response_model=RentalConfig, status_code=status.HTTP_201_CREATED)
-async def create_rental_config(
+def create_rental_config(
     config_in: RentalConfigCreate,
     db: Session = Depends(deps.get_db),
 ) -> Any:
@@ -46,7 +46,7 @@ async def create_rental_config(
 
 
 @router.put("/{config_id}", response_model=RentalConfig)
-async def update_rental_config(
+def update_rental_config(
     config_id: int,
     config_in: RentalConfigUpdate,
     db: Session = Depends(deps.get_db),
@@ -1,82 +1,102 @@
-from typing import Any, List
+from typing import Any, List, Optional
 from datetime import datetime, timedelta
 
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Depends,
+    HTTPException,
+    Response,
+    status,
+)
 from sqlalchemy.orm import Session
 
-from app import crud, models
+from app import crud
 from app.api import deps
-from app.schemas.rental import Rental, RentalCreate, RentalUpdate, RentalPeriod
+from app.core.auth_cache import UserSnapshot
+from app.schemas.rental import (
+    Rental,
+    RentalCreate,
+    RentalQuote,
+    RentalQuoteRequest,
+    RentalUpdate,
+)
+from app.schemas.scooter import ScooterStatus
+from app.core.availability import availability_index, local_naive
+from app.crud.rental import BOOKABLE_STATUSES
 from app.core.email import send_rental_confirmation
+from app.core.pagination import set_next_cursor
+from app.core.pricing import (
+    RENTAL_PERIOD_HOURS,
+    pricing_cache,
+    quote_costs,
+    user_discount,
+)
 
 router = APIRouter()
 
-# 租赁时长对应的小时数
-RENTAL_PERIOD_HOURS = {
-    RentalPeriod.ONE_HOUR: 1,
-    RentalPeriod.FOUR_HOURS: 4,
-    RentalPeriod.ONE_DAY: 24,
-    RentalPeriod.ONE_WEEK: 168,
-}
-
-
-def calculate_rental_cost(db: Session, rental_period: RentalPeriod) -> float:
-    # 获取当前生效的租赁配置
-    config = crud.rental_config.get_active_config(db)
-    if not config:
-        raise HTTPException(
-            status_code=500, detail="No active rental configuration found"
-        )
-
-    hours = RENTAL_PERIOD_HOURS[rental_period]
-    base_cost = hours * config.base_hourly_rate
-
-    # 从配置中获取对应时段的折扣率
-    discount = config.period_discounts.get(rental_period.value, 1.0)
-
-    return base_cost * discount
-
 
 @router.get("/", response_model=List[Rental])
-async def read_rentals(
-    db: Session = Depends(deps.get_db), skip: int = 0, limit: int = 100
+def read_rentals(
+    response: Response,
+    db: Session = Depends(deps.get_db),
+    skip: int = 0,
+    limit: int = 100,
+    after_id: Optional[int] = Depends(deps.get_after_id),
 ) -> Any:
-    """获取租赁列表"""
-    rentals = crud.rental.get_multi(db, skip=skip, limit=limit)
+    """获取租赁列表，下一页的游标在响应头 X-Next-Cursor 中返回"""
+    rentals = crud.rental.get_multi(db, skip=skip, limit=limit, after_id=after_id)
+    set_next_cursor(response, rentals)
     return rentals
 
 
 @router.post("/", response_model=Rental, status_code=status.HTTP_201_CREATED)
-async def create_rental(
+def create_rental(
     rental_in: RentalCreate,
     background_tasks: BackgroundTasks,
     db: Session = Depends(deps.get_db),
-    current_user: models.User = Depends(deps.get_current_user),
+    current_user: UserSnapshot = Depends(deps.get_current_user),
 ) -> Any:
     """创建新的租赁订单"""
-    start_time = datetime.now() if not rental_in.start_time else rental_in.start_time
+    # 租赁时间统一保存为不带时区的本地时间，带时区的开始时间先转换
+    now = datetime.now()
+    start_time = now if not rental_in.start_time else local_naive(rental_in.start_time)
 
-    # 检查滑板车是否可用
+    # 检查滑板车是否可用（提前拒绝，实际预订在 create_with_scooter 中原子完成）。
+    # 立即开始的租赁需要滑板车当前可用，将来的预订只需要时间段空闲
     scooter = crud.scooter.get(db, id=rental_in.scooter_id)
     if not scooter:
         raise HTTPException(status_code=404, detail="Scooter not found")
-    if scooter.status != "available":
+    if start_time <= now:
+        bookable = scooter.status == ScooterStatus.AVAILABLE.value
+    else:
+        bookable = scooter.status in BOOKABLE_STATUSES
+    if not bookable:
         raise HTTPException(status_code=400, detail="Scooter is not available")
 
-    # 计算租赁费用和结束时间
-    rental_cost = calculate_rental_cost(db, rental_in.rental_period)
-
-    scooter_price = crud.scooter_price.get_by_model(db, model=scooter.model)
-    if not scooter_price:
+    # 计算租赁费用和结束时间，与询价使用同一个公式，包括用户折扣
+    pricing = pricing_cache.get(db)
+    if not pricing.has_active_config:
+        raise HTTPException(
+            status_code=500, detail="No active rental configuration found"
+        )
+    if scooter.model not in pricing.price_per_hour:
         raise HTTPException(status_code=404, detail="Scooter price not found")
 
-    rental_cost = rental_cost * scooter_price.price_per_hour
+    discount, _ = user_discount(current_user)
+    rental_cost = quote_costs(
+        pricing, [scooter.model], [rental_in.rental_period], [discount]
+    ).item()
 
     end_time = start_time + timedelta(
         hours=RENTAL_PERIOD_HOURS[rental_in.rental_period]
     )
     rental_in.end_time = end_time
 
+    # 检查该时间段是否与滑板车已有的预订重叠
+    if not availability_index.is_free(scooter.id, start_time, end_time):
+        raise HTTPException(status_code=400, detail="Scooter is not available")
+
     # 创建租赁记录并更新滑板车状态
     rental = crud.rental.create_with_scooter(
         db=db,
@@ -84,7 +104,11 @@ async def create_rental(
         start_time=start_time,
         user_id=current_user.id,
         cost=rental_cost,
+        now=now,
     )
+    if not rental:
+        # 其他请求已同时预订了该滑板车
+        raise HTTPException(status_code=400, detail="Scooter is not available")
 
     # 发送租赁确认邮件
     rental_info = {
@@ -102,8 +126,74 @@ async def create_rental(
     return rental
 
 
+@router.post("/quotes", response_model=List[RentalQuote])
+def quote_rentals(
+    quote_in: RentalQuoteRequest,
+    db: Session = Depends(deps.get_db),
+    current_user: UserSnapshot = Depends(deps.get_current_user),
+) -> Any:
+    """批量询价：一次返回多个滑板车（或型号）、租赁时长和用户组合的价格"""
+    items = quote_in.items
+    pricing = pricing_cache.get(db)
+    if not pricing.has_active_config:
+        raise HTTPException(
+            status_code=500, detail="No active rental configuration found"
+        )
+
+    # 只能按自己的身份询价，避免通过折扣类型探查其他用户
+    if any(item.user_id not in (None, current_user.id) for item in items):
+        raise HTTPException(
+            status_code=403, detail="Quotes are only available for the current user"
+        )
+
+    # 滑板车只查询一次
+    scooter_models = {
+        scooter.id: scooter.model
+        for scooter in crud.scooter.get_by_ids(
+            db, (item.scooter_id for item in items if item.scooter_id is not None)
+        )
+    }
+
+    quote_models = []
+    for item in items:
+        if item.scooter_id is not None:
+            if item.scooter_id not in scooter_models:
+                raise HTTPException(
+                    status_code=404, detail=f"Scooter {item.scooter_id} not found"
+                )
+            model = scooter_models[item.scooter_id]
+        else:
+            model = item.model
+        if model not in pricing.price_per_hour:
+            raise HTTPException(
+                status_code=404, detail=f"Scooter price not found for model {model}"
+            )
+        quote_models.append(model)
+
+    discount, discount_type = user_discount(current_user)
+    costs = quote_costs(
+        pricing,
+        quote_models,
+        [item.rental_period for item in items],
+        [discount] * len(items),
+    )
+
+    return [
+        RentalQuote(
+            scooter_id=item.scooter_id,
+            model=model,
+            rental_period=item.rental_period,
+            user_id=current_user.id,
+            discount=discount,
+            discount_type=discount_type,
+            cost=cost,
+        )
+        for item, model, cost in zip(items, quote_models, costs.tolist())
+    ]
+
+
 @router.get("/{rental_id}", response_model=Rental)
-async def read_rental(rental_id: int, db: Session = Depends(deps.get_db)) -> Any:
+def read_rental(rental_id: int, db: Session = Depends(deps.get_db)) -> Any:
     """获取特定租赁记录"""
     rental = crud.rental.get_by_id(db, rental_id)
     if not rental:
@@ -112,7 +202,7 @@ async def read_rental(rental_id: int, db: Session = Depends(deps.get_db)) -> Any
 
 
 @router.put("/{rental_id}", response_model=Rental)
-async def update_rental(
+def update_rental(
     rental_id: int, rental_in: RentalUpdate, db: Session = Depends(deps.get_db)
 ) -> Any:
     """更新租赁记录"""
@@ -120,15 +210,19 @@ async def update_rental(
     if not rental:
         raise HTTPException(status_code=404, detail="Rental not found")
     rental = crud.rental.update_rental(db, rental=rental, rental_in=rental_in)
+    if rental is None:
+        raise HTTPException(
+            status_code=409, detail="Rental time overlaps another booking"
+        )
     return rental
 
 
 @router.patch("/{rental_id}", response_model=Rental)
-async def update_rental_status(
+def update_rental_status(
     rental_id: int,
     rental_in: RentalUpdate,
     db: Session = Depends(deps.get_db),
-    current_user: models.User = Depends(deps.get_current_user),
+    current_user: UserSnapshot = Depends(deps.get_current_user),
 ) -> Any:
     """更新租赁状态"""
     db_rental = crud.rental.get(db, id=rental_id)
@@ -141,11 +235,15 @@ async def update_rental_status(
     updated_rental = crud.rental.update_rental(
         db, rental=db_rental, rental_in=rental_in
     )
+    if updated_rental is None:
+        raise HTTPException(
+            status_code=409, detail="Rental time overlaps another booking"
+        )
     return updated_rental
 
 
 @router.delete("/{rental_id}", response_model=Rental)
-async def delete_rental(rental_id: int, db: Session = Depends(deps.get_db)) -> Any:
+def delete_rental(rental_id: int, db: Session = Depends(deps.get_db)) -> Any:
     """删除租赁记录"""
     rental = crud.rental.delete_rental(db, rental_id=rental_id)
     if not rental:
@@ -154,10 +252,10 @@ async def delete_rental(rental_id: int, db: Session = Depends(deps.get_db)) -> A
 
 
 @router.post("/{rental_id}/end", response_model=Rental)
-async def end_rental(
+def end_rental(
     rental_id: int,
     db: Session = Depends(deps.get_db),
-    current_user: models.User = Depends(deps.get_current_user),
+    current_user: UserSnapshot = Depends(deps.get_current_user),
 ) -> Any:
     """结束租赁"""
     # 获取租赁记录
@@ -169,15 +267,19 @@ async def end_rental(
     if rental.user_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized")
 
-    # 更新租赁状态为已完成
+    # 更新租赁状态为已完成，并将滑板车状态更新为可用，两者在同一个事务中提交
     rental_update = RentalUpdate(status="completed")
     updated_rental = crud.rental.update_rental(
-        db, rental=rental, rental_in=rental_update
+        db, rental=rental, rental_in=rental_update, commit=False
+    )
+    crud.scooter.update_scooter_status(
+        db,
+        scooter_id=rental.scooter_id,
+        status=ScooterStatus.AVAILABLE.value,
+        commit=False,
     )
 
-    # 更新滑板车状态为可用
-    scooter = crud.scooter.get(db, id=rental.scooter_id)
-    if scooter:
-        crud.scooter.update(db, db_obj=scooter, obj_in={"status": "available"})
-
-    return updated_rental
+    # 提交前生成响应，提交后不需要再从数据库刷新
+    response = Rental.model_validate(updated_rental)
+    db.commit()
+    return response
@@ -1,20 +1,24 @@
-from typing import Any, Optional
-from datetime import date
+from typing import Any, List, Optional, Tuple
+from datetime import date, datetime, timedelta
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 
-from app import crud, models, schemas
+from app import crud, schemas
+from app import analytics
 from app.api import deps
+from app.core.auth_cache import UserSnapshot
+from app.crud.revenue_stats import covers_range, pick_granularity
+from app.schemas.revenue_stats import RevenueGranularity
 
 router = APIRouter()
 
 
 @router.get("/daily/{stats_date}", response_model=schemas.revenue_stats.RevenueStats)
-async def get_daily_stats(
+def get_daily_stats(
     stats_date: date,
     db: Session = Depends(deps.get_db),
-    current_user: models.User = Depends(deps.get_current_user),
+    current_user: UserSnapshot = Depends(deps.get_current_user),
 ) -> Any:
     """
     获取指定日期的收入统计数据
@@ -37,10 +41,10 @@ async def get_daily_stats(
 
 
 @router.get("/weekly", response_model=schemas.revenue_stats.RevenueSummary)
-async def get_weekly_stats(
+def get_weekly_stats(
     end_date: Optional[date] = Query(None, description="统计结束日期，默认为今天"),
     db: Session = Depends(deps.get_db),
-    current_user: models.User = Depends(deps.get_current_user),
+    current_user: UserSnapshot = Depends(deps.get_current_user),
 ) -> Any:
     """
     获取最近一周的收入统计汇总
@@ -63,11 +67,11 @@ async def get_weekly_stats(
 
 
 @router.get("/custom", response_model=schemas.revenue_stats.RevenueSummary)
-async def get_custom_period_stats(
+def get_custom_period_stats(
     start_date: date = Query(..., description="统计开始日期"),
     end_date: date = Query(..., description="统计结束日期"),
     db: Session = Depends(deps.get_db),
-    current_user: models.User = Depends(deps.get_current_user),
+    current_user: UserSnapshot = Depends(deps.get_current_user),
 ) -> Any:
     """
     获取自定义日期范围的收入统计汇总
@@ -94,11 +98,51 @@ async def get_custom_period_stats(
     return summary
 
 
+@router.get("/series", response_model=schemas.revenue_stats.RevenueSeries)
+def get_revenue_series(
+    start_date: date = Query(..., description="统计开始日期"),
+    end_date: date = Query(..., description="统计结束日期"),
+    granularity: Optional[RevenueGranularity] = Query(
+        None, description="统计粒度，默认选择能恰好覆盖日期范围的最粗粒度"
+    ),
+    db: Session = Depends(deps.get_db),
+    current_user: UserSnapshot = Depends(deps.get_current_user),
+) -> Any:
+    """
+    按小时、天、周或月获取日期范围内的收入时间序列
+    """
+    # 检查日期是否有效
+    today = date.today()
+    if start_date > today or end_date > today:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cannot get statistics for future dates",
+        )
+
+    if start_date > end_date:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Start date must be before or equal to end date",
+        )
+
+    if granularity is None:
+        granularity = pick_granularity(start_date, end_date)
+    elif not covers_range(granularity, start_date, end_date):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Date range must align with {granularity.value} boundaries",
+        )
+
+    return crud.revenue_stats.get_series(
+        db, granularity=granularity, start_date=start_date, end_date=end_date
+    )
+
+
 @router.post("/refresh/{stats_date}", response_model=schemas.revenue_stats.RevenueStats)
-async def refresh_daily_stats(
+def refresh_daily_stats(
     stats_date: date,
     db: Session = Depends(deps.get_db),
-    current_user: models.User = Depends(deps.get_current_user),
+    current_user: UserSnapshot = Depends(deps.get_current_user),
 ) -> Any:
     """
     刷新指定日期的收入统计数据
@@ -114,3 +158,78 @@ async def refresh_daily_stats(
     stats = crud.revenue_stats.create_or_update_daily_stats(db, stats_date=stats_date)
 
     return stats
+
+
+def load_analytics_range(
+    db: Session, start_date: date, end_date: date
+) -> Tuple[analytics.FleetColumns, datetime, datetime]:
+    """检查日期范围并读取分析所需的车队数据"""
+    if start_date > end_date:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Start date must be before or equal to end date",
+        )
+    start = datetime.combine(start_date, datetime.min.time())
+    end = datetime.combine(end_date + timedelta(days=1), datetime.min.time())
+    return analytics.load_fleet_columns(db, start=start, end=end), start, end
+
+
+# 分析接口计算量较大，使用同步函数在线程池中执行，避免阻塞事件循环
+
+
+@router.get("/analytics/utilisation", response_model=List[schemas.ScooterUtilisation])
+def get_scooter_utilisation(
+    start_date: date = Query(..., description="统计开始日期"),
+    end_date: date = Query(..., description="统计结束日期"),
+    db: Session = Depends(deps.get_db),
+    current_user: UserSnapshot = Depends(deps.get_current_user),
+) -> Any:
+    """
+    获取每辆滑板车在日期范围内的利用率
+    """
+    fleet, start, end = load_analytics_range(db, start_date, end_date)
+    return analytics.scooter_utilisation(
+        fleet, start=start, end=end, now=datetime.now()
+    )
+
+
+@router.get("/analytics/revenue-by-model", response_model=List[schemas.ModelRevenue])
+def get_revenue_by_model(
+    start_date: date = Query(..., description="统计开始日期"),
+    end_date: date = Query(..., description="统计结束日期"),
+    db: Session = Depends(deps.get_db),
+    current_user: UserSnapshot = Depends(deps.get_current_user),
+) -> Any:
+    """
+    按滑板车型号获取日期范围内开始的租赁的收入
+    """
+    fleet, start, end = load_analytics_range(db, start_date, end_date)
+    return analytics.revenue_by_model(fleet, start=start, end=end)
+
+
+@router.get("/analytics/demand-heatmap", response_model=schemas.DemandHeatmap)
+def get_demand_heatmap(
+    start_date: date = Query(..., description="统计开始日期"),
+    end_date: date = Query(..., description="统计结束日期"),
+    db: Session = Depends(deps.get_db),
+    current_user: UserSnapshot = Depends(deps.get_current_user),
+) -> Any:
+    """
+    获取按星期和小时统计的租赁需求热力图
+    """
+    fleet, start, end = load_analytics_range(db, start_date, end_date)
+    return {"counts": analytics.demand_heatmap(fleet, start=start, end=end)}
+
+
+@router.get("/analytics/ride-duration", response_model=List[schemas.PeriodDuration])
+def get_ride_duration(
+    start_date: date = Query(..., description="统计开始日期"),
+    end_date: date = Query(..., description="统计结束日期"),
+    db: Session = Depends(deps.get_db),
+    current_user: UserSnapshot = Depends(deps.get_current_user),
+) -> Any:
+    """
+    按预订时长获取平均实际骑行时长
+    """
+    fleet, start, end = load_analytics_range(db, start_date, end_date)
+    return analytics.average_duration_by_period(fleet, start=start, end=end)
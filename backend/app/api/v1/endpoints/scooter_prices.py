@@ -1,10 +1,11 @@
 from typing import Any, List
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 
-from app import crud, models, schemas
+from app import crud, schemas
 from app.api import deps
+from app.core.auth_cache import UserSnapshot
 
 router = APIRouter()
 
@@ -14,7 +15,7 @@ def create_scooter_price(
     *,
     db: Session = Depends(deps.get_db),
     scooter_price_in: schemas.ScooterPriceCreate,
-    current_user: models.User = Depends(deps.get_current_user),
+    current_user: UserSnapshot = Depends(deps.get_current_user),
 ) -> Any:
     """
     Create new scooter price. (Superuser only)
@@ -34,7 +35,7 @@ def read_scooter_prices(
     db: Session = Depends(deps.get_db),
     skip: int = 0,
     limit: int = 100,
-    current_user: models.User = Depends(deps.get_current_user),
+    current_user: UserSnapshot = Depends(deps.get_current_user),
 ) -> Any:
     """
     Retrieve scooter prices.
@@ -43,12 +44,92 @@ def read_scooter_prices(
     return scooter_prices
 
 
+@router.post("/batch", response_model=List[schemas.ScooterPrice])
+def create_scooter_prices(
+    *,
+    db: Session = Depends(deps.get_db),
+    batch_in: schemas.ScooterPriceBatchCreate,
+    current_user: UserSnapshot = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Create scooter prices in one transaction. (Superuser only)
+    """
+    models_in = [item.model for item in batch_in.items]
+    conflicts = sorted(
+        {m for m in models_in if models_in.count(m) > 1}
+        | {p.model for p in crud.scooter_price.get_by_models(db, models=models_in)}
+    )
+    if conflicts:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Prices for scooter models {conflicts} already exist or are duplicated.",
+        )
+    return crud.scooter_price.create_many(db=db, objs_in=batch_in.items)
+
+
+@router.patch("/batch", response_model=List[schemas.ScooterPrice])
+def update_scooter_prices(
+    *,
+    db: Session = Depends(deps.get_db),
+    batch_in: schemas.ScooterPriceBatchUpdate,
+    current_user: UserSnapshot = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Update scooter prices in one transaction. (Superuser only)
+    """
+    missing = crud.scooter_price.missing_ids(db, (item.id for item in batch_in.items))
+    if missing:
+        raise HTTPException(
+            status_code=404, detail=f"Scooter prices not found: {missing}"
+        )
+    # Check if updating models to ones that already exist
+    renamed = {item.id: item.model for item in batch_in.items if item.model}
+    models_in = list(renamed.values())
+    conflicts = sorted(
+        {m for m in models_in if models_in.count(m) > 1}
+        | {
+            p.model
+            for p in crud.scooter_price.get_by_models(db, models=models_in)
+            if renamed.get(p.id) != p.model
+        }
+    )
+    if conflicts:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Prices for scooter models {conflicts} already exist or are duplicated.",
+        )
+    return crud.scooter_price.update_many(
+        db=db,
+        objs_in=[
+            item.model_dump(mode="json", exclude_unset=True) for item in batch_in.items
+        ],
+    )
+
+
+@router.delete("/batch", response_model=List[int])
+def delete_scooter_prices(
+    *,
+    db: Session = Depends(deps.get_db),
+    ids: List[int] = Query(..., min_length=1, max_length=1000),
+    current_user: UserSnapshot = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Delete scooter prices in one transaction and return the deleted ids. (Superuser only)
+    """
+    missing = crud.scooter_price.missing_ids(db, ids)
+    if missing:
+        raise HTTPException(
+            status_code=404, detail=f"Scooter prices not found: {missing}"
+        )
+    return sorted(crud.scooter_price.remove_many(db=db, ids=ids))
+
+
 @router.get("/{model}", response_model=schemas.ScooterPrice)
 def read_scooter_price_by_model(
     *,
     db: Session = Depends(deps.get_db),
     model: str,
-    current_user: models.User = Depends(deps.get_current_user),
+    current_user: UserSnapshot = Depends(deps.get_current_user),
 ) -> Any:
     """
     Get scooter price by model.
@@ -67,7 +148,7 @@ def update_scooter_price(
     db: Session = Depends(deps.get_db),
     id: int,
     scooter_price_in: schemas.ScooterPriceUpdate,
-    current_user: models.User = Depends(deps.get_current_user),
+    current_user: UserSnapshot = Depends(deps.get_current_user),
 ) -> Any:
     """
     Update a scooter price. (Superuser only)
@@ -96,7 +177,7 @@ def delete_scooter_price(
     *,
     db: Session = Depends(deps.get_db),
     id: int,
-    current_user: models.User = Depends(deps.get_current_user),
+    current_user: UserSnapshot = Depends(deps.get_current_user),
 ) -> Any:
     """
     Delete a scooter price. (Superuser only)
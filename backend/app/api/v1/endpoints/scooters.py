@@ -1,25 +1,78 @@
+from datetime import datetime
 from typing import Any, List
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Path,
+    Query,
+    Request,
+    Response,
+    status,
+)
 from sqlalchemy.orm import Session
 
 from app.api import deps
+from app.core.availability import availability_index, local_naive
+from app.core.clusters import MAX_ZOOM, tile_etag, tile_range
+from app.core.config import settings
+from app.core.spatial import scooter_index
+from app.core.telemetry import Reading, telemetry_buffer, to_timestamp
+from app.core.track import between, concat, downsample, to_datetime, to_ms, track_buffer
 from app.crud.scooter import scooter
-from app.schemas.scooter import Scooter, ScooterCreate, ScooterUpdate
+from app.crud.scooter_track import scooter_track
+from app.schemas.scooter import (
+    Scooter,
+    ScooterBatchCreate,
+    ScooterBatchUpdate,
+    ScooterChanges,
+    ScooterCluster,
+    ScooterCreate,
+    ScooterNearby,
+    ScooterStatus,
+    ScooterUpdate,
+)
+from app.schemas.telemetry import (
+    ScooterTrack,
+    TelemetryAck,
+    TelemetryBatch,
+    TrackPoint,
+)
 
 router = APIRouter()
 
+# 附近查询的最大半径（米）和最多返回的数量
+NEARBY_MAX_RADIUS = 20_000
+NEARBY_MAX_RESULTS = 100
+
+# 一次聚合查询最多覆盖的瓦片数，每个瓦片最多 16 个聚合
+CLUSTER_MAX_TILES = 256
+
+# 一次轨迹查询最多返回的点数，超过时需要缩短时间范围或增大采样间隔
+TRACK_MAX_POINTS = 10_000
+
 
 @router.get("/", response_model=List[Scooter])
-async def read_scooters(db: Session = Depends(deps.get_db)) -> Any:
+def read_scooters(db: Session = Depends(deps.get_db)) -> Any:
     """
     Retrieve scooters.
     """
     return scooter.get_multi(db=db)
 
 
+@router.get("/changes", response_model=ScooterChanges)
+def read_scooter_changes(
+    since: int = Query(0, ge=0), db: Session = Depends(deps.get_db)
+) -> Any:
+    """
+    Scooters changed or removed after version `since`, and the version to poll from next.
+    """
+    return scooter.get_changes(db, since=since)
+
+
 @router.post("/", response_model=Scooter, status_code=status.HTTP_201_CREATED)
-async def create_scooter(
+def create_scooter(
     scooter_in: ScooterCreate, db: Session = Depends(deps.get_db)
 ) -> Any:
     """
@@ -28,8 +81,190 @@ async def create_scooter(
     return scooter.create(db=db, obj_in=scooter_in)
 
 
+@router.post(
+    "/batch", response_model=List[Scooter], status_code=status.HTTP_201_CREATED
+)
+def create_scooters(
+    batch_in: ScooterBatchCreate, db: Session = Depends(deps.get_db)
+) -> Any:
+    """
+    Create scooters in one transaction.
+    """
+    return scooter.create_many(db=db, objs_in=batch_in.items)
+
+
+@router.patch("/batch", response_model=List[Scooter])
+def update_scooters(
+    batch_in: ScooterBatchUpdate, db: Session = Depends(deps.get_db)
+) -> Any:
+    """
+    Update scooters in one transaction. Fails without changes if any id is unknown.
+    """
+    missing = scooter.missing_ids(db, (item.id for item in batch_in.items))
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Scooters not found: {missing}",
+        )
+    return scooter.update_many(
+        db=db,
+        objs_in=[
+            item.model_dump(mode="json", exclude_unset=True) for item in batch_in.items
+        ],
+    )
+
+
+@router.delete("/batch", response_model=List[int])
+def delete_scooters(
+    ids: List[int] = Query(..., min_length=1, max_length=1000),
+    db: Session = Depends(deps.get_db),
+) -> Any:
+    """
+    Delete scooters in one transaction and return the deleted ids.
+    """
+    missing = scooter.missing_ids(db, ids)
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Scooters not found: {missing}",
+        )
+    return sorted(scooter.remove_many(db=db, ids=ids))
+
+
+@router.post(
+    "/telemetry", response_model=TelemetryAck, status_code=status.HTTP_202_ACCEPTED
+)
+async def ingest_telemetry(batch_in: TelemetryBatch) -> Any:
+    """
+    Buffer position and battery readings for the next bulk write.
+    """
+    accepted = telemetry_buffer.add(
+        (
+            item.scooter_id,
+            Reading(to_timestamp(item.ts), item.lat, item.lng, item.battery),
+        )
+        for item in batch_in.items
+    )
+    return TelemetryAck(accepted=accepted, buffered=len(telemetry_buffer))
+
+
+@router.get("/available", response_model=List[Scooter])
+def read_available_scooters(
+    start: datetime, end: datetime, db: Session = Depends(deps.get_db)
+) -> Any:
+    """
+    Retrieve scooters that have no booking overlapping [start, end).
+    """
+    start, end = local_naive(start), local_naive(end)
+    if start >= end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start must be earlier than end",
+        )
+    # 维护中或停用的滑板车不能预订，使用中的滑板车在当前租赁结束后可以预订；
+    # 已经开始的时间段只能预订当前可用的滑板车（与创建租赁的检查一致）
+    statuses = [ScooterStatus.AVAILABLE]
+    if start > datetime.now():
+        statuses.append(ScooterStatus.IN_USE)
+    candidates = scooter.get_by_statuses(db, statuses=statuses)
+    free_ids = set(
+        availability_index.free_scooters((s.id for s in candidates), start, end)
+    )
+    return [s for s in candidates if s.id in free_ids]
+
+
+@router.get("/nearby", response_model=List[ScooterNearby])
+def read_nearby_scooters(
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    radius: float = Query(1000, gt=0, le=NEARBY_MAX_RADIUS),
+    k: int = Query(20, ge=1, le=NEARBY_MAX_RESULTS),
+    status: List[ScooterStatus] = Query([ScooterStatus.AVAILABLE]),
+    db: Session = Depends(deps.get_db),
+) -> Any:
+    """
+    Retrieve the k scooters closest to (lat, lng) within radius meters, nearest first.
+    """
+    hits = scooter_index.nearby(lat, lng, radius=radius, k=k, statuses=status)
+    rows = {s.id: s for s in scooter.get_by_ids(db, [id for id, _ in hits])}
+    # 索引可能落后于其他 worker 的写入，以数据库中的状态为准
+    statuses = {s.value for s in status}
+    return [
+        ScooterNearby(
+            **Scooter.model_validate(rows[id]).model_dump(), distance=round(distance, 1)
+        )
+        for id, distance in hits
+        if id in rows and rows[id].status in statuses
+    ]
+
+
+def parse_bbox(bbox: str) -> List[float]:
+    """解析 "min_lng,min_lat,max_lng,max_lat" 格式的范围，不支持跨越 ±180° 经线"""
+    try:
+        min_lng, min_lat, max_lng, max_lat = (float(v) for v in bbox.split(","))
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="bbox must be min_lng,min_lat,max_lng,max_lat",
+        )
+    if not (-180 <= min_lng <= max_lng <= 180 and -90 <= min_lat <= max_lat <= 90):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid bbox coordinates",
+        )
+    return [min_lng, min_lat, max_lng, max_lat]
+
+
+@router.get("/clusters", response_model=List[ScooterCluster])
+async def read_scooter_clusters(
+    bbox: str, zoom: int = Query(..., ge=0, le=MAX_ZOOM)
+) -> Any:
+    """
+    Aggregate scooters inside bbox ("min_lng,min_lat,max_lng,max_lat") for a zoom level.
+    """
+    xs, ys = tile_range(*parse_bbox(bbox), zoom)
+    if len(xs) * len(ys) > CLUSTER_MAX_TILES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"bbox covers more than {CLUSTER_MAX_TILES} tiles at zoom {zoom}",
+        )
+    return [
+        cluster
+        for x in xs
+        for y in ys
+        for cluster in scooter_index.clusters.tile(zoom, x, y)
+    ]
+
+
+@router.get("/clusters/{zoom}/{x}/{y}", response_model=List[ScooterCluster])
+async def read_scooter_cluster_tile(
+    request: Request,
+    response: Response,
+    zoom: int = Path(..., ge=0, le=MAX_ZOOM),
+    x: int = Path(..., ge=0),
+    y: int = Path(..., ge=0),
+) -> Any:
+    """
+    Scooter clusters in one Web Mercator tile, cacheable by clients and CDNs.
+    """
+    if x >= 1 << zoom or y >= 1 << zoom:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Tile not found",
+        )
+    clusters = scooter_index.clusters.tile(zoom, x, y)
+    headers = {
+        "ETag": tile_etag(clusters),
+        "Cache-Control": f"public, max-age={settings.CLUSTER_TILE_MAX_AGE_SECONDS}",
+    }
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return clusters
+
+
 @router.get("/{scooter_id}", response_model=Scooter)
-async def read_scooter(scooter_id: int, db: Session = Depends(deps.get_db)) -> Any:
+def read_scooter(scooter_id: int, db: Session = Depends(deps.get_db)) -> Any:
     """
     Get a specific scooter by id.
     """
@@ -41,8 +276,55 @@ async def read_scooter(scooter_id: int, db: Session = Depends(deps.get_db)) -> A
     return scooter_obj
 
 
+@router.get("/{scooter_id}/track", response_model=ScooterTrack)
+def read_scooter_track(
+    scooter_id: int,
+    start: datetime = Query(..., alias="from"),
+    end: datetime = Query(..., alias="to"),
+    resolution: int = Query(0, ge=0),
+    db: Session = Depends(deps.get_db),
+) -> Any:
+    """
+    Position history of a scooter in [from, to], keeping one point per resolution seconds.
+    """
+    start, end = local_naive(start), local_naive(end)
+    if start >= end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="from must be earlier than to",
+        )
+    if not scooter.get(db=db, id=scooter_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Scooter not found"
+        )
+    stored = scooter_track.get_track(db, scooter_id=scooter_id, start=start, end=end)
+    # 还没写入数据库的读数
+    pending = between(track_buffer.pending(scooter_id), to_ms(start), to_ms(end))
+    points = downsample(concat([stored, pending]), resolution)
+    if points.size > TRACK_MAX_POINTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Track has more than {TRACK_MAX_POINTS} points, "
+            "use a shorter range or a larger resolution",
+        )
+    return ScooterTrack(
+        scooter_id=scooter_id,
+        resolution=resolution,
+        points=[
+            # 轨迹以 float32 保存，约 1 米精度
+            TrackPoint(
+                ts=to_datetime(ts),
+                lat=round(lat, 5),
+                lng=round(lng, 5),
+                battery=battery,
+            )
+            for ts, lat, lng, battery in zip(*(column.tolist() for column in points))
+        ],
+    )
+
+
 @router.put("/{scooter_id}", response_model=Scooter)
-async def update_scooter(
+def update_scooter(
     scooter_id: int, scooter_in: ScooterUpdate, db: Session = Depends(deps.get_db)
 ) -> Any:
     """
@@ -57,7 +339,7 @@ async def update_scooter(
 
 
 @router.delete("/{scooter_id}", response_model=Scooter)
-async def delete_scooter(scooter_id: int, db: Session = Depends(deps.get_db)) -> Any:
+def delete_scooter(scooter_id: int, db: Session = Depends(deps.get_db)) -> Any:
     """
     Delete a scooter.
     """
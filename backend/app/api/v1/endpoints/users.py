@@ -4,6 +4,8 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 
 from app.api.deps import get_db, get_current_user
+from app.core.auth_cache import UserSnapshot
+from app.core.pricing import user_discount
 from app.crud.user import user
 from app.schemas.user import HasDiscount, User, UserCreate, UserUpdate
 
@@ -11,7 +13,7 @@ router = APIRouter()
 
 
 @router.get("/me", response_model=User)
-async def read_users_me(current_user=Depends(get_current_user)):
+def read_users_me(current_user: UserSnapshot = Depends(get_current_user)):
     """
     get current user
     """
@@ -19,7 +21,7 @@ async def read_users_me(current_user=Depends(get_current_user)):
 
 
 @router.get("/", response_model=List[User])
-async def read_users(db: Session = Depends(get_db)) -> Any:
+def read_users(db: Session = Depends(get_db)) -> Any:
     """
     Retrieve users.
     """
@@ -27,7 +29,7 @@ async def read_users(db: Session = Depends(get_db)) -> Any:
 
 
 @router.post("/", response_model=User, status_code=status.HTTP_201_CREATED)
-async def create_user(user_in: UserCreate, db: Session = Depends(get_db)) -> Any:
+def create_user(user_in: UserCreate, db: Session = Depends(get_db)) -> Any:
     """
     Create new user.
     """
@@ -41,7 +43,7 @@ async def create_user(user_in: UserCreate, db: Session = Depends(get_db)) -> Any
 
 
 @router.get("/{user_id}", response_model=User)
-async def read_user(user_id: int, db: Session = Depends(get_db)) -> Any:
+def read_user(user_id: int, db: Session = Depends(get_db)) -> Any:
     """
     Get a specific user by id.
     """
@@ -54,7 +56,7 @@ async def read_user(user_id: int, db: Session = Depends(get_db)) -> Any:
 
 
 @router.put("/{user_id}", response_model=User)
-async def update_user(
+def update_user(
     user_id: int, user_in: UserUpdate, db: Session = Depends(get_db)
 ) -> Any:
     """
@@ -69,9 +71,7 @@ async def update_user(
 
 
 @router.patch("/{user_id}", response_model=User)
-async def patch_user(
-    user_id: int, user_in: UserUpdate, db: Session = Depends(get_db)
-) -> Any:
+def patch_user(user_id: int, user_in: UserUpdate, db: Session = Depends(get_db)) -> Any:
     """
     Partially update a user.
     """
@@ -84,7 +84,7 @@ async def patch_user(
 
 
 @router.delete("/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_user(user_id: int, db: Session = Depends(get_db)) -> None:
+def delete_user(user_id: int, db: Session = Depends(get_db)) -> None:
     """
     Delete a user.
     """
@@ -98,8 +98,8 @@ async def delete_user(user_id: int, db: Session = Depends(get_db)) -> None:
 
 
 @router.get("/has_discount", response_model=HasDiscount)
-async def check_discount(
-    current_user: User = Depends(get_current_user),
+def check_discount(
+    current_user: UserSnapshot = Depends(get_current_user),
 ) -> HasDiscount:
     """
     Check if the user has a discount.
@@ -109,10 +109,9 @@ async def check_discount(
             status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
         )
 
-    if current_user.age > 60:
-        return HasDiscount(has_discount=True, discount=0.8, discount_type="old")
-
-    if current_user.school is not None:
-        return HasDiscount(has_discount=True, discount=0.9, discount_type="student")
-
-    return HasDiscount(has_discount=False, discount=1, discount_type="none")
+    discount, discount_type = user_discount(current_user)
+    return HasDiscount(
+        has_discount=discount_type != "none",
+        discount=discount,
+        discount_type=discount_type,
+    )
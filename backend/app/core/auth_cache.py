@@ -0,0 +1,71 @@
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.models.user import User
+
+
+@dataclass(frozen=True)
+class UserSnapshot:
+    """认证通过的用户信息，只包含接口需要的列，不绑定数据库会话"""
+
+    id: int
+    email: str
+    name: Optional[str]
+    is_active: bool
+    age: Optional[int]
+    school: Optional[str]
+
+    @classmethod
+    def from_user(cls, user: User) -> "UserSnapshot":
+        return cls(
+            id=user.id,
+            email=user.email,
+            name=user.name,
+            is_active=user.is_active,
+            age=user.age,
+            school=user.school,
+        )
+
+
+class AuthCache:
+    """已验证的令牌 -> 用户快照
+
+    缓存命中时不需要再解码令牌和查询数据库。条目的过期时间不超过令牌本身的过期
+    时间；用户被修改或删除后调用 invalidate_user 清除该用户的所有令牌。
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.ttl = ttl
+        self._cache = LRUCache(maxsize=maxsize)
+
+    def get(self, token: str) -> Optional[UserSnapshot]:
+        if self.ttl <= 0:
+            return None
+        return self._cache.get(token)
+
+    def set(
+        self, token: str, snapshot: UserSnapshot, expires_at: Optional[int] = None
+    ) -> None:
+        """缓存快照，expires_at 为令牌的过期时间（Unix 时间戳）"""
+        ttl = self.ttl
+        if expires_at is not None:
+            ttl = min(ttl, expires_at - time.time())
+        if ttl > 0:
+            self._cache.set(token, snapshot, ttl=ttl)
+
+    def invalidate_user(self, user_id: int) -> int:
+        return self._cache.invalidate_values(lambda snapshot: snapshot.id == user_id)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+
+auth_cache = AuthCache(
+    maxsize=settings.AUTH_CACHE_SIZE, ttl=settings.AUTH_CACHE_TTL_SECONDS
+)
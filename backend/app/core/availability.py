@@ -0,0 +1,122 @@
+import threading
+from bisect import bisect_left, insort
+from datetime import datetime
+from typing import Dict, Iterable, List, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.rental import Rental
+from app.schemas.rental import RentalStatus
+
+
+def local_naive(value: datetime) -> datetime:
+    """租赁时间使用不带时区的本地时间，带时区的时间先转换为本地时间"""
+    if value.tzinfo is None:
+        return value
+    return value.astimezone().replace(tzinfo=None)
+
+
+class AvailabilityIndex:
+    """按滑板车维护进行中租赁占用的时间段 [start_time, end_time)
+
+    每辆滑板车的时间段按开始时间有序存放，同一辆车的时间段互不重叠（创建租赁时
+    会先检查），因此结束时间同样有序，用二分查找即可判断某个时间段是否空闲。
+    索引只反映本进程看到的写入，其他 worker 的写入在下次 load 时同步；数据库中
+    的条件更新仍然是预订的最终依据。
+    """
+
+    def __init__(self):
+        self._starts: Dict[int, List[datetime]] = {}
+        self._ends: Dict[int, List[datetime]] = {}
+        # 租赁ID -> (滑板车ID, 开始时间, 结束时间)，用于删除
+        self._windows: Dict[int, Tuple[int, datetime, datetime]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._windows)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._starts.clear()
+            self._ends.clear()
+            self._windows.clear()
+
+    def load(self, db: Session) -> int:
+        """从数据库重新加载所有进行中的租赁，返回加载的时间段数"""
+        rows = db.execute(
+            select(Rental.id, Rental.scooter_id, Rental.start_time, Rental.end_time)
+            .where(
+                Rental.status == RentalStatus.ACTIVE,
+                Rental.start_time.is_not(None),
+                Rental.end_time.is_not(None),
+            )
+            .order_by(Rental.scooter_id, Rental.start_time)
+        ).all()
+        starts: Dict[int, List[datetime]] = {}
+        ends: Dict[int, List[datetime]] = {}
+        windows = {}
+        for rental_id, scooter_id, start, end in rows:
+            starts.setdefault(scooter_id, []).append(start)
+            ends.setdefault(scooter_id, []).append(end)
+            windows[rental_id] = (scooter_id, start, end)
+        with self._lock:
+            self._starts, self._ends, self._windows = starts, ends, windows
+        return len(windows)
+
+    def add(
+        self, rental_id: int, scooter_id: int, start: datetime, end: datetime
+    ) -> None:
+        start, end = local_naive(start), local_naive(end)
+        with self._lock:
+            self._discard(rental_id)
+            insort(self._starts.setdefault(scooter_id, []), start)
+            insort(self._ends.setdefault(scooter_id, []), end)
+            self._windows[rental_id] = (scooter_id, start, end)
+
+    def remove(self, rental_id: int) -> None:
+        with self._lock:
+            self._discard(rental_id)
+
+    def remove_many(self, rental_ids: Iterable[int]) -> None:
+        with self._lock:
+            for rental_id in rental_ids:
+                self._discard(rental_id)
+
+    def _discard(self, rental_id: int) -> None:
+        window = self._windows.pop(rental_id, None)
+        if window is None:
+            return
+        scooter_id, start, end = window
+        starts = self._starts[scooter_id]
+        ends = self._ends[scooter_id]
+        del starts[bisect_left(starts, start)]
+        del ends[bisect_left(ends, end)]
+        if not starts:
+            del self._starts[scooter_id]
+            del self._ends[scooter_id]
+
+    def is_free(self, scooter_id: int, start: datetime, end: datetime) -> bool:
+        """滑板车在 [start, end) 内是否没有被预订"""
+        start, end = local_naive(start), local_naive(end)
+        with self._lock:
+            starts = self._starts.get(scooter_id)
+            if not starts:
+                return True
+            # 开始时间早于 end 的时间段都可能重叠，由于互不重叠且有序，
+            # 只需要检查其中最后一个（结束时间最晚的）是否在 start 之后结束
+            i = bisect_left(starts, end)
+            return i == 0 or self._ends[scooter_id][i - 1] <= start
+
+    def free_scooters(
+        self, scooter_ids: Iterable[int], start: datetime, end: datetime
+    ) -> List[int]:
+        """返回 [start, end) 内没有被预订的滑板车ID"""
+        return [
+            scooter_id
+            for scooter_id in scooter_ids
+            if self.is_free(scooter_id, start, end)
+        ]
+
+
+availability_index = AvailabilityIndex()
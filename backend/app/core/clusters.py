@@ -0,0 +1,137 @@
+import hashlib
+import json
+import math
+import threading
+from typing import Dict, Iterable, List, NamedTuple, Tuple
+
+from app.schemas.scooter import ScooterStatus
+
+# 预先聚合的最大缩放级别，更大的缩放级别直接查询单辆滑板车（/scooters/nearby）
+MAX_ZOOM = 18
+
+# 每个瓦片划分为 2^CELL_BITS x 2^CELL_BITS 个格子；256 像素的瓦片每格 64 像素，
+# 接近地图上一个聚合图标的大小，每个瓦片最多返回 16 个聚合
+CELL_BITS = 2
+
+# Web Mercator 能表示的最大纬度
+MAX_LATITUDE = 85.05112878
+
+TileKey = Tuple[int, int, int]
+
+
+class Cluster(NamedTuple):
+    lat: float
+    lng: float
+    count: int
+    available: int
+
+
+def mercator(lat: float, lng: float) -> Tuple[float, float]:
+    """经纬度 -> Web Mercator 平面坐标 (x, y)，取值范围 [0, 1)，y 向南增大"""
+    lat = min(max(lat, -MAX_LATITUDE), MAX_LATITUDE)
+    sin = math.sin(math.radians(lat))
+    x = (lng + 180) / 360
+    y = 0.5 - math.log((1 + sin) / (1 - sin)) / (4 * math.pi)
+    return min(max(x, 0.0), math.nextafter(1, 0)), min(
+        max(y, 0.0), math.nextafter(1, 0)
+    )
+
+
+def tile_range(
+    min_lng: float, min_lat: float, max_lng: float, max_lat: float, zoom: int
+) -> Tuple[range, range]:
+    """返回覆盖经纬度范围的瓦片 x 和 y 的取值范围"""
+    n = 1 << zoom
+    x0, y0 = mercator(max_lat, min_lng)
+    x1, y1 = mercator(min_lat, max_lng)
+    return range(int(x0 * n), int(x1 * n) + 1), range(int(y0 * n), int(y1 * n) + 1)
+
+
+def tile_etag(clusters: Iterable[Cluster]) -> str:
+    payload = json.dumps([tuple(c) for c in clusters], separators=(",", ":"))
+    return '"' + hashlib.md5(payload.encode()).hexdigest() + '"'
+
+
+class TileClusters:
+    """按缩放级别预先聚合的滑板车数量
+
+    每个缩放级别把地图划分为 Web Mercator 瓦片，每个瓦片再划分为固定数量的格子，
+    记录格子内的滑板车数、可用数和坐标之和（用于计算质心）。滑板车位置或状态变化
+    时逐级更新，读取一个瓦片只需要合并瓦片内的格子；结果按 (缩放级别, 瓦片) 缓存，
+    瓦片内有变化时清除。由 SpatialIndex 在持有自身锁时调用。
+    """
+
+    def __init__(self, max_zoom: int = MAX_ZOOM):
+        self.max_zoom = max_zoom
+        # 缩放级别 -> 瓦片 -> 格子 -> [数量, 可用数量, 纬度之和, 经度之和]
+        self._levels: List[Dict[Tuple[int, int], Dict[Tuple[int, int], list]]] = [
+            {} for _ in range(max_zoom + 1)
+        ]
+        self._cache: Dict[TileKey, List[Cluster]] = {}
+        self._lock = threading.Lock()
+
+    def clear(self) -> None:
+        with self._lock:
+            for tiles in self._levels:
+                tiles.clear()
+            self._cache.clear()
+
+    def load(self, points: Iterable[Tuple[float, float, str]]) -> None:
+        """用 (纬度, 经度, 状态) 重新计算所有聚合"""
+        with self._lock:
+            for tiles in self._levels:
+                tiles.clear()
+            self._cache.clear()
+            for lat, lng, status in points:
+                self._apply(lat, lng, status, 1)
+
+    def add(self, lat: float, lng: float, status: str) -> None:
+        with self._lock:
+            self._apply(lat, lng, status, 1)
+
+    def remove(self, lat: float, lng: float, status: str) -> None:
+        with self._lock:
+            self._apply(lat, lng, status, -1)
+
+    def _apply(self, lat: float, lng: float, status: str, sign: int) -> None:
+        x, y = mercator(lat, lng)
+        available = sign if status == ScooterStatus.AVAILABLE.value else 0
+        for zoom, tiles in enumerate(self._levels):
+            n = 1 << (zoom + CELL_BITS)
+            cell = (int(x * n), int(y * n))
+            tile = (cell[0] >> CELL_BITS, cell[1] >> CELL_BITS)
+            cells = tiles.setdefault(tile, {})
+            totals = cells.get(cell)
+            if totals is None:
+                totals = cells[cell] = [0, 0, 0.0, 0.0]
+            totals[0] += sign
+            totals[1] += available
+            totals[2] += sign * lat
+            totals[3] += sign * lng
+            if totals[0] <= 0:
+                del cells[cell]
+                if not cells:
+                    del tiles[tile]
+            self._cache.pop((zoom, *tile), None)
+
+    def tile(self, zoom: int, x: int, y: int) -> List[Cluster]:
+        """返回一个瓦片内的聚合，按格子位置排列"""
+        key = (zoom, x, y)
+        with self._lock:
+            clusters = self._cache.get(key)
+            if clusters is not None:
+                return clusters
+            cells = self._levels[zoom].get((x, y))
+            if not cells:
+                return []
+            clusters = [
+                Cluster(
+                    lat=sum_lat / count,
+                    lng=sum_lng / count,
+                    count=count,
+                    available=available,
+                )
+                for _, (count, available, sum_lat, sum_lng) in sorted(cells.items())
+            ]
+            self._cache[key] = clusters
+            return clusters
@@ -35,6 +35,51 @@ class Settings(BaseSettings):
     SMTP_PASSWORD: str
     SMTP_FROM_EMAIL: EmailStr
 
+    # 收入汇总缓存：最多缓存的日期范围数量，以及包含今天的范围的过期时间（秒）
+    REVENUE_SUMMARY_CACHE_SIZE: int = 256
+    REVENUE_SUMMARY_CACHE_TTL: int = 60
+
+    # 到期租赁检查的间隔（秒），不大于0时不启用
+    RENTAL_EXPIRY_INTERVAL_SECONDS: int = 60
+
+    # 重新加载租赁时间段索引的间隔（秒），用于同步其他 worker 的预订，不大于0时不启用
+    AVAILABILITY_REFRESH_INTERVAL_SECONDS: int = 300
+
+    # 重新加载滑板车空间索引的间隔（秒），用于同步其他 worker 的位置和状态修改，不大于0时不启用
+    SCOOTER_INDEX_REFRESH_INTERVAL_SECONDS: int = 300
+
+    # 地图聚合瓦片允许客户端和 CDN 缓存的时间（秒）
+    CLUSTER_TILE_MAX_AGE_SECONDS: int = 10
+
+    # 遥测数据批量写入数据库的间隔（秒），每辆车在间隔内只写入最新的一条，应用关闭时
+    # 写入剩余的数据；不大于0时不写入
+    TELEMETRY_FLUSH_INTERVAL_SECONDS: int = 2
+
+    # 遥测读数时间允许超前服务器时间的秒数，以及可接受的最早读数距今的秒数；
+    # 超出范围的读数直接丢弃
+    TELEMETRY_MAX_CLOCK_SKEW_SECONDS: int = 60
+    TELEMETRY_MAX_AGE_SECONDS: int = 86400
+
+    # 轨迹历史写入数据库的间隔（秒），应用关闭时写入剩余的轨迹；不大于0时不写入
+    TRACK_FLUSH_INTERVAL_SECONDS: int = 300
+
+    # 合并轨迹块并对较早轨迹降采样的间隔（秒），不大于0时不启用
+    TRACK_COMPACT_INTERVAL_SECONDS: int = 3600
+
+    # 定价缓存的最长使用时间（秒），其他 worker 修改定价后最多经过这段时间生效
+    PRICING_CACHE_TTL_SECONDS: int = 30
+
+    # 已验证令牌对应用户信息的缓存：最多缓存的令牌数量，以及缓存时间（秒）。
+    # 本进程修改用户时立即失效，其他 worker 的修改最多经过这段时间生效；不大于0时不缓存
+    AUTH_CACHE_SIZE: int = 10000
+    AUTH_CACHE_TTL_SECONDS: int = 60
+
+    # 调试模式：在响应头中返回每个请求执行的 SQL 语句数和数据库耗时
+    DEBUG: bool = False
+
+    # 同一条语句在一个请求中执行超过该次数时记录可能的 N+1 查询，不大于0时不检查
+    N_PLUS_ONE_THRESHOLD: int = 10
+
     SERVER_URL: Optional[AnyHttpUrl]
     LLM_URL: Optional[AnyHttpUrl]
 
@@ -4,6 +4,7 @@ from pydantic import EmailStr
 from jinja2 import Template
 
 from app.core.config import settings
+from app.core.metrics import track_external_call
 
 conf = ConnectionConfig(
     MAIL_USERNAME=settings.SMTP_USER,
@@ -156,6 +157,12 @@ password_reset_form_template = """
 """
 
 
+async def send_message(message: MessageSchema) -> None:
+    """发送邮件并记录 SMTP 调用耗时"""
+    with track_external_call("smtp"):
+        await fastmail.send_message(message)
+
+
 async def send_rental_confirmation(
     email_to: EmailStr, rental_info: Dict[str, Any]
 ) -> None:
@@ -177,7 +184,7 @@ async def send_rental_confirmation(
         subtype="html",
     )
 
-    await fastmail.send_message(message)
+    await send_message(message)
 
 
 async def send_password_reset_email(
@@ -207,7 +214,7 @@ async def send_password_reset_email(
         subtype="html",
     )
 
-    await fastmail.send_message(message)
+    await send_message(message)
 
 
 async def send_payment_confirmation(
@@ -232,4 +239,4 @@ async def send_payment_confirmation(
         subtype="html",
     )
 
-    await fastmail.send_message(message)
+    await send_message(message)
@@ -0,0 +1,119 @@
+import csv
+import io
+import json
+from datetime import datetime
+from enum import Enum
+from typing import Any, Dict, Iterable, Iterator, Sequence
+
+import pyarrow as pa
+from sqlalchemy import Row
+
+# 导出的列及其 Arrow 类型，顺序与 crud.payment.iter_export_batches 的查询一致
+EXPORT_SCHEMA = pa.schema(
+    [
+        ("payment_id", pa.int64()),
+        ("payment_created_at", pa.timestamp("us")),
+        ("user_id", pa.int64()),
+        ("amount", pa.float64()),
+        ("currency", pa.string()),
+        ("payment_status", pa.string()),
+        ("payment_method", pa.string()),
+        ("transaction_id", pa.string()),
+        ("rental_id", pa.int64()),
+        ("scooter_id", pa.int64()),
+        ("rental_start_time", pa.timestamp("us")),
+        ("rental_end_time", pa.timestamp("us")),
+        ("rental_status", pa.string()),
+        ("rental_period", pa.string()),
+        ("rental_cost", pa.float64()),
+    ]
+)
+EXPORT_COLUMNS = EXPORT_SCHEMA.names
+
+
+class ExportFormat(str, Enum):
+    CSV = "csv"
+    NDJSON = "ndjson"
+    ARROW = "arrow"
+
+
+def _plain(value: Any) -> Any:
+    """将枚举转换为字符串值"""
+    if isinstance(value, Enum):
+        return value.value
+    return value
+
+
+def _record(row: Row) -> Dict[str, Any]:
+    return {column: _plain(value) for column, value in zip(EXPORT_COLUMNS, row)}
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def iter_csv(batches: Iterable[Sequence[Row]]) -> Iterator[bytes]:
+    """每批数据输出一段CSV，第一段包含表头"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    yield buffer.getvalue().encode()
+    for batch in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(
+            [
+                [
+                    value.isoformat() if isinstance(value, datetime) else value
+                    for value in _record(row).values()
+                ]
+                for row in batch
+            ]
+        )
+        yield buffer.getvalue().encode()
+
+
+def iter_ndjson(batches: Iterable[Sequence[Row]]) -> Iterator[bytes]:
+    """每行一个JSON对象"""
+    for batch in batches:
+        yield "".join(
+            json.dumps(_record(row), default=_json_default, ensure_ascii=False) + "\n"
+            for row in batch
+        ).encode()
+
+
+def iter_arrow(batches: Iterable[Sequence[Row]]) -> Iterator[bytes]:
+    """Arrow IPC 流格式，每批数据对应一个 RecordBatch"""
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, EXPORT_SCHEMA) as writer:
+        yield _drain(sink)
+        for batch in batches:
+            columns = list(zip(*(map(_plain, row) for row in batch)))
+            writer.write_batch(
+                pa.record_batch(
+                    [
+                        pa.array(column, type=field.type)
+                        for column, field in zip(columns, EXPORT_SCHEMA)
+                    ],
+                    schema=EXPORT_SCHEMA,
+                )
+            )
+            yield _drain(sink)
+    yield _drain(sink)
+
+
+def _drain(sink: io.BytesIO) -> bytes:
+    data = sink.getvalue()
+    sink.seek(0)
+    sink.truncate()
+    return data
+
+
+# 导出格式 -> (Content-Type, 输出函数)
+EXPORT_FORMATS = {
+    ExportFormat.CSV: ("text/csv", iter_csv),
+    ExportFormat.NDJSON: ("application/x-ndjson", iter_ndjson),
+    ExportFormat.ARROW: ("application/vnd.apache.arrow.stream", iter_arrow),
+}
@@ -0,0 +1,169 @@
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+from fastapi import Response
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    GCCollector,
+    Histogram,
+    PlatformCollector,
+    ProcessCollector,
+    generate_latest,
+)
+from sqlalchemy import event
+from sqlalchemy.pool import Pool
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# 每个进程单独统计；多 worker 部署时由 Prometheus 分别抓取各个进程
+registry = CollectorRegistry()
+ProcessCollector(registry=registry)
+PlatformCollector(registry=registry)
+GCCollector(registry=registry)
+
+# 接口延迟大多在几毫秒到几百毫秒之间，LLM 流式响应可能持续数十秒
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# 没有匹配到任何路由的请求（例如404）统一使用这个标签，避免按原始路径产生大量时间序列
+UNMATCHED_ROUTE = "unmatched"
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total",
+    "HTTP requests by route template and status code",
+    ["method", "route", "status"],
+    registry=registry,
+)
+HTTP_REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "HTTP requests currently being processed",
+    ["method"],
+    registry=registry,
+)
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template and status code",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+    registry=registry,
+)
+DB_POOL_CHECKOUTS = Counter(
+    "db_pool_checkouts_total",
+    "Connections checked out from the SQLAlchemy pool",
+    registry=registry,
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_connections_checked_out",
+    "Connections currently checked out from the SQLAlchemy pool",
+    registry=registry,
+)
+EXTERNAL_CALL_DURATION = Histogram(
+    "external_call_duration_seconds",
+    "Duration of outbound calls such as the LLM API and SMTP",
+    ["service", "outcome"],
+    buckets=LATENCY_BUCKETS,
+    registry=registry,
+)
+TELEMETRY_READINGS = Counter(
+    "telemetry_readings_total",
+    "Scooter telemetry readings received (accepted, stale, or future-dated)",
+    ["outcome"],
+    registry=registry,
+)
+TELEMETRY_FLUSHED_ROWS = Counter(
+    "telemetry_flushed_rows_total",
+    "Scooter rows written by telemetry flushes",
+    registry=registry,
+)
+TELEMETRY_BUFFERED = Gauge(
+    "telemetry_buffered_scooters",
+    "Scooters with a telemetry reading waiting to be flushed",
+    registry=registry,
+)
+TELEMETRY_FLUSH_DURATION = Histogram(
+    "telemetry_flush_duration_seconds",
+    "Duration of telemetry flushes",
+    buckets=LATENCY_BUCKETS,
+    registry=registry,
+)
+
+
+@event.listens_for(Pool, "checkout")
+def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+    DB_POOL_CHECKOUTS.inc()
+    DB_POOL_CHECKED_OUT.inc()
+
+
+@event.listens_for(Pool, "checkin")
+def _on_checkin(dbapi_connection, connection_record):
+    DB_POOL_CHECKED_OUT.dec()
+
+
+class ExternalCall:
+    """一次外部调用，调用方可以把 outcome 改为 "error" 记录非异常的失败（如非200响应）"""
+
+    def __init__(self):
+        self.outcome = "ok"
+
+
+@contextmanager
+def track_external_call(service: str) -> Iterator[ExternalCall]:
+    """记录外部调用的耗时，抛出异常时 outcome 为 "error"
+
+    在异步生成器中使用时，耗时包括整个流式响应的传输时间。
+    """
+    call = ExternalCall()
+    started = time.perf_counter()
+    try:
+        yield call
+    except BaseException:
+        call.outcome = "error"
+        raise
+    finally:
+        EXTERNAL_CALL_DURATION.labels(service, call.outcome).observe(
+            time.perf_counter() - started
+        )
+
+
+class MetricsMiddleware:
+    """按路由模板和状态码记录请求数、处理中的请求数和延迟
+
+    路由模板（如 /api/v1/scooters/{scooter_id}）在路由匹配后才写入 scope，因此在
+    请求处理完成后读取。延迟包括流式响应发送响应体的时间。
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        in_progress = HTTP_REQUESTS_IN_PROGRESS.labels(method)
+        in_progress.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            in_progress.dec()
+            route = getattr(scope.get("route"), "path", UNMATCHED_ROUTE)
+            labels = (method, route, str(status_code))
+            HTTP_REQUESTS.labels(*labels).inc()
+            HTTP_REQUEST_DURATION.labels(*labels).observe(time.perf_counter() - started)
+
+
+def metrics_response() -> Response:
+    """以 Prometheus 文本格式返回当前进程的所有指标"""
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
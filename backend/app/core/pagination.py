@@ -0,0 +1,44 @@
+import base64
+import json
+from typing import Iterable, List, Optional, TypeVar
+
+from fastapi import Response
+
+T = TypeVar("T")
+
+# 列表接口通过响应头返回下一页的游标，响应体仍然是原来的列表
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class Page(List[T]):
+    """一页查询结果，可以直接当作列表使用
+
+    next_cursor 为读取下一页使用的游标，没有下一页时为 None。
+    """
+
+    def __init__(self, items: Iterable[T] = (), next_cursor: Optional[str] = None):
+        super().__init__(items)
+        self.next_cursor = next_cursor
+
+
+def encode_cursor(last_id: int) -> str:
+    """将上一页最后一条记录的ID编码为不透明的游标"""
+    payload = json.dumps({"id": last_id}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    """解析游标，格式不正确时抛出 ValueError"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        last_id = json.loads(base64.urlsafe_b64decode(padded))["id"]
+    except (ValueError, TypeError, KeyError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+    if not isinstance(last_id, int) or isinstance(last_id, bool):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return last_id
+
+
+def set_next_cursor(response: Response, page: Page) -> None:
+    if page.next_cursor is not None:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
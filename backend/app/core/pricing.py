@@ -0,0 +1,143 @@
+import threading
+import time
+from typing import Dict, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.core.auth_cache import UserSnapshot
+from app.core.config import settings
+from app.models.rental_config import RentalConfig
+from app.models.scooter_price import ScooterPrice
+from app.models.user import User
+from app.schemas.rental import RentalPeriod
+
+# 租赁时长对应的小时数
+RENTAL_PERIOD_HOURS = {
+    RentalPeriod.ONE_HOUR: 1,
+    RentalPeriod.FOUR_HOURS: 4,
+    RentalPeriod.ONE_DAY: 24,
+    RentalPeriod.ONE_WEEK: 168,
+}
+
+# 用户折扣：60岁以上的老人八折，学生九折
+SENIOR_AGE = 60
+SENIOR_DISCOUNT = 0.8
+STUDENT_DISCOUNT = 0.9
+
+
+class PricingSnapshot:
+    """某一版本的定价数据：当前生效的租赁配置和各型号的小时价格"""
+
+    def __init__(
+        self,
+        *,
+        version: int,
+        base_hourly_rate: Optional[float],
+        period_discounts: Dict[str, float],
+        price_per_hour: Dict[str, float],
+    ):
+        self.version = version
+        self.base_hourly_rate = base_hourly_rate  # 没有生效的配置时为 None
+        self.period_discounts = period_discounts
+        self.price_per_hour = price_per_hour
+
+    @property
+    def has_active_config(self) -> bool:
+        return self.base_hourly_rate is not None
+
+
+class PricingCache:
+    """进程内的定价缓存
+
+    写入租赁配置或滑板车价格时增加版本号（见 crud.rental_config 和
+    crud.scooter_price），本进程下次读取时重新加载；其他 worker 的写入无法
+    通知到本进程，因此快照最多使用 ttl 秒后也会重新加载。
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._version = 0
+        self._snapshot: Optional[PricingSnapshot] = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def bump(self) -> None:
+        """定价数据已修改，使当前快照失效"""
+        with self._lock:
+            self._version += 1
+
+    def get(self, db: Session) -> PricingSnapshot:
+        snapshot = self._snapshot
+        if (
+            snapshot is not None
+            and snapshot.version == self._version
+            and time.monotonic() - self._loaded_at < self.ttl
+        ):
+            return snapshot
+        return self._load(db)
+
+    def _load(self, db: Session) -> PricingSnapshot:
+        # 先记录版本号再读取，读取期间发生的写入会让这个快照在下次使用时失效
+        version = self._version
+        config = db.query(RentalConfig).filter(RentalConfig.is_active == 1).first()
+        prices = db.query(ScooterPrice.model, ScooterPrice.price_per_hour).all()
+        snapshot = PricingSnapshot(
+            version=version,
+            base_hourly_rate=config.base_hourly_rate if config else None,
+            period_discounts=dict(config.period_discounts) if config else {},
+            price_per_hour={model: price for model, price in prices},
+        )
+        with self._lock:
+            self._snapshot = snapshot
+            self._loaded_at = time.monotonic()
+        return snapshot
+
+
+def user_discount(user: Union[User, UserSnapshot]) -> Tuple[float, str]:
+    """返回用户的折扣率和折扣类型（"old"、"student" 或 "none"）"""
+    if user.age is not None and user.age > SENIOR_AGE:
+        return SENIOR_DISCOUNT, "old"
+    if user.school is not None:
+        return STUDENT_DISCOUNT, "student"
+    return 1.0, "none"
+
+
+def quote_costs(
+    pricing: PricingSnapshot,
+    models: Sequence[str],
+    periods: Sequence[RentalPeriod],
+    discounts: Sequence[float],
+) -> np.ndarray:
+    """批量计算租赁费用：时长 × 基础费率 × 时段折扣 × 型号小时价格 × 用户折扣
+
+    调用方需保证 pricing 有生效的配置，且 models 中的型号都有价格。
+    """
+    period_list = list(RentalPeriod)
+    period_index = {period: i for i, period in enumerate(period_list)}
+    # 每个时段的费用系数只有四个，先算好再按时段编号取值
+    period_costs = np.array(
+        [
+            RENTAL_PERIOD_HOURS[period]
+            * pricing.base_hourly_rate
+            * pricing.period_discounts.get(period.value, 1.0)
+            for period in period_list
+        ]
+    )
+    count = len(periods)
+    codes = np.fromiter(
+        (period_index[period] for period in periods), dtype=np.int8, count=count
+    )
+    prices = np.fromiter(
+        (pricing.price_per_hour[model] for model in models),
+        dtype=np.float64,
+        count=count,
+    )
+    return period_costs[codes] * prices * np.asarray(discounts, dtype=np.float64)
+
+
+pricing_cache = PricingCache(ttl=settings.PRICING_CACHE_TTL_SECONDS)
@@ -0,0 +1,121 @@
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, Optional, Tuple
+
+from loguru import logger
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# 调试模式下在响应头中返回本次请求执行的 SQL 语句数和数据库耗时（毫秒）
+QUERY_COUNT_HEADER = "X-DB-Query-Count"
+QUERY_TIME_HEADER = "X-DB-Query-Time"
+
+# IN (?, ?, ...) 展开后的参数个数不同，归一化为同一种形状
+_PARAM = r"(?:\?|%s|%\(\w+\)s|\$\d+|:\w+)"
+_PARAM_LIST = re.compile(rf"\(\s*{_PARAM}(?:\s*,\s*{_PARAM})*\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    """去掉参数个数和空白的差异，用于识别重复执行的同一条语句"""
+    return _PARAM_LIST.sub("(?)", _WHITESPACE.sub(" ", statement).strip())
+
+
+class QueryStats:
+    """一个请求（或一段代码）内执行的 SQL 语句统计"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0  # 秒
+        self.shapes: Counter = Counter()
+
+    def record(self, statement: str, duration: float) -> None:
+        self.count += 1
+        self.duration += duration
+        self.shapes[statement_shape(statement)] += 1
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int]]:
+        """执行次数超过 threshold 的语句形状（通常意味着 N+1 查询），按次数从多到少排列"""
+        if threshold <= 0:
+            return []
+        return [
+            (shape, count)
+            for shape, count in self.shapes.most_common()
+            if count > threshold
+        ]
+
+
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar(
+    "query_stats", default=None
+)
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """统计代码块内当前上下文执行的 SQL 语句
+
+    统计保存在 contextvar 中，同步接口在线程池中执行时会复制上下文，仍然记录到
+    同一个 QueryStats；其他请求和后台任务的语句不会被计入。
+    """
+    stats = QueryStats()
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_stats.get() is not None:
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_stats.get()
+    started = conn.info.get("query_started")
+    if stats is not None and started:
+        stats.record(statement, time.perf_counter() - started.pop())
+
+
+class QueryStatsMiddleware:
+    """统计每个请求执行的 SQL 语句数和数据库耗时
+
+    同一形状的语句在一个请求中执行超过 threshold 次时记录警告；expose_headers 为
+    True 时在响应头中返回统计结果。流式响应在发送响应头之后执行的语句只计入警告
+    检查，不计入响应头。
+    """
+
+    def __init__(self, app: ASGIApp, *, threshold: int, expose_headers: bool):
+        self.app = app
+        self.threshold = threshold
+        self.expose_headers = expose_headers
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with track_queries() as stats:
+
+            async def send_with_stats(message: Message) -> None:
+                if message["type"] == "http.response.start" and self.expose_headers:
+                    headers = MutableHeaders(scope=message)
+                    headers[QUERY_COUNT_HEADER] = str(stats.count)
+                    headers[QUERY_TIME_HEADER] = f"{stats.duration * 1000:.2f}"
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_stats)
+            finally:
+                for shape, count in stats.repeated(self.threshold):
+                    logger.warning(
+                        f"Possible N+1 query in {scope['method']} {scope['path']}: "
+                        f"executed {count} times: {shape}"
+                    )
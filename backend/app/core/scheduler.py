@@ -0,0 +1,96 @@
+import asyncio
+from typing import Any, Callable, List, Optional
+
+from loguru import logger
+from starlette.concurrency import run_in_threadpool
+
+
+class PeriodicTask:
+    """在事件循环中按固定间隔执行的后台任务
+
+    同步函数在线程池中执行，不会阻塞请求处理；单次执行抛出的异常只记录日志，
+    不会中断后续的执行。第一次执行发生在启动一个间隔之后，run_at_start 为 True
+    的任务由 Scheduler.run_startup 在应用启动时先执行一次；run_at_stop 为 True 的
+    任务在 Scheduler.stop 停止周期执行后再执行最后一次。
+    """
+
+    def __init__(
+        self,
+        name: str,
+        func: Callable[[], Any],
+        interval: float,
+        run_at_start: bool = False,
+        run_at_stop: bool = False,
+    ):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.run_at_start = run_at_start
+        self.run_at_stop = run_at_stop
+        self._task: Optional[asyncio.Task] = None
+
+    async def run_once(self) -> Any:
+        try:
+            result = await run_in_threadpool(self.func)
+        except Exception:
+            logger.exception(f"Periodic task {self.name} failed")
+            return None
+        logger.info(f"Periodic task {self.name} finished: {result}")
+        return result
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.run_once()
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop(), name=self.name)
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+
+class Scheduler:
+    """管理应用生命周期内的所有周期任务"""
+
+    def __init__(self):
+        self.tasks: List[PeriodicTask] = []
+
+    def add(
+        self,
+        name: str,
+        func: Callable[[], Any],
+        interval: float,
+        run_at_start: bool = False,
+        run_at_stop: bool = False,
+    ) -> None:
+        """注册周期任务，间隔不大于0时不启用"""
+        if interval > 0:
+            self.tasks.append(
+                PeriodicTask(name, func, interval, run_at_start, run_at_stop)
+            )
+
+    async def run_startup(self) -> None:
+        """在开始周期执行前，先执行一次需要在启动时运行的任务"""
+        for task in self.tasks:
+            if task.run_at_start:
+                await task.run_once()
+
+    def start(self) -> None:
+        for task in self.tasks:
+            task.start()
+
+    async def stop(self) -> None:
+        for task in self.tasks:
+            await task.stop()
+        for task in self.tasks:
+            if task.run_at_stop:
+                await task.run_once()
@@ -0,0 +1,234 @@
+import heapq
+import math
+import threading
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.clusters import TileClusters
+from app.models.scooter import Scooter
+
+EARTH_RADIUS_M = 6_371_000
+METERS_PER_DEGREE = math.pi * EARTH_RADIUS_M / 180
+
+# 网格边长（度），南北方向约 220 米。10 万辆车分布在 20 公里见方的城市时每格
+# 十几辆，查询最近的几十辆只需要检查附近几圈格子（见 scripts/bench_nearby.py）
+DEFAULT_CELL_SIZE = 0.002
+
+Cell = Tuple[int, int]
+
+
+class SpatialIndex:
+    """滑板车位置的网格索引
+
+    按经纬度把滑板车放入固定大小的格子，查询时从所在格子向外逐圈扩展，已找到
+    k 辆且下一圈不可能更近、或者已超出有车的范围时停止。距离使用以查询点纬度为
+    基准的等距投影计算，在几十公里范围内与球面距离的误差可以忽略；不处理跨越
+    ±180° 经线的查询。索引只反映本进程看到的写入，其他 worker 的写入在下次 load
+    时同步。指定 clusters 时同时维护地图使用的多级聚合。
+    """
+
+    def __init__(
+        self,
+        cell_size: float = DEFAULT_CELL_SIZE,
+        clusters: Optional[TileClusters] = None,
+    ):
+        self.cell_size = cell_size
+        self.clusters = clusters
+        self._cells: Dict[Cell, Set[int]] = {}
+        # 滑板车ID -> (纬度, 经度, 状态)
+        self._points: Dict[int, Tuple[float, float, str]] = {}
+        # 有车格子的范围 (最小行, 最大行, 最小列, 最大列)，删除时不收缩
+        self._bounds: Optional[Tuple[int, int, int, int]] = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._points)
+
+    def _cell(self, lat: float, lng: float) -> Cell:
+        return (math.floor(lat / self.cell_size), math.floor(lng / self.cell_size))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cells.clear()
+            self._points.clear()
+            self._bounds = None
+            if self.clusters is not None:
+                self.clusters.clear()
+
+    def load(self, db: Session) -> int:
+        """从数据库重新加载所有有位置的滑板车，返回加载的数量"""
+        rows = db.execute(select(Scooter.id, Scooter.location, Scooter.status)).all()
+        cells: Dict[Cell, Set[int]] = {}
+        points = {}
+        for scooter_id, location, status in rows:
+            point = _point(location)
+            if point is None:
+                continue
+            points[scooter_id] = (*point, _status_value(status))
+            cells.setdefault(self._cell(*point), set()).add(scooter_id)
+        bounds = None
+        if cells:
+            rows_, cols = zip(*cells)
+            bounds = (min(rows_), max(rows_), min(cols), max(cols))
+        with self._lock:
+            self._cells, self._points, self._bounds = cells, points, bounds
+            if self.clusters is not None:
+                self.clusters.load(points.values())
+        return len(points)
+
+    def upsert(
+        self, scooter_id: int, location: Optional[dict], status: Optional[str]
+    ) -> None:
+        """写入滑板车的位置和状态，没有位置时从索引中删除"""
+        point = _point(location)
+        with self._lock:
+            self._discard(scooter_id)
+            if point is not None:
+                self._add(scooter_id, point, _status_value(status))
+
+    def set_status(self, scooter_id: int, status: str) -> None:
+        with self._lock:
+            point = self._points.get(scooter_id)
+            status = _status_value(status)
+            if point is None or point[2] == status:
+                return
+            self._points[scooter_id] = (point[0], point[1], status)
+            if self.clusters is not None:
+                self.clusters.remove(*point)
+                self.clusters.add(point[0], point[1], status)
+
+    def move_many(self, locations: Iterable[Tuple[int, Optional[dict]]]) -> None:
+        """更新 (滑板车ID, 位置) 并保留索引中的状态，不在索引中的滑板车等下次 load"""
+        with self._lock:
+            for scooter_id, location in locations:
+                current = self._points.get(scooter_id)
+                point = _point(location)
+                if current is None or point is None:
+                    continue
+                self._discard(scooter_id)
+                self._add(scooter_id, point, current[2])
+
+    def remove(self, scooter_id: int) -> None:
+        with self._lock:
+            self._discard(scooter_id)
+
+    def remove_many(self, scooter_ids: Iterable[int]) -> None:
+        with self._lock:
+            for scooter_id in scooter_ids:
+                self._discard(scooter_id)
+
+    def _add(self, scooter_id: int, point: Tuple[float, float], status: str) -> None:
+        self._points[scooter_id] = (*point, status)
+        i, j = self._cell(*point)
+        self._cells.setdefault((i, j), set()).add(scooter_id)
+        if self._bounds is None:
+            self._bounds = (i, i, j, j)
+        else:
+            i_min, i_max, j_min, j_max = self._bounds
+            self._bounds = (min(i_min, i), max(i_max, i), min(j_min, j), max(j_max, j))
+        if self.clusters is not None:
+            self.clusters.add(*point, status)
+
+    def _discard(self, scooter_id: int) -> None:
+        point = self._points.pop(scooter_id, None)
+        if point is None:
+            return
+        cell = self._cell(point[0], point[1])
+        members = self._cells[cell]
+        members.discard(scooter_id)
+        if not members:
+            del self._cells[cell]
+        if self.clusters is not None:
+            self.clusters.remove(*point)
+
+    def nearby(
+        self,
+        lat: float,
+        lng: float,
+        *,
+        radius: float,
+        k: int,
+        statuses: Optional[Iterable[str]] = None,
+    ) -> List[Tuple[int, float]]:
+        """返回距离 (lat, lng) 不超过 radius 米的最近 k 辆滑板车
+
+        结果为 (滑板车ID, 距离米) 按距离从近到远排列；statuses 为 None 时不按状态
+        过滤。
+        """
+        if k <= 0:
+            return []
+        if statuses is not None:
+            statuses = {_status_value(status) for status in statuses}
+        m_per_deg_lng = METERS_PER_DEGREE * max(math.cos(math.radians(lat)), 1e-6)
+        cell_h = self.cell_size * METERS_PER_DEGREE
+        cell_w = self.cell_size * m_per_deg_lng
+        min_side = min(cell_h, cell_w)
+        rings = math.ceil(radius / min_side)
+
+        # 最大堆 (-距离, -ID)，保留当前最近的 k 个
+        best: List[Tuple[float, int]] = []
+        with self._lock:
+            for ring, cells in enumerate(self._rings(self._cell(lat, lng), rings)):
+                # 第 ring 圈的格子距离查询点至少 (ring - 1) 个格子边长
+                if len(best) == k and (ring - 1) * min_side > -best[0][0]:
+                    break
+                for members in cells:
+                    for scooter_id in members:
+                        p_lat, p_lng, status = self._points[scooter_id]
+                        if statuses is not None and status not in statuses:
+                            continue
+                        distance = math.hypot(
+                            (p_lat - lat) * METERS_PER_DEGREE,
+                            (p_lng - lng) * m_per_deg_lng,
+                        )
+                        if distance > radius:
+                            continue
+                        item = (-distance, -scooter_id)
+                        if len(best) < k:
+                            heapq.heappush(best, item)
+                        elif item > best[0]:
+                            heapq.heapreplace(best, item)
+        return sorted(((-i, -d) for d, i in best), key=lambda hit: (hit[1], hit[0]))
+
+    def _rings(self, center: Cell, rings: int) -> Iterator[List[Set[int]]]:
+        """按圈返回中心格子周围有车的格子，只枚举有车范围内的格子"""
+        if self._bounds is None:
+            return
+        i_min, i_max, j_min, j_max = self._bounds
+        ci, cj = center
+        cells = self._cells
+        for r in range(rings + 1):
+            top, bottom, left, right = ci - r, ci + r, cj - r, cj + r
+            if top < i_min and bottom > i_max and left < j_min and right > j_max:
+                return
+            cols = range(max(left, j_min), min(right, j_max) + 1)
+            inner = range(max(top + 1, i_min), min(bottom - 1, i_max) + 1)
+            keys = []
+            if i_min <= top <= i_max:
+                keys += [(top, j) for j in cols]
+            if r and i_min <= bottom <= i_max:
+                keys += [(bottom, j) for j in cols]
+            if j_min <= left <= j_max:
+                keys += [(i, left) for i in inner]
+            if r and j_min <= right <= j_max:
+                keys += [(i, right) for i in inner]
+            yield [cells[key] for key in keys if key in cells]
+
+
+def _status_value(status: Any) -> Any:
+    # 状态可能是 ScooterStatus 枚举，也可能是数据库中的字符串
+    return getattr(status, "value", status)
+
+
+def _point(location: Optional[dict]) -> Optional[Tuple[float, float]]:
+    if not location:
+        return None
+    try:
+        return float(location["lat"]), float(location["lng"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+scooter_index = SpatialIndex(clusters=TileClusters())
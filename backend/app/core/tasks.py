@@ -0,0 +1,77 @@
+from typing import Dict
+
+from app import crud
+from app.core.availability import availability_index
+from app.core.spatial import scooter_index
+from app.core.telemetry import telemetry_buffer
+from app.core.track import track_buffer
+from app.db.session import SessionLocal
+
+
+def expire_rentals() -> Dict[str, int]:
+    """结束所有已到结束时间的租赁，并占用已到开始时间的预订，返回本次更新的行数"""
+    db = SessionLocal()
+    try:
+        rentals, scooters = crud.rental.check_expired_rentals(db)
+        started = crud.rental.start_due_rentals(db)
+    finally:
+        db.close()
+    return {
+        "expired_rentals": rentals,
+        "released_scooters": scooters,
+        "started_scooters": started,
+    }
+
+
+def refresh_availability() -> Dict[str, int]:
+    """从数据库重新加载租赁时间段索引，同步其他 worker 的写入"""
+    db = SessionLocal()
+    try:
+        windows = availability_index.load(db)
+    finally:
+        db.close()
+    return {"booked_windows": windows}
+
+
+def refresh_scooter_index() -> Dict[str, int]:
+    """从数据库重新加载滑板车空间索引，同步其他 worker 的写入"""
+    db = SessionLocal()
+    try:
+        scooters = scooter_index.load(db)
+    finally:
+        db.close()
+    return {"indexed_scooters": scooters}
+
+
+def flush_telemetry() -> Dict[str, float]:
+    """把缓存的遥测数据批量写入数据库"""
+    db = SessionLocal()
+    try:
+        return telemetry_buffer.flush(db)
+    finally:
+        db.close()
+
+
+def flush_tracks() -> Dict[str, int]:
+    """把缓存的轨迹点写入轨迹存储，失败时放回缓存等待下次写入"""
+    tracks = track_buffer.drain()
+    if not tracks:
+        return {"track_blocks": 0}
+    db = SessionLocal()
+    try:
+        blocks = crud.scooter_track.append(db, tracks)
+    except Exception:
+        track_buffer.restore(tracks)
+        raise
+    finally:
+        db.close()
+    return {"track_blocks": blocks}
+
+
+def compact_tracks() -> Dict[str, int]:
+    """合并轨迹块并按保留策略降采样"""
+    db = SessionLocal()
+    try:
+        return crud.scooter_track.compact(db)
+    finally:
+        db.close()
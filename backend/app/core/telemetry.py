@@ -0,0 +1,208 @@
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Iterable, NamedTuple, Optional, Tuple
+
+from sqlalchemy import bindparam, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.metrics import (
+    TELEMETRY_BUFFERED,
+    TELEMETRY_FLUSH_DURATION,
+    TELEMETRY_FLUSHED_ROWS,
+    TELEMETRY_READINGS,
+)
+from app.core.spatial import scooter_index
+from app.core.track import TrackBuffer, track_buffer
+from app.crud.scooter import scooter as crud_scooter
+from app.models.scooter import Scooter
+
+
+class Reading(NamedTuple):
+    """一条遥测读数，ts 为 Unix 时间戳"""
+
+    ts: float
+    lat: float
+    lng: float
+    battery: int
+
+
+def to_timestamp(value: datetime) -> float:
+    # 不带时区的时间按本地时间处理，与租赁时间一致
+    return value.timestamp()
+
+
+# 按主键批量更新位置和电量；使用 Core 语句，不存在的ID只是不更新任何行
+_update_scooters = (
+    update(Scooter.__table__)
+    .where(Scooter.__table__.c.id == bindparam("scooter_id"))
+    .values(location=bindparam("new_location"), battery_level=bindparam("new_battery"))
+)
+
+
+class TelemetryBuffer:
+    """缓存滑板车上报的遥测数据，定期用一条批量 UPDATE 写入数据库
+
+    每辆滑板车只保留时间最新的读数，比已缓存或已写入的读数更旧的数据（乱序到达）
+    直接丢弃。读数时间超前服务器时间 max_skew 秒以上，或早于 max_age 秒之前的
+    也直接丢弃，已写入的读数时间只需保留 max_age 秒。不存在的滑板车的读数在写入
+    时丢弃。正在写入的读数视为已写入，写入失败时恢复原来的写入时间，读数放回
+    缓存，在下次 flush 时重试。缓存只在本进程内，同一辆车的读数应由同一个
+    worker 接收，否则以最后一次写入为准。
+
+    指定 tracks 时，所有被接受的读数（不只是最新的）还会追加到轨迹缓存。
+    """
+
+    def __init__(
+        self,
+        tracks: Optional[TrackBuffer] = None,
+        max_skew: float = settings.TELEMETRY_MAX_CLOCK_SKEW_SECONDS,
+        max_age: float = settings.TELEMETRY_MAX_AGE_SECONDS,
+    ):
+        self._tracks = tracks
+        self._max_skew = max_skew
+        self._max_age = max_age
+        # 滑板车ID -> 等待写入的最新读数
+        self._pending: Dict[int, Reading] = {}
+        # 滑板车ID -> 已写入数据库的最新读数时间
+        self._flushed: Dict[int, float] = {}
+        self._evicted_at = time.time()
+        self._received = 0
+        self._since = time.monotonic()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._pending.clear()
+            self._flushed.clear()
+            self._received = 0
+            self._since = time.monotonic()
+        TELEMETRY_BUFFERED.set(0)
+
+    def add(self, readings: Iterable[Tuple[int, Reading]]) -> int:
+        """缓存 (滑板车ID, 读数)，返回没有被丢弃的读数数量"""
+        received = future = 0
+        accepted = []
+        now = time.time()
+        latest, earliest = now + self._max_skew, now - self._max_age
+        with self._lock:
+            for scooter_id, reading in readings:
+                received += 1
+                if reading.ts > latest:
+                    future += 1
+                elif reading.ts >= earliest and self._is_newer(scooter_id, reading):
+                    self._pending[scooter_id] = reading
+                    accepted.append((scooter_id, *reading))
+            self._received += received
+            buffered = len(self._pending)
+        if self._tracks is not None and accepted:
+            self._tracks.add_many(accepted)
+        TELEMETRY_READINGS.labels("accepted").inc(len(accepted))
+        TELEMETRY_READINGS.labels("future").inc(future)
+        TELEMETRY_READINGS.labels("stale").inc(received - len(accepted) - future)
+        TELEMETRY_BUFFERED.set(buffered)
+        return len(accepted)
+
+    def _is_newer(self, scooter_id: int, reading: Reading) -> bool:
+        pending = self._pending.get(scooter_id)
+        if pending is not None and pending.ts >= reading.ts:
+            return False
+        return self._flushed.get(scooter_id, float("-inf")) < reading.ts
+
+    def flush(self, db: Session) -> Dict[str, float]:
+        """写入所有缓存的读数，返回写入的滑板车数和上次 flush 以来的接收速率"""
+        started = time.perf_counter()
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            received, self._received = self._received, 0
+            elapsed = time.monotonic() - self._since
+            self._since = time.monotonic()
+            # 先记录写入时间，写入期间乱序到达的更旧读数同样被丢弃
+            previous = {
+                scooter_id: self._flushed.get(scooter_id) for scooter_id in pending
+            }
+            for scooter_id, reading in pending.items():
+                self._flushed[scooter_id] = reading.ts
+        rate = received / elapsed if elapsed > 0 else 0.0
+        if not pending:
+            return {"flushed_scooters": 0, "readings_per_second": round(rate, 1)}
+
+        missing = {}
+        try:
+            # 只写入并记录存在的滑板车，不存在的ID不会留在 _flushed 中
+            for scooter_id in crud_scooter.missing_ids(db, pending):
+                del pending[scooter_id]
+                missing[scooter_id] = previous[scooter_id]
+            locations = {
+                scooter_id: {"lat": reading.lat, "lng": reading.lng}
+                for scooter_id, reading in pending.items()
+            }
+            if pending:
+                crud_scooter.bump_version(db)
+                db.execute(
+                    _update_scooters,
+                    [
+                        {
+                            "scooter_id": scooter_id,
+                            "new_location": locations[scooter_id],
+                            "new_battery": reading.battery,
+                        }
+                        for scooter_id, reading in pending.items()
+                    ],
+                )
+            db.commit()
+        except Exception:
+            db.rollback()
+            self._restore(pending, previous)
+            raise
+
+        with self._lock:
+            self._reset_flushed(missing)
+            self._evict()
+            buffered = len(self._pending)
+        scooter_index.move_many(locations.items())
+        TELEMETRY_FLUSHED_ROWS.inc(len(pending))
+        TELEMETRY_BUFFERED.set(buffered)
+        TELEMETRY_FLUSH_DURATION.observe(time.perf_counter() - started)
+        return {"flushed_scooters": len(pending), "readings_per_second": round(rate, 1)}
+
+    def _evict(self) -> None:
+        """每隔 max_age 秒删除一次过期的写入时间，调用方需持有锁
+
+        早于 max_age 秒之前的读数在 add 时已经丢弃，不再需要与这些时间比较。
+        """
+        now = time.time()
+        if now - self._evicted_at < self._max_age:
+            return
+        earliest = now - self._max_age
+        self._flushed = {
+            scooter_id: ts for scooter_id, ts in self._flushed.items() if ts >= earliest
+        }
+        self._evicted_at = now
+
+    def _reset_flushed(self, previous: Dict[int, Optional[float]]) -> None:
+        """恢复 flush 前的写入时间，调用方需持有锁"""
+        for scooter_id, ts in previous.items():
+            if ts is None:
+                self._flushed.pop(scooter_id, None)
+            else:
+                self._flushed[scooter_id] = ts
+
+    def _restore(
+        self, pending: Dict[int, Reading], previous: Dict[int, Optional[float]]
+    ) -> None:
+        """把写入失败的读数放回缓存，期间收到的更新读数优先"""
+        with self._lock:
+            self._reset_flushed(previous)
+            for scooter_id, reading in pending.items():
+                if self._is_newer(scooter_id, reading):
+                    self._pending[scooter_id] = reading
+            buffered = len(self._pending)
+        TELEMETRY_BUFFERED.set(buffered)
+
+
+telemetry_buffer = TelemetryBuffer(tracks=track_buffer)
@@ -0,0 +1,216 @@
+import struct
+import threading
+import zlib
+from array import array
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterable, Iterator, NamedTuple, Tuple
+
+import numpy as np
+
+# 超过指定天数的轨迹降采样为每个间隔（秒）保留一个点：(天数, 采样间隔)，按天数递增
+DOWNSAMPLE_POLICY = ((7, 60), (30, 300))
+
+# 块格式版本、第一个点的毫秒时间戳、点数
+_HEADER = struct.Struct("<BqI")
+_FORMAT_VERSION = 1
+
+
+class TrackPoints(NamedTuple):
+    """按时间排序的轨迹点，每个字段是一个等长数组"""
+
+    ts: np.ndarray  # int64，毫秒时间戳
+    lat: np.ndarray  # float32
+    lng: np.ndarray  # float32
+    battery: np.ndarray  # uint8
+
+    @property
+    def size(self) -> int:
+        return int(self.ts.size)
+
+    def take(self, index) -> "TrackPoints":
+        return TrackPoints(*(column[index] for column in self))
+
+
+def empty_points() -> TrackPoints:
+    return TrackPoints(
+        np.empty(0, np.int64),
+        np.empty(0, np.float32),
+        np.empty(0, np.float32),
+        np.empty(0, np.uint8),
+    )
+
+
+def encode(points: TrackPoints) -> bytes:
+    """编码一天内的轨迹点
+
+    时间戳保存为相对前一个点的毫秒差（uint32），经纬度为 float32（约 1 米精度），
+    电量为 uint8，每个点 13 字节，再用 zlib 压缩。
+    """
+    if points.size == 0:
+        raise ValueError("Cannot encode an empty track")
+    header = _HEADER.pack(_FORMAT_VERSION, int(points.ts[0]), points.size)
+    payload = b"".join(
+        [
+            header,
+            np.diff(points.ts).astype("<u4").tobytes(),
+            points.lat.astype("<f4").tobytes(),
+            points.lng.astype("<f4").tobytes(),
+            points.battery.astype("u1").tobytes(),
+        ]
+    )
+    return zlib.compress(payload)
+
+
+def decode(data: bytes) -> TrackPoints:
+    payload = zlib.decompress(data)
+    version, first, count = _HEADER.unpack_from(payload)
+    if version != _FORMAT_VERSION:
+        raise ValueError(f"Unknown track block version: {version}")
+    offset = _HEADER.size
+    deltas = np.frombuffer(payload, "<u4", count - 1, offset)
+    offset += deltas.nbytes
+    lat = np.frombuffer(payload, "<f4", count, offset)
+    offset += lat.nbytes
+    lng = np.frombuffer(payload, "<f4", count, offset)
+    offset += lng.nbytes
+    battery = np.frombuffer(payload, "u1", count, offset)
+    ts = np.empty(count, np.int64)
+    ts[0] = first
+    np.cumsum(deltas, dtype=np.int64, out=ts[1:])
+    ts[1:] += first
+    return TrackPoints(ts, lat.copy(), lng.copy(), battery.copy())
+
+
+def concat(parts: Iterable[TrackPoints]) -> TrackPoints:
+    """合并多段轨迹并按时间排序"""
+    parts = [part for part in parts if part.size]
+    if not parts:
+        return empty_points()
+    if len(parts) == 1:
+        return parts[0]
+    merged = TrackPoints(*(np.concatenate(columns) for columns in zip(*parts)))
+    return merged.take(np.argsort(merged.ts, kind="stable"))
+
+
+def between(points: TrackPoints, start_ms: int, end_ms: int) -> TrackPoints:
+    """返回时间在 [start_ms, end_ms] 内的点"""
+    lo = int(np.searchsorted(points.ts, start_ms, side="left"))
+    hi = int(np.searchsorted(points.ts, end_ms, side="right"))
+    return points.take(slice(lo, hi))
+
+
+def downsample(points: TrackPoints, resolution: int) -> TrackPoints:
+    """每 resolution 秒的区间只保留最后一个点，resolution 不大于0时不处理"""
+    if resolution <= 0 or points.size == 0:
+        return points
+    buckets = points.ts // (resolution * 1000)
+    last = np.flatnonzero(np.append(buckets[1:] != buckets[:-1], True))
+    return points.take(last)
+
+
+def target_resolution(day: date, today: date) -> int:
+    """按保留策略返回某一天的轨迹应使用的采样间隔（秒）"""
+    resolution = 0
+    for days, interval in DOWNSAMPLE_POLICY:
+        if (today - day).days >= days:
+            resolution = interval
+    return resolution
+
+
+def split_days(points: TrackPoints) -> Iterator[Tuple[date, TrackPoints]]:
+    """按本地日期拆分轨迹"""
+    start = 0
+    while start < points.size:
+        day = datetime.fromtimestamp(points.ts[start] / 1000).date()
+        midnight = datetime.combine(day + timedelta(days=1), time())
+        end = int(np.searchsorted(points.ts, midnight.timestamp() * 1000, "left"))
+        yield day, points.take(slice(start, end))
+        start = end
+
+
+def to_datetime(ts_ms: int) -> datetime:
+    # 与租赁时间一样使用不带时区的本地时间
+    return datetime.fromtimestamp(ts_ms / 1000)
+
+
+def to_ms(value: datetime) -> int:
+    return round(value.timestamp() * 1000)
+
+
+class _Pending:
+    __slots__ = ("ts", "lat", "lng", "battery")
+
+    def __init__(self):
+        self.ts = array("q")
+        self.lat = array("f")
+        self.lng = array("f")
+        self.battery = array("B")
+
+    def points(self) -> TrackPoints:
+        return TrackPoints(
+            np.frombuffer(self.ts, np.int64).copy(),
+            np.frombuffer(self.lat, np.float32).copy(),
+            np.frombuffer(self.lng, np.float32).copy(),
+            np.frombuffer(self.battery, np.uint8).copy(),
+        )
+
+
+class TrackBuffer:
+    """等待写入轨迹存储的读数，按滑板车分组保存在紧凑的数组中
+
+    每辆车的读数按接收顺序追加，调用方保证时间递增（TelemetryBuffer 会丢弃乱序的
+    读数）。定期 drain 后写入数据库，写入失败时用 restore 放回。
+    """
+
+    def __init__(self):
+        self._pending: Dict[int, _Pending] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return sum(len(p.ts) for p in self._pending.values())
+
+    def clear(self) -> None:
+        with self._lock:
+            self._pending.clear()
+
+    def add_many(
+        self, readings: Iterable[Tuple[int, float, float, float, int]]
+    ) -> None:
+        """追加 (滑板车ID, 秒级时间戳, 纬度, 经度, 电量)"""
+        with self._lock:
+            for scooter_id, ts, lat, lng, battery in readings:
+                pending = self._pending.get(scooter_id)
+                if pending is None:
+                    pending = self._pending[scooter_id] = _Pending()
+                pending.ts.append(round(ts * 1000))
+                pending.lat.append(lat)
+                pending.lng.append(lng)
+                pending.battery.append(battery)
+
+    def pending(self, scooter_id: int) -> TrackPoints:
+        with self._lock:
+            pending = self._pending.get(scooter_id)
+            return pending.points() if pending is not None else empty_points()
+
+    def drain(self) -> Dict[int, TrackPoints]:
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        return {scooter_id: p.points() for scooter_id, p in pending.items()}
+
+    def restore(self, drained: Dict[int, TrackPoints]) -> None:
+        """把写入失败的轨迹放回，排在期间收到的新读数之前"""
+        with self._lock:
+            for scooter_id, points in drained.items():
+                restored = _Pending()
+                restored.ts.extend(points.ts.tolist())
+                restored.lat.extend(points.lat.tolist())
+                restored.lng.extend(points.lng.tolist())
+                restored.battery.extend(points.battery.tolist())
+                newer = self._pending.get(scooter_id)
+                if newer is not None:
+                    for field in _Pending.__slots__:
+                        getattr(restored, field).extend(getattr(newer, field))
+                self._pending[scooter_id] = restored
+
+
+track_buffer = TrackBuffer()
@@ -9,6 +9,7 @@ from .rental_config import rental_config  # noqa
 from .revenue_stats import revenue_stats  # noqa
 from .scooter_price import scooter_price  # noqa
 from .no_parking_zone import no_parking_zone  # noqa
+from .scooter_track import scooter_track  # noqa
 
 __all__ = [
     "user",
@@ -21,4 +22,5 @@ __all__ = [
     "revenue_stats",
     "scooter_price",
     "no_parking_zone",
+    "scooter_track",
 ]
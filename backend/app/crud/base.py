@@ -1,9 +1,25 @@
-from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
+from functools import cached_property
+from typing import (
+    Any,
+    Dict,
+    Generic,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Type,
+    TypeVar,
+    Union,
+)
 
 from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from sqlalchemy import delete, insert, inspect, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Query, Session
+from sqlalchemy.orm.attributes import set_committed_value
 
+from app.core.pagination import Page, encode_cursor
 from app.db.session import Base
 
 ModelType = TypeVar("ModelType", bound=Base)
@@ -25,18 +41,65 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         return db.query(self.model).filter(self.model.id == id).first()
 
     def get_multi(
-        self, db: Session, *, skip: int = 0, limit: int = 100
-    ) -> List[ModelType]:
-        """获取多个对象"""
-        return db.query(self.model).offset(skip).limit(limit).all()
+        self,
+        db: Session,
+        *,
+        skip: int = 0,
+        limit: int = 100,
+        after_id: Optional[int] = None,
+    ) -> Page[ModelType]:
+        """获取多个对象，按ID排序，after_id 见 paginate"""
+        return self.paginate(
+            db.query(self.model), after_id=after_id, skip=skip, limit=limit
+        )
+
+    def paginate(
+        self,
+        query: Query,
+        *,
+        after_id: Optional[int] = None,
+        skip: int = 0,
+        limit: int = 100,
+    ) -> Page[ModelType]:
+        """按ID做键集分页 (keyset pagination)
+
+        after_id 为上一页最后一条记录的ID（由 next_cursor 解析得到），通过
+        id > after_id 直接从索引定位，不需要像 OFFSET 一样扫描并丢弃之前的所有行。
+        skip 仅为兼容原有的调用方式保留。多读取一行用于判断是否还有下一页。
+        """
+        if after_id is not None:
+            query = query.filter(self.model.id > after_id)
+        rows = query.order_by(self.model.id).offset(skip).limit(limit + 1).all()
+        if limit > 0 and len(rows) > limit:
+            return Page(rows[:limit], next_cursor=encode_cursor(rows[limit - 1].id))
+        return Page(rows[:limit])
+
+    def get_by_ids(self, db: Session, ids: Iterable[Any]) -> List[ModelType]:
+        """通过一组ID获取对象，不存在的ID会被忽略"""
+        ids = list(set(ids))
+        if not ids:
+            return []
+        return db.query(self.model).filter(self.model.id.in_(ids)).all()
 
-    def create(self, db: Session, *, obj_in: CreateSchemaType) -> ModelType:
-        """创建新对象"""
+    def missing_ids(self, db: Session, ids: Iterable[Any]) -> List[Any]:
+        """返回 ids 中在数据库里不存在的ID（按升序排列）"""
+        ids = set(ids)
+        if not ids:
+            return []
+        found = db.scalars(select(self.model.id).where(self.model.id.in_(ids)))
+        return sorted(ids.difference(found))
+
+    def create(
+        self, db: Session, *, obj_in: CreateSchemaType, commit: bool = True
+    ) -> ModelType:
+        """创建新对象
+
+        commit 为 False 时只 flush，由调用方在整个流程结束后统一提交。
+        """
         obj_in_data = jsonable_encoder(obj_in)
         db_obj = self.model(**obj_in_data)
         db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        self._save(db, db_obj, commit)
         return db_obj
 
     def update(
@@ -45,24 +108,217 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         *,
         db_obj: ModelType,
         obj_in: Union[UpdateSchemaType, Dict[str, Any]],
+        commit: bool = True,
     ) -> ModelType:
-        """更新对象"""
-        obj_data = jsonable_encoder(db_obj)
+        """更新对象
+
+        只写入与对象当前值不同的列。后端支持时用一条 UPDATE ... RETURNING 写入并
+        取回整行（包括 onupdate 等数据库生成的值），提交后保留这些值，不需要再
+        refresh。commit 为 False 时由调用方在整个流程结束后统一提交。
+        """
         if isinstance(obj_in, dict):
             update_data = obj_in
         else:
             update_data = obj_in.model_dump(exclude_unset=True)
-        for field in obj_data:
-            if field in update_data:
-                setattr(db_obj, field, update_data[field])
-        db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        changes = self._changed_values(db_obj, update_data)
+        if changes:
+            if inspect(db_obj).persistent and db.get_bind().dialect.update_returning:
+                self._update_returning(db, db_obj, changes)
+            else:
+                for field, value in changes.items():
+                    setattr(db_obj, field, value)
+                db.add(db_obj)
+                db.flush()
+        if commit:
+            self._commit_loaded(db, db_obj)
         return db_obj
 
+    @cached_property
+    def _column_keys(self) -> List[str]:
+        """模型映射的列属性名"""
+        return [attr.key for attr in inspect(self.model).column_attrs]
+
+    def _changed_values(
+        self, db_obj: ModelType, update_data: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """返回需要写入的列；未加载的列无法比较，视为已修改"""
+        loaded = inspect(db_obj).dict
+        return {
+            key: value
+            for key, value in update_data.items()
+            if key in self._column_keys and (key not in loaded or loaded[key] != value)
+        }
+
+    def _update_returning(
+        self, db: Session, db_obj: ModelType, changes: Dict[str, Any]
+    ) -> None:
+        # 先写入对象上尚未 flush 的修改，否则会被 RETURNING 取回的旧值覆盖
+        db.flush()
+        row = db.execute(
+            update(self.model)
+            .where(self.model.id == db_obj.id)
+            .values(changes)
+            .returning(*(getattr(self.model, key) for key in self._column_keys))
+            .execution_options(synchronize_session=False)
+        ).one()
+        for key, value in zip(self._column_keys, row):
+            set_committed_value(db_obj, key, value)
+
+    def _commit_loaded(self, db: Session, db_obj: ModelType) -> None:
+        """提交并保留对象已加载的列值，代替提交后的 refresh"""
+        loaded = inspect(db_obj).dict
+        values = {key: loaded[key] for key in self._column_keys if key in loaded}
+        db.commit()
+        for key, value in values.items():
+            set_committed_value(db_obj, key, value)
+
+    @staticmethod
+    def _save(db: Session, db_obj: ModelType, commit: bool) -> None:
+        """提交并刷新对象；不提交时只 flush，生成主键和默认值，不需要再次刷新"""
+        if commit:
+            db.commit()
+            db.refresh(db_obj)
+        else:
+            db.flush()
+
     def remove(self, db: Session, *, id: int) -> ModelType:
         """删除对象"""
         obj = db.get(self.model, id)
         db.delete(obj)
         db.commit()
         return obj
+
+    def _create_values(self, obj_in: CreateSchemaType) -> Dict[str, Any]:
+        """将创建数据转换为一行数据库记录，子类可以覆盖以补全默认值"""
+        return jsonable_encoder(obj_in)
+
+    def create_many(
+        self,
+        db: Session,
+        *,
+        objs_in: Sequence[CreateSchemaType],
+        commit: bool = True,
+    ) -> List[ModelType]:
+        """批量创建对象
+
+        所有记录通过一条 INSERT ... RETURNING 写入（驱动支持时按 executemany 批量
+        发送参数），在同一个事务中提交一次。PostgreSQL 等数据库不保证 RETURNING
+        的行按参数顺序返回，因此使用 sort_by_parameter_order，返回的对象按 objs_in
+        的顺序排列。
+        """
+        if not objs_in:
+            return []
+        rows = [self._create_values(obj_in) for obj_in in objs_in]
+        statement = insert(self.model).returning(
+            self.model, sort_by_parameter_order=True
+        )
+        db_objs = list(db.scalars(statement, rows))
+        if commit:
+            return self._commit_and_reload(db, [obj.id for obj in db_objs])
+        return db_objs
+
+    def update_many(
+        self,
+        db: Session,
+        *,
+        objs_in: Sequence[Dict[str, Any]],
+        commit: bool = True,
+    ) -> List[ModelType]:
+        """按主键批量更新对象
+
+        objs_in 中每一项都必须包含 "id"，其余键为要更新的字段；字段集合相同的记录
+        合并为一次 executemany。任何一个ID不存在时抛出 StaleDataError，调用方应先
+        确认所有ID都存在。返回的对象按 objs_in 的顺序排列。
+        """
+        if not objs_in:
+            return []
+        # 只有 "id" 的项没有需要更新的字段，不生成 UPDATE 语句
+        rows = [obj_in for obj_in in objs_in if len(obj_in) > 1]
+        if rows:
+            db.execute(update(self.model), rows)
+        ids = [obj_in["id"] for obj_in in objs_in]
+        if commit:
+            return self._commit_and_reload(db, ids)
+        return self._reload(db, ids)
+
+    def remove_many(
+        self, db: Session, *, ids: Iterable[int], commit: bool = True
+    ) -> List[int]:
+        """通过一条 DELETE ... RETURNING 批量删除对象，返回实际删除的ID"""
+        ids = list(set(ids))
+        if not ids:
+            return []
+        deleted = list(
+            db.scalars(
+                delete(self.model)
+                .where(self.model.id.in_(ids))
+                .returning(self.model.id)
+            )
+        )
+        if commit:
+            db.commit()
+        return deleted
+
+    def _commit_and_reload(self, db: Session, ids: List[int]) -> List[ModelType]:
+        """提交后用一条查询重新加载所有对象，代替逐个 refresh"""
+        db.commit()
+        return self._reload(db, ids)
+
+    def _reload(self, db: Session, ids: List[int]) -> List[ModelType]:
+        by_id = {
+            obj.id: obj
+            for obj in db.scalars(
+                select(self.model)
+                .where(self.model.id.in_(ids))
+                .execution_options(populate_existing=True)
+            )
+        }
+        return [by_id[id] for id in ids]
+
+    async def aget(self, db: AsyncSession, id: Any) -> Optional[ModelType]:
+        """通过ID获取对象（异步）"""
+        return await db.get(self.model, id)
+
+    async def aget_multi(
+        self, db: AsyncSession, *, skip: int = 0, limit: int = 100
+    ) -> List[ModelType]:
+        """获取多个对象（异步）"""
+        result = await db.execute(select(self.model).offset(skip).limit(limit))
+        return list(result.scalars().all())
+
+    async def acreate(self, db: AsyncSession, *, obj_in: CreateSchemaType) -> ModelType:
+        """创建新对象（异步）"""
+        obj_in_data = jsonable_encoder(obj_in)
+        db_obj = self.model(**obj_in_data)
+        db.add(db_obj)
+        await db.commit()
+        await db.refresh(db_obj)
+        return db_obj
+
+    async def aupdate(
+        self,
+        db: AsyncSession,
+        *,
+        db_obj: ModelType,
+        obj_in: Union[UpdateSchemaType, Dict[str, Any]],
+    ) -> ModelType:
+        """更新对象（异步）"""
+        obj_data = jsonable_encoder(db_obj)
+        if isinstance(obj_in, dict):
+            update_data = obj_in
+        else:
+            update_data = obj_in.model_dump(exclude_unset=True)
+        for field in obj_data:
+            if field in update_data:
+                setattr(db_obj, field, update_data[field])
+        db.add(db_obj)
+        await db.commit()
+        await db.refresh(db_obj)
+        return db_obj
+
+    async def aremove(self, db: AsyncSession, *, id: int) -> ModelType:
+        """删除对象（异步）"""
+        obj = await db.get(self.model, id)
+        await db.delete(obj)
+        await db.commit()
+        return obj
@@ -1,8 +1,9 @@
-from typing import List, Optional
+from typing import Optional
 from datetime import datetime
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Query, Session, joinedload
 from fastapi.encoders import jsonable_encoder
 
+from app.core.pagination import Page
 from app.crud.base import CRUDBase
 from app.models.feedback import Feedback, FeedbackStatus, FeedbackPriority
 from app.schemas.feedback import FeedbackCreate, FeedbackUpdate
@@ -26,15 +27,36 @@ class CRUDFeedback(CRUDBase[Feedback, FeedbackCreate, FeedbackUpdate]):
         return db_obj
 
     def get_by_user(
-        self, db: Session, *, user_id: int, skip: int = 0, limit: int = 100
-    ) -> List[Feedback]:
+        self,
+        db: Session,
+        *,
+        user_id: int,
+        skip: int = 0,
+        limit: int = 100,
+        after_id: Optional[int] = None,
+    ) -> Page[Feedback]:
         """获取用户的所有反馈"""
-        return (
-            db.query(self.model)
-            .filter(Feedback.user_id == user_id)
-            .offset(skip)
-            .limit(limit)
-            .all()
+        return self.paginate(
+            db.query(self.model).filter(Feedback.user_id == user_id),
+            after_id=after_id,
+            skip=skip,
+            limit=limit,
+        )
+
+    def get_multi_with_details(
+        self,
+        db: Session,
+        *,
+        skip: int = 0,
+        limit: int = 100,
+        after_id: Optional[int] = None,
+    ) -> Page[Feedback]:
+        """获取所有反馈，同时加载用户、滑板车和处理人"""
+        return self.paginate(
+            self._with_details(db.query(self.model)),
+            after_id=after_id,
+            skip=skip,
+            limit=limit,
         )
 
     def get_by_id_and_user(
@@ -48,27 +70,47 @@ class CRUDFeedback(CRUDBase[Feedback, FeedbackCreate, FeedbackUpdate]):
         )
 
     def get_high_priority(
-        self, db: Session, *, skip: int = 0, limit: int = 100
-    ) -> List[Feedback]:
-        """获取所有高优先级的反馈"""
-        return (
-            db.query(self.model)
-            .filter(Feedback.priority == FeedbackPriority.HIGH.value)
-            .offset(skip)
-            .limit(limit)
-            .all()
+        self,
+        db: Session,
+        *,
+        skip: int = 0,
+        limit: int = 100,
+        after_id: Optional[int] = None,
+    ) -> Page[Feedback]:
+        """获取所有高优先级的反馈，同时加载用户、滑板车和处理人"""
+        return self.paginate(
+            self._with_details(db.query(self.model)).filter(
+                Feedback.priority == FeedbackPriority.HIGH.value
+            ),
+            after_id=after_id,
+            skip=skip,
+            limit=limit,
         )
 
     def get_by_status(
-        self, db: Session, *, status: str, skip: int = 0, limit: int = 100
-    ) -> List[Feedback]:
+        self,
+        db: Session,
+        *,
+        status: str,
+        skip: int = 0,
+        limit: int = 100,
+        after_id: Optional[int] = None,
+    ) -> Page[Feedback]:
         """通过状态获取反馈"""
-        return (
-            db.query(self.model)
-            .filter(Feedback.status == status)
-            .offset(skip)
-            .limit(limit)
-            .all()
+        return self.paginate(
+            db.query(self.model).filter(Feedback.status == status),
+            after_id=after_id,
+            skip=skip,
+            limit=limit,
+        )
+
+    @staticmethod
+    def _with_details(query: Query) -> Query:
+        """在同一条查询中加载管理员列表需要的关联对象，避免逐条反馈懒加载"""
+        return query.options(
+            joinedload(Feedback.user),
+            joinedload(Feedback.scooter),
+            joinedload(Feedback.handler),
         )
 
     def update_status(
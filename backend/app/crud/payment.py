@@ -1,14 +1,25 @@
-from typing import List, Optional
+from typing import Iterator, List, Optional, Sequence
+from datetime import datetime
+from sqlalchemy import Row, select
 from sqlalchemy.orm import Session
 
+from app.core.pagination import Page
 from app.crud.base import CRUDBase
+from app.crud.revenue_stats import revenue_stats
 from app.models.payment import Payment, PaymentStatus
+from app.models.rental import Rental
 from app.schemas.payment import PaymentCreate, PaymentUpdate
 
 
 class CRUDPayment(CRUDBase[Payment, PaymentCreate, PaymentUpdate]):
     def create_with_user_and_rental(
-        self, db: Session, *, obj_in: PaymentCreate, user_id: int
+        self,
+        db: Session,
+        *,
+        obj_in: PaymentCreate,
+        user_id: int,
+        transaction_id: Optional[str] = None,
+        commit: bool = True,
     ) -> Payment:
         """
         创建支付记录
@@ -21,10 +32,10 @@ class CRUDPayment(CRUDBase[Payment, PaymentCreate, PaymentUpdate]):
             currency=obj_in.currency,
             status=obj_in.status or PaymentStatus.PENDING,
             payment_method=obj_in.payment_method,
+            transaction_id=transaction_id,
         )
         db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        self._save(db, db_obj, commit)
         return db_obj
 
     def get_by_rental(self, db: Session, *, rental_id: int) -> List[Payment]:
@@ -34,17 +45,22 @@ class CRUDPayment(CRUDBase[Payment, PaymentCreate, PaymentUpdate]):
         return db.query(Payment).filter(Payment.rental_id == rental_id).all()
 
     def get_by_user(
-        self, db: Session, *, user_id: int, skip: int = 0, limit: int = 100
-    ) -> List[Payment]:
+        self,
+        db: Session,
+        *,
+        user_id: int,
+        skip: int = 0,
+        limit: int = 100,
+        after_id: Optional[int] = None,
+    ) -> Page[Payment]:
         """
         获取用户的所有支付记录
         """
-        return (
-            db.query(Payment)
-            .filter(Payment.user_id == user_id)
-            .offset(skip)
-            .limit(limit)
-            .all()
+        return self.paginate(
+            db.query(Payment).filter(Payment.user_id == user_id),
+            after_id=after_id,
+            skip=skip,
+            limit=limit,
         )
 
     def get_by_id_and_user(
@@ -66,15 +82,75 @@ class CRUDPayment(CRUDBase[Payment, PaymentCreate, PaymentUpdate]):
         db_obj: Payment,
         status: PaymentStatus,
         transaction_id: Optional[str] = None,
+        commit: bool = True,
     ) -> Payment:
         """
         更新支付状态
+
+        已完成的支付改为退款时，在同一个事务中从支付当天的收入统计中扣除。
         """
         update_data = {"status": status}
         if transaction_id:
             update_data["transaction_id"] = transaction_id
 
-        return super().update(db, db_obj=db_obj, obj_in=update_data)
+        refund = (
+            db_obj.status == PaymentStatus.COMPLETED
+            and status == PaymentStatus.REFUNDED
+        )
+        payment = super().update(db, db_obj=db_obj, obj_in=update_data, commit=False)
+        if refund:
+            revenue_stats.apply_payment(
+                db, payment=payment, rental=payment.rental, refund=True, commit=False
+            )
+        if commit:
+            self._commit_loaded(db, payment)
+        return payment
+
+    def iter_export_batches(
+        self,
+        db: Session,
+        *,
+        start: datetime,
+        end: datetime,
+        user_id: Optional[int] = None,
+        batch_size: int = 1000,
+    ) -> Iterator[Sequence[Row]]:
+        """
+        按批次读取 [start, end) 内的支付记录及其租赁信息，用于财务导出
+
+        指定 user_id 时只导出该用户的支付记录。使用 yield_per 流式读取（PostgreSQL
+        上为服务端游标），内存占用与总行数无关。
+        """
+        stmt = (
+            select(
+                Payment.id.label("payment_id"),
+                Payment.created_at.label("payment_created_at"),
+                Payment.user_id,
+                Payment.amount,
+                Payment.currency,
+                Payment.status.label("payment_status"),
+                Payment.payment_method,
+                Payment.transaction_id,
+                Payment.rental_id,
+                Rental.scooter_id,
+                Rental.start_time.label("rental_start_time"),
+                Rental.end_time.label("rental_end_time"),
+                Rental.status.label("rental_status"),
+                Rental.rental_period,
+                Rental.cost.label("rental_cost"),
+            )
+            .outerjoin(Rental, Rental.id == Payment.rental_id)
+            .where(Payment.created_at >= start, Payment.created_at < end)
+            .order_by(Payment.id)
+            .execution_options(yield_per=batch_size)
+        )
+        if user_id is not None:
+            stmt = stmt.where(Payment.user_id == user_id)
+        result = db.execute(stmt)
+        try:
+            yield from result.partitions()
+        finally:
+            result.close()
 
 
 payment = CRUDPayment(Payment)
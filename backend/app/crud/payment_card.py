@@ -1,6 +1,7 @@
-from typing import List, Optional, Dict, Any, Union
+from typing import Optional, Dict, Any, Union
 from sqlalchemy.orm import Session
 
+from app.core.pagination import Page
 from app.crud.base import CRUDBase
 from app.models.payment_card import PaymentCard
 from app.schemas.payment_card import PaymentCardCreate, PaymentCardUpdate
@@ -9,7 +10,12 @@ from app.core.payment import encrypt_card_data, get_card_type
 
 class CRUDPaymentCard(CRUDBase[PaymentCard, PaymentCardCreate, PaymentCardUpdate]):
     def create_with_user(
-        self, db: Session, *, obj_in: PaymentCardCreate, user_id: int
+        self,
+        db: Session,
+        *,
+        obj_in: PaymentCardCreate,
+        user_id: int,
+        commit: bool = True,
     ) -> PaymentCard:
         """
         创建用户的支付卡
@@ -46,22 +52,26 @@ class CRUDPaymentCard(CRUDBase[PaymentCard, PaymentCardCreate, PaymentCardUpdate
             ).update({PaymentCard.is_default: False})
 
         db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        self._save(db, db_obj, commit)
         return db_obj
 
     def get_by_user(
-        self, db: Session, *, user_id: int, skip: int = 0, limit: int = 100
-    ) -> List[PaymentCard]:
+        self,
+        db: Session,
+        *,
+        user_id: int,
+        skip: int = 0,
+        limit: int = 100,
+        after_id: Optional[int] = None,
+    ) -> Page[PaymentCard]:
         """
         获取用户的所有支付卡
         """
-        return (
-            db.query(PaymentCard)
-            .filter(PaymentCard.user_id == user_id)
-            .offset(skip)
-            .limit(limit)
-            .all()
+        return self.paginate(
+            db.query(PaymentCard).filter(PaymentCard.user_id == user_id),
+            after_id=after_id,
+            skip=skip,
+            limit=limit,
         )
 
     def get_by_id_and_user(
@@ -1,14 +1,25 @@
-from typing import List, Optional
-from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+from datetime import datetime
+from sqlalchemy import exists, select, update
 from sqlalchemy.orm import Session
 
+from app.core.availability import availability_index, local_naive
+from app.core.spatial import scooter_index
 from app.crud.base import CRUDBase
+from app.crud.scooter import scooter as crud_scooter
+from app.db.session import after_commit
 from app.models.rental import Rental
 from app.schemas.rental import RentalCreate, RentalUpdate
 from app.models.scooter import Scooter
 from app.schemas.scooter import ScooterStatus
 from app.schemas.rental import RentalStatus
 
+# 可以接受将来预订的滑板车状态：使用中的滑板车在当前租赁结束后可以预订
+BOOKABLE_STATUSES = [ScooterStatus.AVAILABLE.value, ScooterStatus.IN_USE.value]
+
+# 决定租赁是否占用某辆车某个时间段的字段，修改时需要检查重叠
+WINDOW_FIELDS = {"scooter_id", "start_time", "end_time", "status"}
+
 
 class CRUDRental(CRUDBase[Rental, RentalCreate, RentalUpdate]):
     def get_user_rentals(self, db: Session, *, user_id: int) -> List[Rental]:
@@ -17,26 +28,52 @@ class CRUDRental(CRUDBase[Rental, RentalCreate, RentalUpdate]):
     def get_active_rentals(self, db: Session) -> List[Rental]:
         return db.query(Rental).filter(Rental.status == RentalStatus.ACTIVE).all()
 
-    def check_expired_rentals(self, db: Session):
-        now = datetime.utcnow()
-        expired_rentals = (
-            db.query(Rental)
-            .filter(
-                Rental.status == RentalStatus.ACTIVE,
-                Rental.start_time <= now - timedelta(hours=1),
-            )
-            .all()
-        )
+    def check_expired_rentals(
+        self, db: Session, *, now: Optional[datetime] = None
+    ) -> Tuple[int, int]:
+        """
+        将已到结束时间的进行中租赁标记为已完成，并释放对应的滑板车
+
+        一条 UPDATE ... RETURNING 更新所有到期租赁，再用一条 UPDATE 批量释放滑板车。
+        返回 (到期租赁数, 释放的滑板车数)。
+        """
+        # 租赁的开始和结束时间使用本地时间（见创建租赁接口）
+        now = now or datetime.now()
+        expired = db.execute(
+            update(Rental)
+            .where(Rental.status == RentalStatus.ACTIVE, Rental.end_time <= now)
+            .values(status=RentalStatus.COMPLETED)
+            .returning(Rental.id, Rental.scooter_id)
+            .execution_options(synchronize_session=False)
+        ).all()
+        if not expired:
+            db.commit()
+            return 0, 0
+        scooter_ids = [scooter_id for _, scooter_id in expired]
 
-        for rental in expired_rentals:
-            rental.status = RentalStatus.COMPLETED
-            rental.end_time = now
-            db.add(rental)
-            scooter = db.query(Scooter).filter(Scooter.id == rental.scooter_id).first()
-            if scooter:
-                scooter.status = ScooterStatus.AVAILABLE
-                db.add(scooter)
+        # 只释放使用中且没有其他进行中租赁的滑板车
+        crud_scooter.bump_version(db)
+        released = db.scalars(
+            update(Scooter)
+            .where(
+                Scooter.id.in_(set(scooter_ids)),
+                Scooter.status == ScooterStatus.IN_USE.value,
+                # 将来的预订不占用滑板车，到开始时间后再由 start_due_rentals 标记
+                ~exists().where(
+                    Rental.scooter_id == Scooter.id,
+                    Rental.status == RentalStatus.ACTIVE,
+                    Rental.start_time <= now,
+                ),
+            )
+            .values(status=ScooterStatus.AVAILABLE.value)
+            .returning(Scooter.id)
+            .execution_options(synchronize_session=False)
+        ).all()
         db.commit()
+        availability_index.remove_many(rental_id for rental_id, _ in expired)
+        for scooter_id in released:
+            scooter_index.set_status(scooter_id, ScooterStatus.AVAILABLE.value)
+        return len(scooter_ids), len(released)
 
     def create_with_scooter(
         self,
@@ -46,16 +83,52 @@ class CRUDRental(CRUDBase[Rental, RentalCreate, RentalUpdate]):
         start_time: datetime,
         user_id: int,
         cost: float,
-    ) -> Rental:
-        scooter = db.query(Scooter).filter(Scooter.id == rental_in.scooter_id).first()
-        if scooter:
-            scooter.status = ScooterStatus.IN_USE
-            db.add(scooter)
+        now: Optional[datetime] = None,
+    ) -> Optional[Rental]:
+        """
+        预订滑板车并创建租赁记录，滑板车已不可用或时间段已被预订时返回 None
+
+        立即开始的租赁使用条件更新 (compare-and-set) 预订滑板车：只有状态仍为
+        available 时才会更新为 in_use。开始时间在将来的预订不修改状态（到开始时间后
+        由 start_due_rentals 修改），只用一条不改变数据的 UPDATE 锁住这一行，排除
+        维护中的滑板车。两种情况都在持有行锁后检查是否与其他进行中的租赁重叠，同一
+        辆车的并发预订依次检查，只锁一行，不需要锁表。预订与租赁记录在同一个事务中
+        提交。
+        """
+        now = now or datetime.now()
+        immediate = start_time <= now
+        scooter_id = rental_in.scooter_id
+        crud_scooter.bump_version(db)
+        if immediate:
+            reserve = (
+                update(Scooter)
+                .where(
+                    Scooter.id == scooter_id,
+                    Scooter.status == ScooterStatus.AVAILABLE.value,
+                )
+                .values(status=ScooterStatus.IN_USE.value)
+            )
+        else:
+            # 不修改数据，只为锁住这一行
+            reserve = (
+                update(Scooter)
+                .where(
+                    Scooter.id == scooter_id,
+                    Scooter.status.in_(BOOKABLE_STATUSES),
+                )
+                .values(status=Scooter.status)
+            )
+        reserved = db.execute(reserve).rowcount
+        if reserved != 1 or self._has_overlap(
+            db, scooter_id=scooter_id, start=start_time, end=rental_in.end_time
+        ):
+            db.rollback()
+            return None
 
         # 创建租赁记录
         rental = Rental(
             user_id=user_id,
-            scooter_id=rental_in.scooter_id,
+            scooter_id=scooter_id,
             start_time=start_time,
             end_time=rental_in.end_time,
             status=rental_in.status,
@@ -63,32 +136,183 @@ class CRUDRental(CRUDBase[Rental, RentalCreate, RentalUpdate]):
             rental_period=rental_in.rental_period,
         )
         db.add(rental)
+        db.flush()
+        self._sync_availability(db, rental)
+        if immediate:
+            after_commit(
+                db,
+                lambda: scooter_index.set_status(
+                    scooter_id, ScooterStatus.IN_USE.value
+                ),
+            )
         db.commit()
         db.refresh(rental)
         return rental
 
+    @staticmethod
+    def _has_overlap(
+        db: Session,
+        *,
+        scooter_id: int,
+        start: datetime,
+        end: Optional[datetime],
+        exclude_id: Optional[int] = None,
+    ) -> bool:
+        """
+        滑板车是否有与 [start, end) 重叠的进行中租赁，与时间段索引的判断一致
+
+        exclude_id 为正在修改的租赁，不与自身比较。
+        """
+        conditions = [
+            Rental.scooter_id == scooter_id,
+            Rental.status == RentalStatus.ACTIVE,
+            Rental.start_time.is_not(None),
+            Rental.end_time > start,
+        ]
+        if end is not None:
+            conditions.append(Rental.start_time < end)
+        if exclude_id is not None:
+            conditions.append(Rental.id != exclude_id)
+        return db.scalar(select(exists().where(*conditions)))
+
+    def start_due_rentals(self, db: Session, *, now: Optional[datetime] = None) -> int:
+        """
+        把已到开始时间的预订对应的滑板车标记为使用中，返回更新的滑板车数
+
+        只更新仍为 available 的滑板车，维护中的滑板车保持不变。
+        """
+        now = now or datetime.now()
+        crud_scooter.bump_version(db)
+        started = db.scalars(
+            update(Scooter)
+            .where(
+                Scooter.status == ScooterStatus.AVAILABLE.value,
+                exists().where(
+                    Rental.scooter_id == Scooter.id,
+                    Rental.status == RentalStatus.ACTIVE,
+                    Rental.start_time <= now,
+                    Rental.end_time > now,
+                ),
+            )
+            .values(status=ScooterStatus.IN_USE.value)
+            .returning(Scooter.id)
+            .execution_options(synchronize_session=False)
+        ).all()
+        db.commit()
+        for scooter_id in started:
+            scooter_index.set_status(scooter_id, ScooterStatus.IN_USE.value)
+        return len(started)
+
     def get_by_id(self, db: Session, rental_id: int) -> Optional[Rental]:
         return db.query(Rental).filter(Rental.id == rental_id).first()
 
     def update_rental(
-        self, db: Session, *, rental: Rental, rental_in: RentalUpdate
-    ) -> Rental:
+        self,
+        db: Session,
+        *,
+        rental: Rental,
+        rental_in: RentalUpdate,
+        commit: bool = True,
+    ) -> Optional[Rental]:
+        """
+        更新租赁记录，修改后的时间段与同一辆车的其他进行中租赁重叠时回滚并返回 None
+
+        修改滑板车、开始/结束时间或状态后仍为进行中的租赁，与创建预订一样先锁住
+        滑板车这一行，再检查重叠，保证时间段索引中同一辆车的时间段互不重叠。
+        """
         update_data = rental_in.model_dump(exclude_unset=True)
-        return super().update(db, db_obj=rental, obj_in=update_data)
+        for field in ("start_time", "end_time"):
+            if update_data.get(field) is not None:
+                update_data[field] = local_naive(update_data[field])
+
+        if not WINDOW_FIELDS.isdisjoint(update_data):
+            window = {field: getattr(rental, field) for field in WINDOW_FIELDS}
+            window.update(
+                (field, update_data[field])
+                for field in WINDOW_FIELDS
+                if field in update_data
+            )
+            if (
+                window["status"] == RentalStatus.ACTIVE
+                and window["start_time"] is not None
+                and self._window_taken(
+                    db,
+                    rental_id=rental.id,
+                    scooter_id=window["scooter_id"],
+                    start=window["start_time"],
+                    end=window["end_time"],
+                )
+            ):
+                db.rollback()
+                return None
+
+        rental = super().update(db, db_obj=rental, obj_in=update_data, commit=False)
+        self._sync_availability(db, rental)
+        if commit:
+            self._commit_loaded(db, rental)
+        return rental
+
+    def _window_taken(
+        self,
+        db: Session,
+        *,
+        rental_id: int,
+        scooter_id: int,
+        start: datetime,
+        end: Optional[datetime],
+    ) -> bool:
+        """锁住滑板车这一行后，检查其他进行中的租赁是否与 [start, end) 重叠"""
+        crud_scooter.bump_version(db)
+        # 不修改数据，只为锁住这一行
+        db.execute(
+            update(Scooter)
+            .where(Scooter.id == scooter_id)
+            .values(status=Scooter.status)
+        )
+        return self._has_overlap(
+            db,
+            scooter_id=scooter_id,
+            start=start,
+            end=end,
+            exclude_id=rental_id,
+        )
 
     def update_rental_status(
-        self, db: Session, *, rental: Rental, status: RentalStatus
+        self,
+        db: Session,
+        *,
+        rental: Rental,
+        status: RentalStatus,
+        commit: bool = True,
     ) -> Rental:
         rental.status = status
         db.add(rental)
-        db.commit()
+        db.flush()
+        self._sync_availability(db, rental)
+        if commit:
+            db.commit()
+        return rental
 
     def delete_rental(self, db: Session, *, rental_id: int) -> Optional[Rental]:
         rental = self.get_by_id(db, rental_id)
         if rental:
             db.delete(rental)
+            after_commit(db, lambda: availability_index.remove(rental_id))
             db.commit()
         return rental
 
+    def _sync_availability(self, db: Session, rental: Rental) -> None:
+        """提交后同步租赁时间段索引：进行中的租赁占用时间段，其他状态释放"""
+        rental_id = rental.id
+        if (
+            rental.status == RentalStatus.ACTIVE
+            and rental.start_time is not None
+            and rental.end_time is not None
+        ):
+            window = (rental.scooter_id, rental.start_time, rental.end_time)
+            after_commit(db, lambda: availability_index.add(rental_id, *window))
+        else:
+            after_commit(db, lambda: availability_index.remove(rental_id))
+
 
 rental = CRUDRental(Rental)
@@ -1,7 +1,9 @@
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Union
 from sqlalchemy.orm import Session
 
+from app.core.pricing import pricing_cache
 from app.crud.base import CRUDBase
+from app.db.session import after_commit
 from app.models.rental_config import RentalConfig
 from app.schemas.rental_config import RentalConfigCreate, RentalConfigUpdate
 
@@ -23,6 +25,7 @@ class CRUDRentalConfig(CRUDBase[RentalConfig, RentalConfigCreate, RentalConfigUp
             is_active=1,
         )
         db.add(db_obj)
+        after_commit(db, pricing_cache.bump)
         db.commit()
         db.refresh(db_obj)
         return db_obj
@@ -31,7 +34,30 @@ class CRUDRentalConfig(CRUDBase[RentalConfig, RentalConfigCreate, RentalConfigUp
         self, db: Session, *, db_obj: RentalConfig, obj_in: RentalConfigUpdate
     ) -> RentalConfig:
         update_data = obj_in.model_dump(exclude_unset=True)
-        return super().update(db, db_obj=db_obj, obj_in=update_data)
+        return self.update(db, db_obj=db_obj, obj_in=update_data)
+
+    # 配置修改提交后使定价缓存失效，回滚时不影响缓存
+
+    def create(
+        self, db: Session, *, obj_in: RentalConfigCreate, commit: bool = True
+    ) -> RentalConfig:
+        after_commit(db, pricing_cache.bump)
+        return super().create(db, obj_in=obj_in, commit=commit)
+
+    def update(
+        self,
+        db: Session,
+        *,
+        db_obj: RentalConfig,
+        obj_in: Union[RentalConfigUpdate, Dict[str, Any]],
+        commit: bool = True,
+    ) -> RentalConfig:
+        after_commit(db, pricing_cache.bump)
+        return super().update(db, db_obj=db_obj, obj_in=obj_in, commit=commit)
+
+    def remove(self, db: Session, *, id: int) -> RentalConfig:
+        after_commit(db, pricing_cache.bump)
+        return super().remove(db, id=id)
 
     def get_all_configs(
         self, db: Session, *, skip: int = 0, limit: int = 100
@@ -1,16 +1,342 @@
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 from datetime import date, datetime, timedelta
+from sqlalchemy import (
+    Date,
+    DateTime,
+    case,
+    delete,
+    func,
+    insert,
+    null,
+    or_,
+    select,
+    type_coerce,
+    update,
+)
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
+from app.core.cache import LRUCache
+from app.core.config import settings
 from app.crud.base import CRUDBase
-from app.models.revenue_stats import RevenueStats
+from app.db.session import after_commit
+from app.models.revenue_stats import RevenueRollup, RevenueStats
 from app.models.rental import Rental
 from app.models.payment import Payment, PaymentStatus
-from app.schemas.revenue_stats import RevenueStatsCreate, RevenueSummary
+from app.schemas.revenue_stats import (
+    RevenueGranularity,
+    RevenueSeries,
+    RevenueSeriesPoint,
+    RevenueStatsCreate,
+    RevenueSummary,
+)
 from app.schemas.rental import RentalPeriod, RentalStatus
 
 
+# 根据实际租赁时长（小时）判断租赁类型，允许一些误差
+PERIOD_MAX_HOURS = [
+    (RentalPeriod.ONE_HOUR.value, 1.5),
+    (RentalPeriod.FOUR_HOURS.value, 5),
+    (RentalPeriod.ONE_DAY.value, 25),
+]
+
+
+def rental_duration_hours(dialect_name: str):
+    """返回计算租赁时长（小时）的SQL表达式"""
+    if dialect_name == "sqlite":
+        return (
+            func.julianday(Rental.end_time) - func.julianday(Rental.start_time)
+        ) * 24
+    return func.extract("epoch", Rental.end_time - Rental.start_time) / 3600
+
+
+def classify_rental_period(
+    start_time: Optional[datetime], end_time: Optional[datetime]
+) -> Optional[str]:
+    """根据租赁时长判断租赁类型，与 rental_period_bucket 的分类规则一致"""
+    if not start_time or not end_time:
+        return None
+    duration_hours = (end_time - start_time).total_seconds() / 3600
+    for period, hours in PERIOD_MAX_HOURS:
+        if duration_hours <= hours:
+            return period
+    return RentalPeriod.ONE_WEEK.value
+
+
+def rental_period_bucket(dialect_name: str):
+    """返回按租赁时长分类的SQL表达式，缺少开始或结束时间时为NULL"""
+    duration_hours = rental_duration_hours(dialect_name)
+    return case(
+        (or_(Rental.start_time.is_(None), Rental.end_time.is_(None)), null()),
+        *[(duration_hours <= hours, period) for period, hours in PERIOD_MAX_HOURS],
+        else_=RentalPeriod.ONE_WEEK.value,
+    )
+
+
+def payment_hour(dialect_name: str):
+    """返回将支付时间截断到整点的SQL表达式"""
+    if dialect_name == "sqlite":
+        return type_coerce(
+            func.strftime("%Y-%m-%d %H:00:00", Payment.created_at), DateTime
+        )
+    return func.date_trunc("hour", Payment.created_at)
+
+
+# 除每日数据（RevenueStats）外，保存在 revenue_rollups 表中的统计粒度
+ROLLUP_GRANULARITIES = [
+    RevenueGranularity.HOUR,
+    RevenueGranularity.WEEK,
+    RevenueGranularity.MONTH,
+]
+
+
+def bucket_start(granularity: RevenueGranularity, moment: datetime) -> datetime:
+    """返回时间点所在统计区间的开始时间，周从周一开始"""
+    if granularity == RevenueGranularity.HOUR:
+        return moment.replace(minute=0, second=0, microsecond=0)
+    day = datetime.combine(moment.date(), datetime.min.time())
+    if granularity == RevenueGranularity.WEEK:
+        return day - timedelta(days=day.weekday())
+    if granularity == RevenueGranularity.MONTH:
+        return day.replace(day=1)
+    return day
+
+
+def next_bucket_start(granularity: RevenueGranularity, start: datetime) -> datetime:
+    """返回下一个统计区间的开始时间"""
+    if granularity == RevenueGranularity.HOUR:
+        return start + timedelta(hours=1)
+    if granularity == RevenueGranularity.WEEK:
+        return start + timedelta(days=7)
+    if granularity == RevenueGranularity.MONTH:
+        return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return start + timedelta(days=1)
+
+
+def bucket_starts(
+    granularity: RevenueGranularity, start: datetime, end: datetime
+) -> List[datetime]:
+    """返回与 [start, end) 相交的所有统计区间的开始时间"""
+    starts = []
+    current = bucket_start(granularity, start)
+    while current < end:
+        starts.append(current)
+        current = next_bucket_start(granularity, current)
+    return starts
+
+
+def covering_range(
+    granularity: RevenueGranularity, start: datetime, end: datetime
+) -> Tuple[datetime, datetime]:
+    """将 [start, end) 扩展到统计区间的边界"""
+    aligned_end = bucket_start(granularity, end)
+    if aligned_end != end:
+        aligned_end = next_bucket_start(granularity, aligned_end)
+    return bucket_start(granularity, start), aligned_end
+
+
+def covers_range(
+    granularity: RevenueGranularity, start_date: date, end_date: date
+) -> bool:
+    """判断该粒度的统计区间能否恰好覆盖日期范围（不包含范围外的数据）"""
+    start = datetime.combine(start_date, datetime.min.time())
+    end = datetime.combine(end_date + timedelta(days=1), datetime.min.time())
+    return covering_range(granularity, start, end) == (start, end)
+
+
+def pick_granularity(start_date: date, end_date: date) -> RevenueGranularity:
+    """选择能恰好覆盖日期范围且至少有两个区间的最粗粒度，单日范围按小时统计"""
+    start = datetime.combine(start_date, datetime.min.time())
+    end = datetime.combine(end_date + timedelta(days=1), datetime.min.time())
+    for granularity in (
+        RevenueGranularity.MONTH,
+        RevenueGranularity.WEEK,
+        RevenueGranularity.DAY,
+    ):
+        if (
+            covers_range(granularity, start_date, end_date)
+            and len(bucket_starts(granularity, start, end)) > 1
+        ):
+            return granularity
+    return RevenueGranularity.HOUR
+
+
 class CRUDRevenueStats(CRUDBase[RevenueStats, RevenueStatsCreate, dict]):
+    def __init__(self, model):
+        super().__init__(model)
+        # 按 (开始日期, 结束日期) 缓存收入汇总，只包含已结束日期的汇总永不过期
+        self.summary_cache = LRUCache(maxsize=settings.REVENUE_SUMMARY_CACHE_SIZE)
+
+    def invalidate_summaries(self, stats_date: date) -> None:
+        """删除包含指定日期的收入汇总缓存"""
+        self.summary_cache.invalidate(lambda key: key[0] <= stats_date <= key[1])
+
+    @staticmethod
+    def _empty_revenue_by_period() -> Dict[str, Dict[str, Any]]:
+        return {period.value: {"count": 0, "revenue": 0.0} for period in RentalPeriod}
+
+    def _empty_values(self) -> Dict[str, Any]:
+        return {
+            "total_revenue": 0.0,
+            "rental_count": 0,
+            "revenue_by_period": self._empty_revenue_by_period(),
+        }
+
+    @staticmethod
+    def _accumulate(
+        values: Dict[str, Any], period: Optional[str], count: int, revenue: float
+    ) -> None:
+        values["total_revenue"] += revenue
+        values["rental_count"] += count
+        # 缺少开始或结束时间的订单只计入总数，不参与时长分类
+        if period in values["revenue_by_period"]:
+            values["revenue_by_period"][period]["count"] += count
+            values["revenue_by_period"][period]["revenue"] += revenue
+
+    def _increment(
+        self, model, row, *, period: Optional[str], amount: float, sign: int
+    ):
+        """返回将一笔支付计入（或扣除）统计记录的 UPDATE 语句
+
+        总收入和订单数使用列自增，保证并发更新时的原子性；按时长分类的数据
+        需要调用方先锁定该行。
+        """
+        revenue_by_period = self._empty_revenue_by_period()
+        for key, data in (row.revenue_by_period or {}).items():
+            revenue_by_period[key] = dict(data)
+        if period:
+            revenue_by_period[period]["count"] += sign
+            revenue_by_period[period]["revenue"] += sign * amount
+
+        return (
+            update(model)
+            .where(model.id == row.id)
+            .values(
+                total_revenue=model.total_revenue + sign * amount,
+                rental_count=model.rental_count + sign,
+                revenue_by_period=revenue_by_period,
+            )
+        )
+
+    def _aggregate_revenue(
+        self, db: Session, *, start: datetime, end: datetime, by_hour: bool = False
+    ) -> List[Tuple[Any, Optional[str], int, float]]:
+        """汇总 [start, end) 内已完成支付的收入
+
+        返回 (日期或整点, 租赁类型, 订单数, 收入) 列表，by_hour 为真时按整点分组。
+        """
+        dialect_name = db.get_bind().dialect.name
+        if by_hour:
+            bucket = payment_hour(dialect_name)
+        else:
+            bucket = type_coerce(func.date(Payment.created_at), Date)
+        paid_rentals = (
+            select(
+                bucket.label("bucket"),
+                rental_period_bucket(dialect_name).label("period"),
+                Payment.amount.label("amount"),
+            )
+            .join(Rental, Rental.id == Payment.rental_id)
+            .where(
+                Payment.status == PaymentStatus.COMPLETED,
+                Payment.created_at >= start,
+                Payment.created_at < end,
+                Rental.status.in_([RentalStatus.COMPLETED, RentalStatus.PAID]),
+            )
+            .subquery()
+        )
+        rows = db.execute(
+            select(
+                paid_rentals.c.bucket,
+                paid_rentals.c.period,
+                func.count(),
+                func.coalesce(func.sum(paid_rentals.c.amount), 0.0),
+            ).group_by(paid_rentals.c.bucket, paid_rentals.c.period)
+        ).all()
+        return [
+            (bucket, period, count, float(revenue))
+            for bucket, period, count, revenue in rows
+        ]
+
+    def _compute_daily_values(
+        self, db: Session, *, start_date: date, end_date: date
+    ) -> Dict[date, Dict[str, Any]]:
+        """通过一次 JOIN + GROUP BY 计算日期范围内每天的收入统计数据"""
+        daily_values = {}
+        current_date = start_date
+        while current_date <= end_date:
+            daily_values[current_date] = self._empty_values()
+            current_date += timedelta(days=1)
+
+        for day, period, count, revenue in self._aggregate_revenue(
+            db,
+            start=datetime.combine(start_date, datetime.min.time()),
+            end=datetime.combine(end_date + timedelta(days=1), datetime.min.time()),
+        ):
+            self._accumulate(daily_values[day], period, count, revenue)
+
+        return daily_values
+
+    def _fold_rollup_values(
+        self,
+        hourly_rows: List[Tuple[datetime, Optional[str], int, float]],
+        *,
+        granularity: RevenueGranularity,
+        start: datetime,
+        end: datetime,
+    ) -> Dict[datetime, Dict[str, Any]]:
+        """将按整点分组的收入汇总到 [start, end) 内该粒度的各个统计区间"""
+        rollup_values = {
+            bucket: self._empty_values()
+            for bucket in bucket_starts(granularity, start, end)
+        }
+        for hour, period, count, revenue in hourly_rows:
+            if start <= hour < end:
+                values = rollup_values[bucket_start(granularity, hour)]
+                self._accumulate(values, period, count, revenue)
+        return rollup_values
+
+    def _rebuild_rollups(
+        self,
+        db: Session,
+        *,
+        granularities: List[RevenueGranularity],
+        start: datetime,
+        end: datetime,
+    ) -> None:
+        """从支付记录重新计算覆盖 [start, end) 的各粒度统计数据（不提交事务）
+
+        所有粒度共用一次按整点分组的查询。
+        """
+        spans = {
+            granularity: covering_range(granularity, start, end)
+            for granularity in granularities
+        }
+        hourly_rows = self._aggregate_revenue(
+            db,
+            start=min(span[0] for span in spans.values()),
+            end=max(span[1] for span in spans.values()),
+            by_hour=True,
+        )
+        for granularity, (span_start, span_end) in spans.items():
+            rollup_values = self._fold_rollup_values(
+                hourly_rows, granularity=granularity, start=span_start, end=span_end
+            )
+            db.execute(
+                delete(RevenueRollup).where(
+                    RevenueRollup.granularity == granularity.value,
+                    RevenueRollup.bucket_start >= span_start,
+                    RevenueRollup.bucket_start < span_end,
+                )
+            )
+            db.execute(
+                insert(RevenueRollup),
+                [
+                    {"granularity": granularity.value, "bucket_start": bucket, **values}
+                    for bucket, values in rollup_values.items()
+                ],
+            )
+
     def get_by_date(self, db: Session, *, date: date) -> Optional[RevenueStats]:
         """根据日期获取收入统计数据"""
         return db.query(RevenueStats).filter(RevenueStats.date == date).first()
@@ -27,187 +353,291 @@ class CRUDRevenueStats(CRUDBase[RevenueStats, RevenueStatsCreate, dict]):
         )
 
     def create_or_update_daily_stats(
-        self, db: Session, *, stats_date: date
+        self, db: Session, *, stats_date: date, commit: bool = True
     ) -> RevenueStats:
-        """创建或更新指定日期的收入统计数据"""
+        """创建或更新指定日期的收入统计数据
+
+        commit 为 False 时只 flush，由调用方统一提交；缓存在事务提交后才清除。
+        """
         # 查找是否已存在该日期的统计数据
         stats = self.get_by_date(db, date=stats_date)
-
-        # 获取指定日期的所有已支付租赁订单
-        start_of_day = datetime.combine(stats_date, datetime.min.time())
-        end_of_day = datetime.combine(stats_date, datetime.max.time())
-
-        # 查询当天完成支付的所有租赁订单
-        payments = (
-            db.query(Payment)
-            .filter(
-                Payment.status == PaymentStatus.COMPLETED,
-                Payment.created_at >= start_of_day,
-                Payment.created_at <= end_of_day,
-            )
-            .all()
-        )
-
-        # 初始化统计数据
-        total_revenue = 0.0
-        rental_count = 0
-        revenue_by_period = {
-            RentalPeriod.ONE_HOUR.value: {"count": 0, "revenue": 0.0},
-            RentalPeriod.FOUR_HOURS.value: {"count": 0, "revenue": 0.0},
-            RentalPeriod.ONE_DAY.value: {"count": 0, "revenue": 0.0},
-            RentalPeriod.ONE_WEEK.value: {"count": 0, "revenue": 0.0},
-        }
-
-        # 统计收入数据
-        for payment in payments:
-            rental = db.query(Rental).filter(Rental.id == payment.rental_id).first()
-            if rental and rental.status in [RentalStatus.COMPLETED, RentalStatus.PAID]:
-                total_revenue += payment.amount
-                rental_count += 1
-
-                # 根据租赁时长分类统计
-                # 计算租赁时长（小时）
-                if rental.end_time and rental.start_time:
-                    duration_hours = (
-                        rental.end_time - rental.start_time
-                    ).total_seconds() / 3600
-
-                    # 根据时长判断租赁类型
-                    rental_period = None
-                    if duration_hours <= 1.5:  # 1小时租赁（允许一些误差）
-                        rental_period = RentalPeriod.ONE_HOUR.value
-                    elif duration_hours <= 5:  # 4小时租赁
-                        rental_period = RentalPeriod.FOUR_HOURS.value
-                    elif duration_hours <= 25:  # 1天租赁
-                        rental_period = RentalPeriod.ONE_DAY.value
-                    else:  # 1周租赁
-                        rental_period = RentalPeriod.ONE_WEEK.value
-
-                    if rental_period:
-                        revenue_by_period[rental_period]["count"] += 1
-                        revenue_by_period[rental_period]["revenue"] += payment.amount
+        values = self._compute_daily_values(
+            db, start_date=stats_date, end_date=stats_date
+        )[stats_date]
 
         # 创建或更新统计数据
         if not stats:
             # 创建新的统计记录
-            stats_data = {
-                "date": stats_date,
-                "total_revenue": total_revenue,
-                "rental_count": rental_count,
-                "revenue_by_period": revenue_by_period,
-            }
-            stats = RevenueStats(**stats_data)
+            stats = RevenueStats(date=stats_date, **values)
             db.add(stats)
         else:
             # 更新现有统计记录
-            stats.total_revenue = total_revenue
-            stats.rental_count = rental_count
-            stats.revenue_by_period = revenue_by_period
-
-        db.commit()
-        db.refresh(stats)
-        return stats
+            stats.total_revenue = values["total_revenue"]
+            stats.rental_count = values["rental_count"]
+            stats.revenue_by_period = values["revenue_by_period"]
 
-    def generate_weekly_stats(
-        self, db: Session, *, end_date: date = None
-    ) -> RevenueSummary:
-        """生成最近一周的收入统计汇总"""
-        if not end_date:
-            end_date = date.today()
-
-        start_date = end_date - timedelta(days=6)  # 7天的数据（包括结束日期）
+        # 同时重新计算当天的小时数据以及所在周、月的统计数据
+        start_of_day = datetime.combine(stats_date, datetime.min.time())
+        self._rebuild_rollups(
+            db,
+            granularities=ROLLUP_GRANULARITIES,
+            start=start_of_day,
+            end=start_of_day + timedelta(days=1),
+        )
 
-        # 获取日期范围内的所有统计数据
-        daily_stats = self.get_date_range(db, start_date=start_date, end_date=end_date)
+        after_commit(db, lambda: self.invalidate_summaries(stats_date))
+        if commit:
+            db.commit()
+            db.refresh(stats)
+        else:
+            db.flush()
+        return stats
 
-        # 如果某天没有统计数据，则创建该天的统计
-        current_date = start_date
-        while current_date <= end_date:
-            found = False
-            for stats in daily_stats:
-                if stats.date == current_date:
-                    found = True
-                    break
+    def apply_payment(
+        self,
+        db: Session,
+        *,
+        payment: Payment,
+        rental: Rental,
+        refund: bool = False,
+        commit: bool = True,
+    ) -> None:
+        """支付完成或退款时，增量更新支付当天的收入统计数据
+
+        commit 为 False 时与调用方的其他写入在同一个事务中提交。
+        """
+        if rental.status not in [RentalStatus.COMPLETED, RentalStatus.PAID]:
+            return
+
+        stats_date = payment.created_at.date()
+        # 锁定当天的统计记录，避免并发支付互相覆盖按时长分类的数据
+        stats = (
+            db.query(RevenueStats)
+            .filter(RevenueStats.date == stats_date)
+            .with_for_update()
+            .first()
+        )
+        if not stats:
+            # 当天还没有统计数据，完整计算一次（已包含本次支付）。使用保存点，
+            # 冲突时只回滚统计数据，不影响调用方在同一事务中的其他写入
+            try:
+                with db.begin_nested():
+                    self.create_or_update_daily_stats(
+                        db, stats_date=stats_date, commit=False
+                    )
+            except IntegrityError:
+                # 其他请求同时创建了该日期的统计数据，重新完整计算
+                self.create_or_update_daily_stats(
+                    db, stats_date=stats_date, commit=False
+                )
+            if commit:
+                db.commit()
+            return
+
+        sign = -1 if refund else 1
+        period = classify_rental_period(rental.start_time, rental.end_time)
+        db.execute(
+            self._increment(
+                RevenueStats, stats, period=period, amount=payment.amount, sign=sign
+            )
+        )
 
-            if not found:
-                self.create_or_update_daily_stats(db, stats_date=current_date)
+        for granularity in ROLLUP_GRANULARITIES:
+            start = bucket_start(granularity, payment.created_at)
+            rollup = (
+                db.query(RevenueRollup)
+                .filter(
+                    RevenueRollup.granularity == granularity.value,
+                    RevenueRollup.bucket_start == start,
+                )
+                .with_for_update()
+                .first()
+            )
+            if not rollup:
+                # 该区间还没有统计数据，从支付记录完整计算（已包含本次支付）
+                self._rebuild_rollups(
+                    db,
+                    granularities=[granularity],
+                    start=start,
+                    end=next_bucket_start(granularity, start),
+                )
+                continue
+            db.execute(
+                self._increment(
+                    RevenueRollup,
+                    rollup,
+                    period=period,
+                    amount=payment.amount,
+                    sign=sign,
+                )
+            )
+        after_commit(db, lambda: self.invalidate_summaries(stats_date))
+        if commit:
+            db.commit()
 
-            current_date += timedelta(days=1)
+    def backfill_date_range(
+        self, db: Session, *, start_date: date, end_date: date
+    ) -> List[RevenueStats]:
+        """补全日期范围内缺失的每日统计数据，并返回该范围内的全部统计数据
 
-        # 重新获取完整的统计数据
+        所有缺失日期通过一次分组查询计算，并在同一个事务中写入。
+        """
         daily_stats = self.get_date_range(db, start_date=start_date, end_date=end_date)
-
-        # 初始化汇总数据
-        total_revenue = 0.0
-        total_rentals = 0
-        revenue_by_period = {
-            RentalPeriod.ONE_HOUR.value: {
-                "count": 0,
-                "revenue": 0.0,
-                "average_daily": 0.0,
-            },
-            RentalPeriod.FOUR_HOURS.value: {
-                "count": 0,
-                "revenue": 0.0,
-                "average_daily": 0.0,
-            },
-            RentalPeriod.ONE_DAY.value: {
-                "count": 0,
-                "revenue": 0.0,
-                "average_daily": 0.0,
-            },
-            RentalPeriod.ONE_WEEK.value: {
-                "count": 0,
-                "revenue": 0.0,
-                "average_daily": 0.0,
-            },
-        }
-
-        # 汇总数据
-        daily_data = []
-        for stats in daily_stats:
-            total_revenue += stats.total_revenue
-            total_rentals += stats.rental_count
-
-            # 按租赁时长汇总
-            for period, data in stats.revenue_by_period.items():
-                if period in revenue_by_period:
-                    revenue_by_period[period]["count"] += data["count"]
-                    revenue_by_period[period]["revenue"] += data["revenue"]
-
-            # 添加每日数据
-            daily_data.append(
-                {
-                    "date": stats.date.isoformat(),
-                    "total_revenue": stats.total_revenue,
-                    "rental_count": stats.rental_count,
-                    "revenue_by_period": stats.revenue_by_period,
-                }
+        existing_dates = {stats.date for stats in daily_stats}
+        missing_dates = [
+            start_date + timedelta(days=offset)
+            for offset in range((end_date - start_date).days + 1)
+            if start_date + timedelta(days=offset) not in existing_dates
+        ]
+        if not missing_dates:
+            return daily_stats
+
+        daily_values = self._compute_daily_values(
+            db, start_date=missing_dates[0], end_date=missing_dates[-1]
+        )
+        try:
+            db.execute(
+                insert(RevenueStats),
+                [
+                    {"date": missing_date, **daily_values[missing_date]}
+                    for missing_date in missing_dates
+                ],
             )
-
-        # 计算日均收入和每种租赁类型的日均收入
-        days_count = (end_date - start_date).days + 1
-        daily_average = total_revenue / days_count if days_count > 0 else 0
-
-        for period in revenue_by_period:
-            revenue_by_period[period]["average_daily"] = (
-                revenue_by_period[period]["revenue"] / days_count
-                if days_count > 0
-                else 0
+            db.commit()
+        except IntegrityError:
+            # 其他请求已并发写入了部分日期，直接使用已写入的数据
+            db.rollback()
+
+        return self.get_date_range(db, start_date=start_date, end_date=end_date)
+
+    def get_rollups(
+        self,
+        db: Session,
+        *,
+        granularity: RevenueGranularity,
+        start: datetime,
+        end: datetime,
+    ) -> List[RevenueRollup]:
+        """获取 [start, end) 内指定粒度的统计数据"""
+        return (
+            db.query(RevenueRollup)
+            .filter(
+                RevenueRollup.granularity == granularity.value,
+                RevenueRollup.bucket_start >= start,
+                RevenueRollup.bucket_start < end,
             )
+            .order_by(RevenueRollup.bucket_start)
+            .all()
+        )
 
-        # 创建汇总结果
-        summary = RevenueSummary(
+    def backfill_rollups(
+        self,
+        db: Session,
+        *,
+        granularity: RevenueGranularity,
+        start: datetime,
+        end: datetime,
+    ) -> List[RevenueRollup]:
+        """补全与 [start, end) 相交的缺失统计区间，并返回这些区间的全部统计数据"""
+        start, end = covering_range(granularity, start, end)
+        rollups = self.get_rollups(db, granularity=granularity, start=start, end=end)
+        existing = {rollup.bucket_start for rollup in rollups}
+        missing = [
+            bucket
+            for bucket in bucket_starts(granularity, start, end)
+            if bucket not in existing
+        ]
+        if not missing:
+            return rollups
+
+        span_end = next_bucket_start(granularity, missing[-1])
+        hourly_rows = self._aggregate_revenue(
+            db, start=missing[0], end=span_end, by_hour=True
+        )
+        rollup_values = self._fold_rollup_values(
+            hourly_rows, granularity=granularity, start=missing[0], end=span_end
+        )
+        try:
+            db.execute(
+                insert(RevenueRollup),
+                [
+                    {
+                        "granularity": granularity.value,
+                        "bucket_start": bucket,
+                        **rollup_values[bucket],
+                    }
+                    for bucket in missing
+                ],
+            )
+            db.commit()
+        except IntegrityError:
+            # 其他请求已并发写入了部分区间，直接使用已写入的数据
+            db.rollback()
+
+        return self.get_rollups(db, granularity=granularity, start=start, end=end)
+
+    def get_series(
+        self,
+        db: Session,
+        *,
+        granularity: RevenueGranularity,
+        start_date: date,
+        end_date: date,
+    ) -> RevenueSeries:
+        """按指定粒度返回日期范围内的收入时间序列
+
+        每日数据读取 revenue_stats，其余粒度读取 revenue_rollups，
+        缺失的统计区间会先补全。
+        """
+        if granularity == RevenueGranularity.DAY:
+            rows = [
+                (datetime.combine(stats.date, datetime.min.time()), stats)
+                for stats in self.backfill_date_range(
+                    db, start_date=start_date, end_date=end_date
+                )
+            ]
+        else:
+            rows = [
+                (rollup.bucket_start, rollup)
+                for rollup in self.backfill_rollups(
+                    db,
+                    granularity=granularity,
+                    start=datetime.combine(start_date, datetime.min.time()),
+                    end=datetime.combine(
+                        end_date + timedelta(days=1), datetime.min.time()
+                    ),
+                )
+            ]
+
+        points = [
+            RevenueSeriesPoint(
+                bucket_start=start,
+                total_revenue=row.total_revenue,
+                rental_count=row.rental_count,
+                revenue_by_period=row.revenue_by_period,
+            )
+            for start, row in rows
+        ]
+        return RevenueSeries(
+            granularity=granularity,
             start_date=start_date,
             end_date=end_date,
-            total_revenue=total_revenue,
-            total_rentals=total_rentals,
-            daily_average=daily_average,
-            revenue_by_period=revenue_by_period,
-            daily_stats=daily_data,
+            total_revenue=sum(point.total_revenue for point in points),
+            total_rentals=sum(point.rental_count for point in points),
+            points=points,
         )
 
-        return summary
+    def generate_weekly_stats(
+        self, db: Session, *, end_date: date = None
+    ) -> RevenueSummary:
+        """生成最近一周的收入统计汇总"""
+        if not end_date:
+            end_date = date.today()
+
+        start_date = end_date - timedelta(days=6)  # 7天的数据（包括结束日期）
+        return self.generate_custom_period_stats(
+            db, start_date=start_date, end_date=end_date
+        )
 
     def generate_custom_period_stats(
         self, db: Session, *, start_date: date, end_date: date
@@ -217,50 +647,35 @@ class CRUDRevenueStats(CRUDBase[RevenueStats, RevenueStatsCreate, dict]):
         if start_date > end_date:
             start_date, end_date = end_date, start_date
 
-        # 获取日期范围内的所有统计数据
-        daily_stats = self.get_date_range(db, start_date=start_date, end_date=end_date)
-
-        # 如果某天没有统计数据，则创建该天的统计
-        current_date = start_date
-        while current_date <= end_date:
-            found = False
-            for stats in daily_stats:
-                if stats.date == current_date:
-                    found = True
-                    break
-
-            if not found:
-                self.create_or_update_daily_stats(db, stats_date=current_date)
+        key = (start_date, end_date)
+        summary = self.summary_cache.get(key)
+        if summary is not None:
+            return summary
 
-            current_date += timedelta(days=1)
+        daily_stats = self.backfill_date_range(
+            db, start_date=start_date, end_date=end_date
+        )
+        summary = self.summarize(daily_stats, start_date=start_date, end_date=end_date)
 
-        # 重新获取完整的统计数据
-        daily_stats = self.get_date_range(db, start_date=start_date, end_date=end_date)
+        # 支付时间使用UTC，今天之前的日期只会因刷新或退款而改变（会主动删除缓存），
+        # 包含今天的范围还会有新的支付，只缓存较短时间
+        if end_date < datetime.utcnow().date():
+            ttl = None
+        else:
+            ttl = settings.REVENUE_SUMMARY_CACHE_TTL
+        self.summary_cache.set(key, summary, ttl=ttl)
+        return summary
 
+    def summarize(
+        self, daily_stats: List[RevenueStats], *, start_date: date, end_date: date
+    ) -> RevenueSummary:
+        """将每日统计数据汇总为 RevenueSummary"""
         # 初始化汇总数据
         total_revenue = 0.0
         total_rentals = 0
         revenue_by_period = {
-            RentalPeriod.ONE_HOUR.value: {
-                "count": 0,
-                "revenue": 0.0,
-                "average_daily": 0.0,
-            },
-            RentalPeriod.FOUR_HOURS.value: {
-                "count": 0,
-                "revenue": 0.0,
-                "average_daily": 0.0,
-            },
-            RentalPeriod.ONE_DAY.value: {
-                "count": 0,
-                "revenue": 0.0,
-                "average_daily": 0.0,
-            },
-            RentalPeriod.ONE_WEEK.value: {
-                "count": 0,
-                "revenue": 0.0,
-                "average_daily": 0.0,
-            },
+            period.value: {"count": 0, "revenue": 0.0, "average_daily": 0.0}
+            for period in RentalPeriod
         }
 
         # 汇总数据
@@ -297,7 +712,7 @@ class CRUDRevenueStats(CRUDBase[RevenueStats, RevenueStatsCreate, dict]):
             )
 
         # 创建汇总结果
-        summary = RevenueSummary(
+        return RevenueSummary(
             start_date=start_date,
             end_date=end_date,
             total_revenue=total_revenue,
@@ -307,8 +722,6 @@ class CRUDRevenueStats(CRUDBase[RevenueStats, RevenueStatsCreate, dict]):
             daily_stats=daily_data,
         )
 
-        return summary
-
 
 # 创建CRUD实例
 revenue_stats = CRUDRevenueStats(RevenueStats)
@@ -1,27 +1,222 @@
-from typing import List
+from typing import Any, Dict, Iterable, List, NamedTuple, Sequence, Union
 
+from sqlalchemy import func, insert, select, update
 from sqlalchemy.orm import Session
 
+from app.core.spatial import scooter_index
 from app.crud.base import CRUDBase
+from app.db.session import after_commit
 from app.models.scooter import Scooter
-from app.schemas.scooter import ScooterCreate, ScooterUpdate
+from app.models.scooter_change import (
+    TXID_DIALECTS,
+    ScooterChangeCounter,
+    ScooterRemoval,
+)
+from app.schemas.scooter import ScooterCreate, ScooterStatus, ScooterUpdate
+
+
+class ScooterChanges(NamedTuple):
+    version: int
+    # True 时 changed 是全部滑板车，客户端应替换整个列表
+    full: bool
+    changed: List[Scooter]
+    removed: List[int]
 
 
 class CRUDScooter(CRUDBase[Scooter, ScooterCreate, ScooterUpdate]):
     def get_multi(self, db: Session) -> List[Scooter]:
         return db.query(Scooter).all()
 
-    def create(self, db: Session, *, obj_in: ScooterCreate) -> Scooter:
-        db_obj = Scooter(
-            model=obj_in.model,
-            status=obj_in.status,
-            battery_level=obj_in.battery_level,
-            location={"lat": 0, "lng": 0} if not obj_in.location else obj_in.location,
+    def get_by_statuses(
+        self, db: Session, *, statuses: List[ScooterStatus]
+    ) -> List[Scooter]:
+        return (
+            db.query(Scooter)
+            .filter(Scooter.status.in_([status.value for status in statuses]))
+            .all()
+        )
+
+    # 增量同步：写入的行记录当前事务的变更序号（见 app.models.scooter_change）
+
+    def bump_version(self, db: Session) -> None:
+        """
+        为当前事务取得新的变更序号，必须在 INSERT/UPDATE 滑板车之前调用
+
+        PostgreSQL 直接使用事务ID，这里不执行任何语句，修改滑板车的事务之间不共享
+        任何锁；其他数据库把计数行加一（SQLite 的写事务本来就是串行的）。
+        """
+        if db.get_bind().dialect.name in TXID_DIALECTS:
+            return
+        db.execute(
+            update(ScooterChangeCounter)
+            .where(ScooterChangeCounter.id == 1)
+            .values(value=ScooterChangeCounter.value + 1)
         )
+
+    def committed_version(self, db: Session) -> int:
+        """
+        返回一个变更序号，不大于它的修改都已经提交（或回滚）
+
+        PostgreSQL 上事务ID的分配顺序和提交顺序不同，取当前快照中最早的仍在运行的
+        事务ID减一，这个水位会落后于正在进行的事务，但不会跳过它们的修改。
+        """
+        if db.get_bind().dialect.name in TXID_DIALECTS:
+            return db.scalar(
+                select(func.txid_snapshot_xmin(func.txid_current_snapshot()) - 1)
+            )
+        return db.scalar(
+            select(ScooterChangeCounter.value).where(ScooterChangeCounter.id == 1)
+        )
+
+    def _record_removed(self, db: Session, ids: Sequence[int]) -> None:
+        if ids:
+            db.execute(insert(ScooterRemoval), [{"scooter_id": id} for id in ids])
+
+    def get_changes(self, db: Session, *, since: int) -> ScooterChanges:
+        """
+        返回 version 大于 since 的滑板车、之后删除的滑板车ID和当前的变更序号
+
+        先读取已提交的变更序号（committed_version），再只查询不超过它的修改，之后
+        提交的修改留给下一次同步。since 为0或大于当前序号（例如数据库重建）时返回全部滑板车。
+        """
+        version = self.committed_version(db)
+        full = since <= 0 or since > version
+        if full:
+            since = 0
+        changed = (
+            db.query(Scooter)
+            .filter(Scooter.version > since, Scooter.version <= version)
+            .order_by(Scooter.id)
+            .all()
+        )
+        removed = set()
+        if not full:
+            removed = set(
+                db.scalars(
+                    select(ScooterRemoval.scooter_id).where(
+                        ScooterRemoval.version > since,
+                        ScooterRemoval.version <= version,
+                    )
+                )
+            )
+            # SQLite 可能复用已删除的ID，重新创建的滑板车只出现在 changed 中
+            removed.difference_update(obj.id for obj in changed)
+        return ScooterChanges(version, full, changed, sorted(removed))
+
+    def _create_values(self, obj_in: ScooterCreate) -> Dict[str, Any]:
+        return {
+            "model": obj_in.model,
+            "status": obj_in.status,
+            "battery_level": obj_in.battery_level,
+            "location": (
+                {"lat": 0, "lng": 0} if not obj_in.location else obj_in.location
+            ),
+        }
+
+    # 写入提交后同步空间索引（位置和状态）
+
+    def _sync_index(self, db: Session, db_objs: Iterable[Scooter]) -> None:
+        points = [(obj.id, obj.location, obj.status) for obj in db_objs]
+
+        def apply() -> None:
+            for point in points:
+                scooter_index.upsert(*point)
+
+        after_commit(db, apply)
+
+    def create(self, db: Session, *, obj_in: ScooterCreate) -> Scooter:
+        self.bump_version(db)
+        db_obj = Scooter(**self._create_values(obj_in))
         db.add(db_obj)
+        db.flush()
+        self._sync_index(db, [db_obj])
         db.commit()
         db.refresh(db_obj)
         return db_obj
 
+    def update(
+        self,
+        db: Session,
+        *,
+        db_obj: Scooter,
+        obj_in: Union[ScooterUpdate, Dict[str, Any]],
+        commit: bool = True,
+    ) -> Scooter:
+        if isinstance(obj_in, dict):
+            update_data = obj_in
+        else:
+            update_data = obj_in.model_dump(exclude_unset=True)
+        if self._changed_values(db_obj, update_data):
+            self.bump_version(db)
+        db_obj = super().update(db, db_obj=db_obj, obj_in=update_data, commit=False)
+        self._sync_index(db, [db_obj])
+        if commit:
+            self._commit_loaded(db, db_obj)
+        return db_obj
+
+    def remove(self, db: Session, *, id: int) -> Scooter:
+        self.bump_version(db)
+        self._record_removed(db, [id])
+        after_commit(db, lambda: scooter_index.remove(id))
+        return super().remove(db, id=id)
+
+    def create_many(
+        self,
+        db: Session,
+        *,
+        objs_in: Sequence[ScooterCreate],
+        commit: bool = True,
+    ) -> List[Scooter]:
+        if objs_in:
+            self.bump_version(db)
+        db_objs = super().create_many(db, objs_in=objs_in, commit=False)
+        self._sync_index(db, db_objs)
+        if commit and db_objs:
+            return self._commit_and_reload(db, [obj.id for obj in db_objs])
+        return db_objs
+
+    def update_many(
+        self,
+        db: Session,
+        *,
+        objs_in: Sequence[Dict[str, Any]],
+        commit: bool = True,
+    ) -> List[Scooter]:
+        if any(len(obj_in) > 1 for obj_in in objs_in):
+            self.bump_version(db)
+        db_objs = super().update_many(db, objs_in=objs_in, commit=False)
+        self._sync_index(db, db_objs)
+        if commit and db_objs:
+            return self._commit_and_reload(db, [obj.id for obj in db_objs])
+        return db_objs
+
+    def remove_many(
+        self, db: Session, *, ids: Iterable[int], commit: bool = True
+    ) -> List[int]:
+        deleted = super().remove_many(db, ids=ids, commit=False)
+        if deleted:
+            self.bump_version(db)
+            self._record_removed(db, deleted)
+        after_commit(db, lambda: scooter_index.remove_many(deleted))
+        if commit:
+            db.commit()
+        return deleted
+
+    def update_scooter_status(
+        self,
+        db: Session,
+        *,
+        scooter_id: int,
+        status: ScooterStatus,
+        commit: bool = True,
+    ) -> None:
+        self.bump_version(db)
+        db.query(Scooter).filter(Scooter.id == scooter_id).update(
+            {Scooter.status: status}
+        )
+        after_commit(db, lambda: scooter_index.set_status(scooter_id, status))
+        if commit:
+            db.commit()
+
 
 scooter = CRUDScooter(Scooter)
@@ -1,6 +1,10 @@
+from typing import Any, Dict, Iterable, List, Sequence, Union
+
 from sqlalchemy.orm import Session
 
+from app.core.pricing import pricing_cache
 from app.crud.base import CRUDBase
+from app.db.session import after_commit
 from app.models.scooter_price import ScooterPrice
 from app.schemas.scooter_price import ScooterPriceCreate, ScooterPriceUpdate
 
@@ -9,5 +13,62 @@ class CRUDScooterPrice(CRUDBase[ScooterPrice, ScooterPriceCreate, ScooterPriceUp
     def get_by_model(self, db: Session, *, model: str) -> ScooterPrice | None:
         return db.query(ScooterPrice).filter(ScooterPrice.model == model).first()
 
+    def get_by_models(
+        self, db: Session, *, models: Iterable[str]
+    ) -> List[ScooterPrice]:
+        models = list(set(models))
+        if not models:
+            return []
+        return db.query(ScooterPrice).filter(ScooterPrice.model.in_(models)).all()
+
+    # 价格修改提交后使定价缓存失效，回滚时不影响缓存
+
+    def create(
+        self, db: Session, *, obj_in: ScooterPriceCreate, commit: bool = True
+    ) -> ScooterPrice:
+        after_commit(db, pricing_cache.bump)
+        return super().create(db, obj_in=obj_in, commit=commit)
+
+    def update(
+        self,
+        db: Session,
+        *,
+        db_obj: ScooterPrice,
+        obj_in: Union[ScooterPriceUpdate, Dict[str, Any]],
+        commit: bool = True,
+    ) -> ScooterPrice:
+        after_commit(db, pricing_cache.bump)
+        return super().update(db, db_obj=db_obj, obj_in=obj_in, commit=commit)
+
+    def remove(self, db: Session, *, id: int) -> ScooterPrice:
+        after_commit(db, pricing_cache.bump)
+        return super().remove(db, id=id)
+
+    def create_many(
+        self,
+        db: Session,
+        *,
+        objs_in: Sequence[ScooterPriceCreate],
+        commit: bool = True,
+    ) -> List[ScooterPrice]:
+        after_commit(db, pricing_cache.bump)
+        return super().create_many(db, objs_in=objs_in, commit=commit)
+
+    def update_many(
+        self,
+        db: Session,
+        *,
+        objs_in: Sequence[Dict[str, Any]],
+        commit: bool = True,
+    ) -> List[ScooterPrice]:
+        after_commit(db, pricing_cache.bump)
+        return super().update_many(db, objs_in=objs_in, commit=commit)
+
+    def remove_many(
+        self, db: Session, *, ids: Iterable[int], commit: bool = True
+    ) -> List[int]:
+        after_commit(db, pricing_cache.bump)
+        return super().remove_many(db, ids=ids, commit=commit)
+
 
 scooter_price = CRUDScooterPrice(ScooterPrice)
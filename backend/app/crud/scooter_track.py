@@ -0,0 +1,152 @@
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Sequence
+
+from sqlalchemy import case, delete, func, insert, or_, select, tuple_
+from sqlalchemy.orm import Session
+
+from app.core.track import (
+    DOWNSAMPLE_POLICY,
+    TrackPoints,
+    between,
+    concat,
+    decode,
+    downsample,
+    encode,
+    split_days,
+    target_resolution,
+    to_datetime,
+    to_ms,
+)
+from app.crud.base import CRUDBase
+from app.models.scooter import Scooter
+from app.models.scooter_track import ScooterTrackBlock
+
+# 每条查询的 IN 列表长度和整理时每个事务处理的 (滑板车, 日期) 数量
+BATCH_SIZE = 1000
+
+
+def batches(items: Sequence, size: int = BATCH_SIZE) -> Iterator[Sequence]:
+    for i in range(0, len(items), size):
+        yield items[i : i + size]
+
+
+class CRUDScooterTrack(CRUDBase[ScooterTrackBlock, dict, dict]):
+    @staticmethod
+    def _block_values(
+        scooter_id: int, day: date, points: TrackPoints, resolution: int
+    ) -> dict:
+        return {
+            "scooter_id": scooter_id,
+            "day": day,
+            "resolution": resolution,
+            "start_time": to_datetime(int(points.ts[0])),
+            "end_time": to_datetime(int(points.ts[-1])),
+            "point_count": points.size,
+            "data": encode(points),
+        }
+
+    def append(self, db: Session, tracks: Dict[int, TrackPoints]) -> int:
+        """把每辆车新收到的轨迹按日期写为新的块，忽略不存在的滑板车，返回写入的块数"""
+        ids = list(tracks)
+        existing = set()
+        for batch in batches(ids):
+            existing.update(db.scalars(select(Scooter.id).where(Scooter.id.in_(batch))))
+        rows = [
+            self._block_values(scooter_id, day, points, 0)
+            for scooter_id in ids
+            if scooter_id in existing
+            for day, points in split_days(tracks[scooter_id])
+        ]
+        if rows:
+            db.execute(insert(ScooterTrackBlock), rows)
+        db.commit()
+        return len(rows)
+
+    def get_track(
+        self, db: Session, *, scooter_id: int, start: datetime, end: datetime
+    ) -> TrackPoints:
+        """读取 [start, end] 内的轨迹，只加载时间范围有重叠的块"""
+        blocks = db.scalars(
+            select(ScooterTrackBlock.data).where(
+                ScooterTrackBlock.scooter_id == scooter_id,
+                ScooterTrackBlock.day.between(start.date(), end.date()),
+                ScooterTrackBlock.start_time <= end,
+                ScooterTrackBlock.end_time >= start,
+            )
+        )
+        points = concat(decode(data) for data in blocks)
+        return between(points, to_ms(start), to_ms(end))
+
+    def compact(self, db: Session, *, today: Optional[date] = None) -> Dict[str, int]:
+        """
+        合并同一天的多个块，并按 DOWNSAMPLE_POLICY 对较早的数据降采样
+
+        只处理有多个块、或采样间隔小于保留策略要求的 (滑板车, 日期)。多个进程同时整理
+        同一天时，删除的行数与读取的不一致，该批次回滚，留给下次整理。
+        """
+        today = today or date.today()
+        target = case(
+            *[
+                (ScooterTrackBlock.day <= today - timedelta(days=days), interval)
+                for days, interval in reversed(DOWNSAMPLE_POLICY)
+            ],
+            else_=0,
+        )
+        groups = db.execute(
+            select(ScooterTrackBlock.scooter_id, ScooterTrackBlock.day)
+            .group_by(ScooterTrackBlock.scooter_id, ScooterTrackBlock.day)
+            .having(
+                or_(
+                    func.count(ScooterTrackBlock.id) > 1,
+                    func.min(ScooterTrackBlock.resolution) < func.max(target),
+                )
+            )
+        ).all()
+
+        compacted = skipped = 0
+        for batch in batches(groups):
+            blocks = db.execute(
+                select(
+                    ScooterTrackBlock.id,
+                    ScooterTrackBlock.scooter_id,
+                    ScooterTrackBlock.day,
+                    ScooterTrackBlock.resolution,
+                    ScooterTrackBlock.data,
+                ).where(
+                    tuple_(ScooterTrackBlock.scooter_id, ScooterTrackBlock.day).in_(
+                        [tuple(group) for group in batch]
+                    )
+                )
+            ).all()
+            by_group: Dict[tuple, List] = {}
+            for block in blocks:
+                by_group.setdefault((block.scooter_id, block.day), []).append(block)
+
+            ids = [block.id for block in blocks]
+            rows = []
+            for (scooter_id, day), group in by_group.items():
+                resolution = max(
+                    target_resolution(day, today),
+                    max(block.resolution for block in group),
+                )
+                points = downsample(
+                    concat(decode(block.data) for block in group), resolution
+                )
+                rows.append(self._block_values(scooter_id, day, points, resolution))
+
+            deleted = 0
+            for id_batch in batches(ids):
+                deleted += db.execute(
+                    delete(ScooterTrackBlock).where(ScooterTrackBlock.id.in_(id_batch))
+                ).rowcount
+            if deleted != len(ids):
+                db.rollback()
+                skipped += len(by_group)
+                continue
+            db.execute(insert(ScooterTrackBlock), rows)
+            db.commit()
+            compacted += len(by_group)
+        return {"compacted_days": compacted, "skipped_days": skipped}
+
+
+scooter_track = CRUDScooterTrack(ScooterTrackBlock)
@@ -2,8 +2,10 @@ from typing import Any, Dict, Optional, Union
 from fastapi import HTTPException
 from sqlalchemy.orm import Session
 
+from app.core.auth_cache import auth_cache
 from app.core.security import get_password_hash, verify_password
 from app.crud.base import CRUDBase
+from app.db.session import after_commit
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate
 
@@ -43,8 +45,15 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
             hashed_password = get_password_hash(update_data["password"])
             del update_data["password"]
             update_data["hashed_password"] = hashed_password
+        # 用户信息（包括密码）修改后，已缓存的令牌需要重新验证
+        user_id = db_obj.id
+        after_commit(db, lambda: auth_cache.invalidate_user(user_id))
         return super().update(db, db_obj=db_obj, obj_in=update_data)
 
+    def remove(self, db: Session, *, id: int) -> User:
+        after_commit(db, lambda: auth_cache.invalidate_user(id))
+        return super().remove(db, id=id)
+
     def authenticate(self, db: Session, *, email: str, password: str) -> Optional[User]:
         user = self.get_by_email(db, email=email)
         if not user:
@@ -1,17 +1,80 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import declarative_base, sessionmaker
+from functools import lru_cache
+from typing import Callable
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, declarative_base, sessionmaker
 
 from app.core.config import settings
 
+# 同步驱动到异步驱动的映射，例如 postgresql:// -> postgresql+asyncpg://
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def get_async_database_url(database_url: str) -> str:
+    """将同步数据库URL转换为对应的异步驱动URL"""
+    url = make_url(database_url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for database backend: {backend}")
+    return url.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(
+        hide_password=False
+    )
+
+
 engine = create_engine(settings.DATABASE_URL, pool_pre_ping=True)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+
+@lru_cache(maxsize=None)
+def get_async_sessionmaker() -> async_sessionmaker[AsyncSession]:
+    """首次使用时才创建异步引擎，没有异步驱动的数据库只影响异步接口，不影响导入"""
+    async_engine = create_async_engine(
+        get_async_database_url(settings.DATABASE_URL), pool_pre_ping=True
+    )
+    return async_sessionmaker(
+        bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+    )
+
+
 Base = declarative_base()
 
 
+def after_commit(db: Session, func: Callable[[], None]) -> None:
+    """在会话当前事务提交后执行 func，最外层事务回滚时丢弃（保存点回滚不影响）
+
+    用于清除缓存、同步内存索引等只应在数据真正写入后执行的操作。func 中不能再
+    访问数据库，需要的值应在注册时取出。
+    """
+    db.info.setdefault("after_commit", []).append(func)
+
+
+@event.listens_for(Session, "after_commit")
+def _run_after_commit(session: Session) -> None:
+    for func in session.info.pop("after_commit", []):
+        func()
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _discard_after_commit(session: Session, transaction) -> None:
+    # 保存点回滚时外层事务仍可能提交，只在最外层事务结束时丢弃；提交时回调已被
+    # _run_after_commit 取出
+    if transaction.parent is None:
+        session.info.pop("after_commit", None)
+
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with get_async_sessionmaker()() as db:
+        yield db
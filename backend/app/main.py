@@ -1,12 +1,69 @@
+from contextlib import asynccontextmanager
+
 import uvicorn
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.core.config import settings
+from app.core.metrics import MetricsMiddleware, metrics_response
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app.core.query_stats import (
+    QUERY_COUNT_HEADER,
+    QUERY_TIME_HEADER,
+    QueryStatsMiddleware,
+)
+from app.core.scheduler import Scheduler
+from app.core.tasks import (
+    compact_tracks,
+    expire_rentals,
+    flush_telemetry,
+    flush_tracks,
+    refresh_availability,
+    refresh_scooter_index,
+)
 from app.api.v1.api import api_router
 
+scheduler = Scheduler()
+scheduler.add("expire_rentals", expire_rentals, settings.RENTAL_EXPIRY_INTERVAL_SECONDS)
+scheduler.add(
+    "refresh_availability",
+    refresh_availability,
+    settings.AVAILABILITY_REFRESH_INTERVAL_SECONDS,
+    run_at_start=True,
+)
+scheduler.add(
+    "refresh_scooter_index",
+    refresh_scooter_index,
+    settings.SCOOTER_INDEX_REFRESH_INTERVAL_SECONDS,
+    run_at_start=True,
+)
+scheduler.add(
+    "flush_telemetry",
+    flush_telemetry,
+    settings.TELEMETRY_FLUSH_INTERVAL_SECONDS,
+    run_at_stop=True,
+)
+scheduler.add(
+    "flush_tracks",
+    flush_tracks,
+    settings.TRACK_FLUSH_INTERVAL_SECONDS,
+    run_at_stop=True,
+)
+scheduler.add("compact_tracks", compact_tracks, settings.TRACK_COMPACT_INTERVAL_SECONDS)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await scheduler.run_startup()
+    scheduler.start()
+    yield
+    await scheduler.stop()
+
+
 app = FastAPI(
-    title=settings.PROJECT_NAME, openapi_url=f"{settings.API_V1_STR}/openapi.json"
+    title=settings.PROJECT_NAME,
+    openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    lifespan=lifespan,
 )
 
 # Set all CORS enabled origins
@@ -17,8 +74,16 @@ if settings.BACKEND_CORS_ORIGINS:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=[NEXT_CURSOR_HEADER, QUERY_COUNT_HEADER, QUERY_TIME_HEADER],
     )
 
+app.add_middleware(
+    QueryStatsMiddleware,
+    threshold=settings.N_PLUS_ONE_THRESHOLD,
+    expose_headers=settings.DEBUG,
+)
+app.add_middleware(MetricsMiddleware)
+
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
 
@@ -27,5 +92,10 @@ async def root():
     return {"message": "Welcome to Electric Scooter Rental Platform API"}
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return metrics_response()
+
+
 if __name__ == "__main__":
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
@@ -5,10 +5,12 @@ from app.models.rental_config import RentalConfig
 from app.models.payment_card import PaymentCard
 from app.models.payment import Payment, PaymentStatus, PaymentMethod
 from app.models.feedback import Feedback, FeedbackPriority, FeedbackStatus, FeedbackType
-from app.models.revenue_stats import RevenueStats
+from app.models.revenue_stats import RevenueStats, RevenueRollup
 from app.models.scooter_price import ScooterPrice
 from app.models.llm import Conversation, Message
 from app.models.no_parking_zone import NoParkingZone
+from app.models.scooter_track import ScooterTrackBlock
+from app.models.scooter_change import ScooterChangeCounter, ScooterRemoval
 
 __all__ = [
     "User",
@@ -19,6 +21,7 @@ __all__ = [
     "FeedbackStatus",
     "FeedbackType",
     "RevenueStats",
+    "RevenueRollup",
     "Payment",
     "PaymentStatus",
     "PaymentMethod",
@@ -28,5 +31,8 @@ __all__ = [
     "Conversation",
     "Message",
     "NoParkingZone",
+    "ScooterTrackBlock",
+    "ScooterChangeCounter",
+    "ScooterRemoval",
 ]
 # This file is intentionally left empty to mark the directory as a Python package.
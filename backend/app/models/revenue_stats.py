@@ -1,4 +1,13 @@
-from sqlalchemy import Column, Integer, Float, Date, JSON
+from sqlalchemy import (
+    Column,
+    Integer,
+    Float,
+    Date,
+    DateTime,
+    JSON,
+    String,
+    UniqueConstraint,
+)
 from datetime import datetime
 from app.db.session import Base
 
@@ -19,3 +28,19 @@ class RevenueStats(Base):
 
     # 创建日期（用于记录该统计记录的创建时间）
     created_at = Column(Date, nullable=False, default=datetime.utcnow)
+
+
+class RevenueRollup(Base):
+    """按小时、ISO周、自然月汇总的收入统计，每日数据仍保存在 RevenueStats 中"""
+
+    __tablename__ = "revenue_rollups"
+    __table_args__ = (UniqueConstraint("granularity", "bucket_start"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    granularity = Column(String(10), nullable=False)  # hour / week / month
+    bucket_start = Column(DateTime, nullable=False)  # 统计区间的开始时间
+    total_revenue = Column(Float, nullable=False, default=0.0)  # 总收入
+    rental_count = Column(Integer, nullable=False, default=0)  # 租赁订单总数
+
+    # 按租赁时长分类的收入数据，格式与 RevenueStats.revenue_by_period 相同
+    revenue_by_period = Column(JSON, nullable=False, default={})
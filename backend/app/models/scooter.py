@@ -1,7 +1,8 @@
-from sqlalchemy import Column, Integer, String, JSON, Enum
+from sqlalchemy import BigInteger, Column, Integer, String, JSON, Enum
 from sqlalchemy.orm import relationship
 
 from app.db.session import Base
+from app.models.scooter_change import current_change_version
 from app.schemas.scooter import ScooterStatus
 
 
@@ -14,6 +15,14 @@ class Scooter(Base):
     status = Column(String, index=True)  # available, in_use, maintenance, etc.
     battery_level = Column(Integer)  # percentage
     location = Column(JSON)  # JSON with lat and lng
+    # 最后一次修改时的变更序号，写入前需要先调用 crud.scooter.bump_version
+    version = Column(
+        BigInteger,
+        nullable=False,
+        index=True,
+        default=current_change_version(),
+        onupdate=current_change_version(),
+    )
 
     # Relationships
     rentals = relationship("Rental", back_populates="scooter")
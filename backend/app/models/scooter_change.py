@@ -0,0 +1,66 @@
+from sqlalchemy import DDL, BigInteger, Column, Integer, event, select
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+
+from app.db.session import Base
+
+# 用事务ID作为变更序号的数据库，不需要变更计数
+TXID_DIALECTS = {"postgresql"}
+
+
+class ScooterChangeCounter(Base):
+    """不支持事务ID的数据库（SQLite 等）使用的变更序号，只有一行
+
+    每个修改滑板车的事务先把 value 加一，写入的行的 version 取这个值。SQLite 同一
+    时间只有一个写事务，计数行不会增加额外的等待。
+    """
+
+    __tablename__ = "scooter_change_counter"
+
+    id = Column(Integer, primary_key=True)
+    value = Column(BigInteger, nullable=False, default=0)
+
+
+event.listen(
+    ScooterChangeCounter.__table__,
+    "after_create",
+    DDL("INSERT INTO scooter_change_counter (id, value) VALUES (1, 0)"),
+)
+
+
+class current_change_version(FunctionElement):
+    """当前事务的变更序号，用作 Scooter.version 等列的默认值和更新值
+
+    PostgreSQL 使用当前事务ID，不需要任何共享的计数行；其他数据库读取
+    ScooterChangeCounter。
+    """
+
+    type = BigInteger()
+    inherit_cache = True
+
+
+@compiles(current_change_version)
+def _compile_counter(element, compiler, **kw):
+    counter = (
+        select(ScooterChangeCounter.value)
+        .where(ScooterChangeCounter.id == 1)
+        .scalar_subquery()
+    )
+    return compiler.process(counter, **kw)
+
+
+@compiles(current_change_version, "postgresql")
+def _compile_txid(element, compiler, **kw):
+    return "txid_current()"
+
+
+class ScooterRemoval(Base):
+    """已删除的滑板车，增量同步时通知客户端移除"""
+
+    __tablename__ = "scooter_removals"
+
+    id = Column(Integer, primary_key=True, index=True)
+    scooter_id = Column(Integer, nullable=False)
+    version = Column(
+        BigInteger, nullable=False, index=True, default=current_change_version()
+    )
@@ -0,0 +1,36 @@
+from sqlalchemy import (
+    Column,
+    Date,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    LargeBinary,
+)
+
+from app.db.session import Base
+
+
+class ScooterTrackBlock(Base):
+    """一辆滑板车在一天内的一段位置轨迹，data 为压缩的数组（格式见 app.core.track）
+
+    当天的轨迹按写入间隔分为多个块，整理任务把同一天的块合并为一个，并按保留策略
+    对较早的数据降采样。
+    """
+
+    __tablename__ = "scooter_track_blocks"
+    __table_args__ = (
+        Index("ix_scooter_track_blocks_scooter_day", "scooter_id", "day"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    scooter_id = Column(
+        Integer, ForeignKey("scooters.id", ondelete="CASCADE"), nullable=False
+    )
+    day = Column(Date, nullable=False)  # 本地日期
+    # 采样间隔（秒），0 为原始数据
+    resolution = Column(Integer, nullable=False, default=0)
+    start_time = Column(DateTime, nullable=False)  # 第一个点的时间
+    end_time = Column(DateTime, nullable=False)  # 最后一个点的时间
+    point_count = Column(Integer, nullable=False)
+    data = Column(LargeBinary, nullable=False)
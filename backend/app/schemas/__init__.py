@@ -2,7 +2,7 @@
 from .token import Token, TokenPayload
 from .user import User, UserCreate, UserUpdate, UserInDB
 from .scooter import Scooter, ScooterCreate, ScooterUpdate, Coordinates
-from .rental import Rental, RentalCreate, RentalUpdate
+from .rental import Rental, RentalCreate, RentalUpdate, RentalQuote, RentalQuoteRequest
 from .rental_config import RentalConfig, RentalConfigCreate, RentalConfigUpdate
 from .payment_card import PaymentCard, PaymentCardCreate, PaymentCardUpdate
 from .payment import (
@@ -28,8 +28,17 @@ from .revenue_stats import (
     RevenuePeriodStats,
     RevenueStatsCreate,
     RevenuePeriodData,
+    RevenueGranularity,
+    RevenueSeries,
+    RevenueSeriesPoint,
+)
+from .scooter_price import (
+    ScooterPrice,
+    ScooterPriceCreate,
+    ScooterPriceUpdate,
+    ScooterPriceBatchCreate,
+    ScooterPriceBatchUpdate,
 )
-from .scooter_price import ScooterPrice, ScooterPriceCreate, ScooterPriceUpdate
 from .llm import (
     LLMRequest,
     LLMResponse,
@@ -39,6 +48,19 @@ from .llm import (
     MessageResponse,
 )
 from .no_parking_zone import NoParkingZone, NoParkingZoneCreate, NoParkingZoneUpdate
+from .telemetry import (
+    TelemetryReading,
+    TelemetryBatch,
+    TelemetryAck,
+    TrackPoint,
+    ScooterTrack,
+)
+from .analytics import (
+    ScooterUtilisation,
+    ModelRevenue,
+    DemandHeatmap,
+    PeriodDuration,
+)
 
 __all__ = [
     "User",
@@ -56,4 +78,9 @@ __all__ = [
     "NoParkingZone",
     "NoParkingZoneCreate",
     "NoParkingZoneUpdate",
+    "TelemetryReading",
+    "TelemetryBatch",
+    "TelemetryAck",
+    "TrackPoint",
+    "ScooterTrack",
 ]
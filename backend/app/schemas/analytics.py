@@ -0,0 +1,36 @@
+from typing import List
+
+from pydantic import BaseModel, Field
+
+
+class ScooterUtilisation(BaseModel):
+    """单辆滑板车的利用率"""
+
+    scooter_id: int = Field(..., description="滑板车ID")
+    model: str = Field(..., description="滑板车型号")
+    busy_hours: float = Field(..., description="统计范围内处于租赁中的小时数")
+    utilisation: float = Field(..., description="处于租赁中的时间占比")
+
+
+class ModelRevenue(BaseModel):
+    """单个滑板车型号的收入"""
+
+    model: str = Field(..., description="滑板车型号")
+    rental_count: int = Field(..., description="租赁订单数量")
+    revenue: float = Field(..., description="已完成支付的收入")
+
+
+class DemandHeatmap(BaseModel):
+    """按星期和小时统计的租赁需求"""
+
+    counts: List[List[int]] = Field(
+        ..., description="7x24 矩阵，行是周一到周日，列是 0-23 点开始的租赁数"
+    )
+
+
+class PeriodDuration(BaseModel):
+    """单个预订时长的实际骑行时长"""
+
+    rental_period: str = Field(..., description="预订的租赁时长")
+    rental_count: int = Field(..., description="已结束的租赁订单数量")
+    average_hours: float = Field(..., description="平均实际骑行时长（小时）")
@@ -24,6 +24,20 @@ class NoParkingZoneUpdate(BaseModel):
     coordinates: Optional[List[Coordinate]] = None
 
 
+class NoParkingZoneBatchCreate(BaseModel):
+    items: List[NoParkingZoneCreate] = Field(..., min_length=1, max_length=1000)
+
+
+class NoParkingZoneBatchUpdateItem(NoParkingZoneUpdate):
+    id: int
+
+
+class NoParkingZoneBatchUpdate(BaseModel):
+    items: List[NoParkingZoneBatchUpdateItem] = Field(
+        ..., min_length=1, max_length=1000
+    )
+
+
 class NoParkingZone(NoParkingZoneBase):
     id: int
     created_at: datetime
@@ -1,7 +1,7 @@
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 from enum import Enum
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field, model_validator
 
 
 class RentalPeriod(str, Enum):
@@ -54,3 +54,31 @@ class Rental(RentalInDBBase):
 # Additional properties stored in DB
 class RentalInDB(RentalInDBBase):
     pass
+
+
+# 批量询价，每一项按滑板车ID或型号询价，按当前用户计算折扣；user_id 只能为空或当前用户
+class RentalQuoteItem(BaseModel):
+    scooter_id: Optional[int] = None
+    model: Optional[str] = None
+    rental_period: RentalPeriod
+    user_id: Optional[int] = None
+
+    @model_validator(mode="after")
+    def check_scooter_or_model(self):
+        if self.scooter_id is None and self.model is None:
+            raise ValueError("Either scooter_id or model is required")
+        return self
+
+
+class RentalQuoteRequest(BaseModel):
+    items: List[RentalQuoteItem] = Field(..., min_length=1, max_length=1000)
+
+
+class RentalQuote(BaseModel):
+    scooter_id: Optional[int] = None
+    model: str
+    rental_period: RentalPeriod
+    user_id: int
+    discount: float
+    discount_type: str
+    cost: float
@@ -1,8 +1,18 @@
 from typing import Dict, Optional, List, Any
 from datetime import date, datetime
+from enum import Enum
 from pydantic import BaseModel, Field, field_validator
 
 
+class RevenueGranularity(str, Enum):
+    """收入时间序列的统计粒度"""
+
+    HOUR = "hour"
+    DAY = "day"
+    WEEK = "week"  # ISO周，从周一开始
+    MONTH = "month"
+
+
 class RevenuePeriodStats(BaseModel):
     """按租赁时长分类的收入统计"""
 
@@ -81,6 +91,28 @@ class RevenueSummary(BaseModel):
     daily_stats: List[Dict[str, Any]] = Field(..., description="每日收入统计数据")
 
 
+class RevenueSeriesPoint(BaseModel):
+    """收入时间序列中的一个统计区间"""
+
+    bucket_start: datetime = Field(..., description="统计区间开始时间")
+    total_revenue: float = Field(..., description="总收入")
+    rental_count: int = Field(..., description="租赁订单总数")
+    revenue_by_period: Dict[str, RevenuePeriodData] = Field(
+        default_factory=dict, description="按租赁时长分类的收入数据"
+    )
+
+
+class RevenueSeries(BaseModel):
+    """按指定粒度统计的收入时间序列"""
+
+    granularity: RevenueGranularity = Field(..., description="统计粒度")
+    start_date: date = Field(..., description="统计开始日期")
+    end_date: date = Field(..., description="统计结束日期")
+    total_revenue: float = Field(..., description="总收入")
+    total_rentals: int = Field(..., description="总租赁订单数")
+    points: List[RevenueSeriesPoint] = Field(..., description="各统计区间的收入数据")
+
+
 class RevenueQueryParams(BaseModel):
     """收入查询参数模型"""
 
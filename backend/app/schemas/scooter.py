@@ -1,6 +1,6 @@
-from typing import Optional
+from typing import List, Optional
 
-from pydantic import BaseModel, ConfigDict, validator
+from pydantic import BaseModel, ConfigDict, Field, validator
 
 from enum import Enum
 
@@ -44,6 +44,19 @@ class ScooterUpdate(ScooterBase):
     pass
 
 
+# Batch operations
+class ScooterBatchCreate(BaseModel):
+    items: List[ScooterCreate] = Field(..., min_length=1, max_length=1000)
+
+
+class ScooterBatchUpdateItem(ScooterUpdate):
+    id: int
+
+
+class ScooterBatchUpdate(BaseModel):
+    items: List[ScooterBatchUpdateItem] = Field(..., min_length=1, max_length=1000)
+
+
 class ScooterInDBBase(ScooterBase):
     id: Optional[int] = None
     model_config = ConfigDict(from_attributes=True)
@@ -54,6 +67,30 @@ class Scooter(ScooterInDBBase):
     pass
 
 
+# Result of a nearby query, distance in meters from the query point
+class ScooterNearby(Scooter):
+    distance: float
+
+
+# Aggregate of the scooters in one map cell, located at their centroid
+class ScooterCluster(BaseModel):
+    lat: float
+    lng: float
+    count: int
+    available: int
+    model_config = ConfigDict(from_attributes=True)
+
+
+# Scooters changed since a sync version; pass version as `since` on the next poll.
+# When full is true, changed holds the whole fleet and replaces the client's list.
+class ScooterChanges(BaseModel):
+    version: int
+    full: bool
+    changed: List[Scooter]
+    removed: List[int]
+    model_config = ConfigDict(from_attributes=True)
+
+
 # Additional properties stored in DB
 class ScooterInDB(ScooterInDBBase):
     pass
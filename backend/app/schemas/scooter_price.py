@@ -1,3 +1,5 @@
+from typing import List
+
 from pydantic import BaseModel, Field
 
 
@@ -18,6 +20,19 @@ class ScooterPriceUpdate(ScooterPriceBase):
     pass
 
 
+# Batch operations
+class ScooterPriceBatchCreate(BaseModel):
+    items: List[ScooterPriceCreate] = Field(..., min_length=1, max_length=1000)
+
+
+class ScooterPriceBatchUpdateItem(ScooterPriceUpdate):
+    id: int
+
+
+class ScooterPriceBatchUpdate(BaseModel):
+    items: List[ScooterPriceBatchUpdateItem] = Field(..., min_length=1, max_length=1000)
+
+
 # Properties shared by models stored in DB
 class ScooterPriceInDBBase(ScooterPriceBase):
     id: int
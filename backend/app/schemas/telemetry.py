@@ -0,0 +1,38 @@
+from datetime import datetime
+from typing import List
+
+from pydantic import BaseModel, Field
+
+
+class TelemetryReading(BaseModel):
+    scooter_id: int
+    ts: datetime
+    lat: float = Field(..., ge=-90, le=90)
+    lng: float = Field(..., ge=-180, le=180)
+    battery: int = Field(..., ge=0, le=100)  # percentage
+
+
+class TelemetryBatch(BaseModel):
+    items: List[TelemetryReading] = Field(..., min_length=1, max_length=5000)
+
+
+class TelemetryAck(BaseModel):
+    # readings kept for the next flush; readings older than the latest known one,
+    # too old, or ahead of server time are dropped
+    accepted: int
+    # scooters waiting to be written
+    buffered: int
+
+
+class TrackPoint(BaseModel):
+    ts: datetime
+    lat: float
+    lng: float
+    battery: int
+
+
+class ScooterTrack(BaseModel):
+    scooter_id: int
+    # seconds between returned points, 0 means every stored point
+    resolution: int
+    points: List[TrackPoint]
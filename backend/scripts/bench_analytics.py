@@ -0,0 +1,190 @@
+"""
+车队分析模块的基准测试：在合成的租赁数据上对比向量化计算与逐行计算
+
+用法:
+    python scripts/bench_analytics.py --rentals 1000000
+    python scripts/bench_analytics.py --rentals 200000 --with-db
+
+--with-db 会把合成数据写入内存 SQLite，再测量 load_fleet_columns 的读取时间。
+"""
+
+import argparse
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from app import analytics
+from app.db.session import Base
+from app.models.payment import Payment, PaymentMethod, PaymentStatus
+from app.models.rental import Rental
+from app.models.scooter import Scooter
+from app.schemas.rental import RentalPeriod, RentalStatus
+
+WINDOW_START = datetime(2025, 1, 1)
+WINDOW_END = datetime(2025, 4, 1)
+# 与 analytics.PERIODS 顺序一致
+PERIOD_HOURS = {"1hr": 1, "4hrs": 4, "1day": 24, "1week": 168}
+
+
+def synthetic_fleet(rentals: int, scooters: int, models: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    window_seconds = int((WINDOW_END - WINDOW_START).total_seconds())
+    period_index = rng.choice(
+        len(PERIOD_HOURS), size=rentals, p=[0.6, 0.25, 0.12, 0.03]
+    )
+    booked_hours = np.array(list(PERIOD_HOURS.values()))[period_index]
+    starts = np.datetime64(WINDOW_START, "s") + rng.integers(
+        0, window_seconds, size=rentals
+    ).astype("timedelta64[s]")
+    durations = (booked_hours * rng.uniform(0.5, 1.1, size=rentals) * 3600).astype(
+        "timedelta64[s]"
+    )
+    ends = starts + durations
+    # 约 1% 的租赁尚未结束
+    ends[rng.random(rentals) < 0.01] = np.datetime64("NaT")
+
+    return analytics.FleetColumns(
+        scooter_ids=np.arange(1, scooters + 1, dtype=np.int64),
+        scooter_models=np.array(
+            [f"Model {i % models}" for i in range(scooters)], dtype=object
+        ),
+        rental_scooter_ids=rng.integers(1, scooters + 1, size=rentals),
+        rental_starts=starts,
+        rental_ends=ends,
+        rental_period_codes=period_index.astype(np.int8),
+        rental_revenue=np.round(booked_hours * rng.uniform(8, 20, size=rentals), 2),
+    )
+
+
+def row_by_row(fleet: analytics.FleetColumns):
+    """逐行计算同样的指标，模拟遍历 ORM 对象的实现"""
+    model_of = dict(zip(fleet.scooter_ids.tolist(), fleet.scooter_models.tolist()))
+    busy = defaultdict(float)
+    revenue = defaultdict(float)
+    heatmap = [[0] * 24 for _ in range(7)]
+    durations = defaultdict(list)
+    rows = zip(
+        fleet.rental_scooter_ids.tolist(),
+        fleet.rental_starts.astype(object).tolist(),
+        fleet.rental_ends.astype(object).tolist(),
+        fleet.rental_period_codes.tolist(),
+        fleet.rental_revenue.tolist(),
+    )
+    for scooter_id, start, end, period, amount in rows:
+        finish = end or WINDOW_END
+        busy[scooter_id] += (
+            min(finish, WINDOW_END) - max(start, WINDOW_START)
+        ).total_seconds()
+        revenue[model_of[scooter_id]] += amount
+        heatmap[start.weekday()][start.hour] += 1
+        if end:
+            durations[period].append((end - start).total_seconds() / 3600)
+    return busy, revenue, heatmap, durations
+
+
+def vectorized(fleet: analytics.FleetColumns):
+    return (
+        analytics.scooter_utilisation(
+            fleet, start=WINDOW_START, end=WINDOW_END, now=WINDOW_END
+        ),
+        analytics.revenue_by_model(fleet, start=WINDOW_START, end=WINDOW_END),
+        analytics.demand_heatmap(fleet, start=WINDOW_START, end=WINDOW_END),
+        analytics.average_duration_by_period(fleet, start=WINDOW_START, end=WINDOW_END),
+    )
+
+
+def timed(label: str, func, *args):
+    started = time.perf_counter()
+    result = func(*args)
+    print(f"{label:<24} {time.perf_counter() - started:8.3f} s")
+    return result
+
+
+def load_from_db(fleet: analytics.FleetColumns) -> None:
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    with Session(engine) as db:
+        db.execute(
+            insert(Scooter),
+            [
+                {"id": int(scooter_id), "model": model, "status": "available"}
+                for scooter_id, model in zip(fleet.scooter_ids, fleet.scooter_models)
+            ],
+        )
+        starts = fleet.rental_starts.astype(object).tolist()
+        ends = fleet.rental_ends.astype(object).tolist()
+        db.execute(
+            insert(Rental),
+            [
+                {
+                    "id": i + 1,
+                    "user_id": 1,
+                    "scooter_id": int(fleet.rental_scooter_ids[i]),
+                    "start_time": starts[i],
+                    "end_time": ends[i],
+                    "status": RentalStatus.PAID,
+                    "rental_period": list(RentalPeriod)[fleet.rental_period_codes[i]],
+                }
+                for i in range(fleet.rental_count)
+            ],
+        )
+        db.execute(
+            insert(Payment),
+            [
+                {
+                    "user_id": 1,
+                    "rental_id": i + 1,
+                    "amount": float(fleet.rental_revenue[i]),
+                    "status": PaymentStatus.COMPLETED,
+                    "payment_method": PaymentMethod.CARD,
+                }
+                for i in range(fleet.rental_count)
+            ],
+        )
+        db.commit()
+
+        loaded = timed(
+            "load_fleet_columns",
+            lambda: analytics.load_fleet_columns(
+                db, start=WINDOW_START, end=WINDOW_END
+            ),
+        )
+        print(f"loaded {loaded.rental_count} rentals")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rentals", type=int, default=1_000_000)
+    parser.add_argument("--scooters", type=int, default=5_000)
+    parser.add_argument("--models", type=int, default=20)
+    parser.add_argument("--with-db", action="store_true")
+    args = parser.parse_args()
+
+    fleet = timed(
+        "generate",
+        synthetic_fleet,
+        args.rentals,
+        args.scooters,
+        args.models,
+    )
+    timed("vectorized", vectorized, fleet)
+    timed("row by row", row_by_row, fleet)
+    if args.with_db:
+        load_from_db(fleet)
+
+
+if __name__ == "__main__":
+    main()
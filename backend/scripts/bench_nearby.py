@@ -0,0 +1,104 @@
+"""
+测量滑板车空间索引的附近查询延迟，并与逐个计算距离的全量扫描对比
+
+用法:
+    python scripts/bench_nearby.py
+    python scripts/bench_nearby.py --scooters 200000 --extent-km 30 --cell-sizes 0.002 0.005 0.01
+
+滑板车随机分布在以北京为中心、边长 extent-km 的正方形内，一半为 available；
+查询点随机取在同一区域内。
+"""
+
+import argparse
+import math
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.core.spatial import METERS_PER_DEGREE, SpatialIndex
+
+LAT, LNG = 39.9, 116.4
+
+
+def random_point(rng: random.Random, extent_m: float) -> tuple:
+    north = rng.uniform(-extent_m / 2, extent_m / 2)
+    east = rng.uniform(-extent_m / 2, extent_m / 2)
+    return (
+        LAT + north / METERS_PER_DEGREE,
+        LNG + east / (METERS_PER_DEGREE * math.cos(math.radians(LAT))),
+    )
+
+
+def brute_force(points: dict, lat: float, lng: float, radius: float, k: int):
+    m_per_deg_lng = METERS_PER_DEGREE * math.cos(math.radians(lat))
+    hits = []
+    for scooter_id, (p_lat, p_lng, status) in points.items():
+        if status != "available":
+            continue
+        distance = math.hypot(
+            (p_lat - lat) * METERS_PER_DEGREE, (p_lng - lng) * m_per_deg_lng
+        )
+        if distance <= radius:
+            hits.append((distance, scooter_id))
+    return sorted(hits)[:k]
+
+
+def percentiles(samples: list) -> str:
+    samples = sorted(samples)
+    p50 = statistics.median(samples)
+    p99 = samples[int(len(samples) * 0.99)]
+    return f"p50 {p50 * 1e3:7.3f} ms  p99 {p99 * 1e3:7.3f} ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--scooters", type=int, default=100_000)
+    parser.add_argument("--extent-km", type=float, default=20)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--radius", type=float, default=500)
+    parser.add_argument("--k", type=int, default=20)
+    parser.add_argument(
+        "--cell-sizes", type=float, nargs="+", default=[0.002, 0.005, 0.01]
+    )
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    extent_m = args.extent_km * 1000
+    points = {
+        scooter_id: (
+            *random_point(rng, extent_m),
+            "available" if scooter_id % 2 else "in_use",
+        )
+        for scooter_id in range(args.scooters)
+    }
+    queries = [random_point(rng, extent_m) for _ in range(args.queries)]
+    print(
+        f"{args.scooters} scooters in {args.extent_km:g} km, "
+        f"radius {args.radius:g} m, k {args.k}"
+    )
+
+    for cell_size in args.cell_sizes:
+        index = SpatialIndex(cell_size=cell_size)
+        for scooter_id, (lat, lng, status) in points.items():
+            index.upsert(scooter_id, {"lat": lat, "lng": lng}, status)
+        samples = []
+        for lat, lng in queries:
+            started = time.perf_counter()
+            index.nearby(lat, lng, radius=args.radius, k=args.k, statuses=["available"])
+            samples.append(time.perf_counter() - started)
+        print(f"grid {cell_size:<7g}{percentiles(samples)}")
+
+    samples = []
+    for lat, lng in queries[:20]:
+        started = time.perf_counter()
+        brute_force(points, lat, lng, args.radius, args.k)
+        samples.append(time.perf_counter() - started)
+    print(f"{'scan':<12}{percentiles(samples)}")
+
+
+if __name__ == "__main__":
+    main()
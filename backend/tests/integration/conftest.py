@@ -4,6 +4,8 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 
+from app.core.availability import availability_index
+from app.core.spatial import scooter_index
 from app.db.session import Base
 from app.main import app
 from app.api.deps import get_db
@@ -40,5 +42,8 @@ def client(db):
 
     app.dependency_overrides[get_db] = override_get_db
     with TestClient(app) as client:
+        # 启动时的索引来自应用数据库，改为从测试数据库加载
+        availability_index.load(db)
+        scooter_index.load(db)
         yield client
     app.dependency_overrides.clear()
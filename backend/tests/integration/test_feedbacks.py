@@ -259,6 +259,37 @@ def test_read_high_priority_feedbacks(client, test_user, test_feedback):
             assert feedback["priority"] == FeedbackPriority.HIGH.value
 
 
+def test_admin_feedback_lists_query_count(
+    client, test_user, test_scooter, count_queries
+):
+    """测试管理员反馈列表不会逐条懒加载用户、滑板车和处理人"""
+    for i in range(3):
+        response = client.post(
+            "/api/v1/feedbacks/",
+            json={
+                "feedback_type": FeedbackType.SCOOTER_DAMAGE.value,
+                "feedback_detail": f"批量反馈 {i}",
+                "scooter_id": test_scooter["id"],
+                "priority": FeedbackPriority.HIGH.value,
+            },
+            headers=test_user["headers"],
+        )
+        assert response.status_code == status.HTTP_201_CREATED
+
+    # 一条查询当前用户，一条查询反馈及其关联对象
+    for path in [
+        "/api/v1/feedbacks/admin/all",
+        "/api/v1/feedbacks/admin/high-priority",
+    ]:
+        count_queries.clear()
+        response = client.get(path, headers=test_user["headers"])
+        assert len(count_queries) <= 2, "\n".join(count_queries)
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.json()) >= 3
+        assert all(f["user_name"] for f in response.json())
+        assert any(f["scooter_model"] == "Test Model" for f in response.json())
+
+
 def test_admin_update_feedback(client, test_user, test_feedback):
     """测试管理员更新反馈"""
     # 注意：这里假设测试用户有管理员权限
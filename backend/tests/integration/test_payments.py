@@ -1,8 +1,15 @@
+import json
+from datetime import datetime
+
 import pytest
 from fastapi import status
+from sqlalchemy import event
 from sqlalchemy.orm import Session
 
 from app import crud
+from app.models.payment import Payment, PaymentStatus
+from app.models.rental import Rental
+from app.models.scooter import Scooter
 from app.schemas.user import UserCreate
 from app.schemas.rental import RentalCreate
 from app.schemas.rental import RentalPeriod
@@ -57,6 +64,16 @@ def test_payment_card(client, test_user):
     return response.json()
 
 
+@pytest.fixture
+def test_scooter_price(client, test_user):
+    """确保测试滑板车型号有价格，创建租赁时需要"""
+    client.post(
+        "/api/v1/scooter-prices/",
+        json={"model": "Test Model", "price_per_hour": 20.0},
+        headers=test_user["headers"],
+    )
+
+
 @pytest.fixture
 def test_rental(client, db: Session, test_user):
     # 创建一个测试用的租赁配置
@@ -97,7 +114,12 @@ def test_rental(client, db: Session, test_user):
     )
     assert end_response.status_code == status.HTTP_200_OK
 
-    return end_response.json()
+    yield end_response.json()
+
+    # 集成测试共享同一个数据库，清理租赁和支付记录，避免影响其他模块的测试
+    db.query(Payment).filter(Payment.rental_id == rental_id).delete()
+    db.query(Rental).filter(Rental.id == rental_id).delete()
+    db.commit()
 
 
 def test_read_payments(client, test_user):
@@ -139,3 +161,271 @@ def test_read_payment_not_found(client, test_user):
 
     assert response.status_code == status.HTTP_404_NOT_FOUND
     assert "Payment not found" in response.json()["detail"]
+
+
+@pytest.fixture
+def successful_gateway(monkeypatch):
+    """让模拟支付网关始终返回成功，并跳过确认邮件的发送"""
+
+    async def skip_email(**kwargs):
+        return None
+
+    monkeypatch.setattr(
+        "app.api.v1.endpoints.rentals.send_rental_confirmation", skip_email
+    )
+    monkeypatch.setattr(
+        "app.api.v1.endpoints.payments.send_payment_confirmation", skip_email
+    )
+    monkeypatch.setattr(
+        "app.api.v1.endpoints.payments.process_payment",
+        lambda **kwargs: {
+            "success": True,
+            "transaction_id": "TXNTEST00001",
+            "status": PaymentStatus.COMPLETED,
+            "message": "Payment successful",
+        },
+    )
+
+
+def pay_rental(client, headers, rental) -> dict:
+    payment_data = {
+        "rental_id": rental["id"],
+        "amount": rental["cost"],
+        "currency": "CNY",
+        "payment_method": "card",
+        "card_details": {
+            "card_holder_name": "Test User",
+            "card_number": "4111111111111111",
+            "card_expiry_month": "12",
+            "card_expiry_year": "25",
+            "cvv": "123",
+        },
+    }
+    response = client.post(
+        "/api/v1/payments/process", json=payment_data, headers=headers
+    )
+    assert response.status_code == status.HTTP_200_OK
+    return response.json()
+
+
+def read_today_stats(client, headers) -> dict:
+    today = datetime.utcnow().date().isoformat()
+    response = client.get(f"/api/v1/revenue-stats/daily/{today}", headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+    return response.json()
+
+
+def test_process_payment_updates_revenue_stats(
+    client, test_user, successful_gateway, test_scooter_price, test_rental
+):
+    """测试支付成功后增量更新当天的收入统计"""
+    before = read_today_stats(client, test_user["headers"])
+
+    payment = pay_rental(client, test_user["headers"], test_rental)
+
+    assert payment["status"] == PaymentStatus.COMPLETED.value
+    after = read_today_stats(client, test_user["headers"])
+    assert after["rental_count"] == before["rental_count"] + 1
+    assert after["total_revenue"] == pytest.approx(
+        before["total_revenue"] + payment["amount"]
+    )
+    assert (
+        after["revenue_by_period"]["1hr"]["count"]
+        == before["revenue_by_period"]["1hr"]["count"] + 1
+    )
+
+
+def test_refund_payment_reverses_revenue_stats(
+    client, db: Session, test_user, successful_gateway, test_scooter_price, test_rental
+):
+    """测试支付状态改为退款后从当天的收入统计中扣除，且不会重复扣除"""
+    payment = pay_rental(client, test_user["headers"], test_rental)
+    before = read_today_stats(client, test_user["headers"])
+    db_payment = db.get(Payment, payment["payment_id"])
+
+    crud.payment.update_payment_status(
+        db=db, db_obj=db_payment, status=PaymentStatus.REFUNDED
+    )
+
+    after = read_today_stats(client, test_user["headers"])
+    assert after["rental_count"] == before["rental_count"] - 1
+    assert after["total_revenue"] == pytest.approx(
+        before["total_revenue"] - payment["amount"]
+    )
+
+    crud.payment.update_payment_status(
+        db=db, db_obj=db_payment, status=PaymentStatus.REFUNDED
+    )
+    assert read_today_stats(client, test_user["headers"]) == after
+
+
+def test_refund_endpoint_removed(
+    client, test_user, successful_gateway, test_scooter_price, test_rental
+):
+    """测试用户不能自行退款"""
+    payment = pay_rental(client, test_user["headers"], test_rental)
+
+    response = client.post(
+        f"/api/v1/payments/{payment['payment_id']}/refund",
+        headers=test_user["headers"],
+    )
+
+    assert response.status_code in (
+        status.HTTP_404_NOT_FOUND,
+        status.HTTP_405_METHOD_NOT_ALLOWED,
+    )
+
+
+@pytest.fixture
+def count_commits(db: Session):
+    """记录测试期间共享会话的提交次数"""
+    commits = []
+
+    def count_commit(session):
+        commits.append(session)
+
+    event.listen(db, "after_commit", count_commit)
+    yield commits
+    event.remove(db, "after_commit", count_commit)
+
+
+def test_payment_and_refund_commits(
+    client,
+    db: Session,
+    test_user,
+    successful_gateway,
+    test_scooter_price,
+    test_rental,
+    count_commits,
+):
+    """测试支付在调用网关前后各提交一次，退款只提交一次"""
+    payment = pay_rental(client, test_user["headers"], test_rental)
+    assert len(count_commits) == 2
+
+    db_payment = db.get(Payment, payment["payment_id"])
+    crud.payment.update_payment_status(
+        db=db, db_obj=db_payment, status=PaymentStatus.REFUNDED
+    )
+    assert len(count_commits) == 3
+
+    db.expire_all()
+    rental = db.get(Rental, test_rental["id"])
+    assert rental.status == "paid"
+    assert db.get(Scooter, rental.scooter_id).status == "available"
+    assert db.get(Payment, payment["payment_id"]).status == PaymentStatus.REFUNDED
+
+
+def test_pending_payment_committed_before_gateway(
+    client, db: Session, test_user, successful_gateway, test_rental, monkeypatch
+):
+    """测试调用支付网关时待处理的支付记录已提交，且没有打开的事务"""
+    calls = []
+
+    def gateway(**kwargs):
+        calls.append(db.in_transaction())
+        pending = (
+            db.query(Payment)
+            .filter(
+                Payment.rental_id == test_rental["id"],
+                Payment.status == PaymentStatus.PENDING,
+            )
+            .count()
+        )
+        db.commit()
+        calls.append(pending)
+        return {
+            "success": True,
+            "transaction_id": "TXNTEST00002",
+            "status": PaymentStatus.COMPLETED,
+            "message": "Payment successful",
+        }
+
+    monkeypatch.setattr("app.api.v1.endpoints.payments.process_payment", gateway)
+
+    payment = pay_rental(client, test_user["headers"], test_rental)
+
+    assert calls == [False, 1]
+    assert payment["status"] == PaymentStatus.COMPLETED.value
+    assert payment["transaction_id"] == "TXNTEST00002"
+
+
+def test_end_rental_commits_once(
+    client,
+    db: Session,
+    test_user,
+    successful_gateway,
+    test_scooter_price,
+    count_commits,
+):
+    """测试结束租赁只提交一次，并释放滑板车"""
+    scooter_response = client.post(
+        "/api/v1/scooters/",
+        json={"model": "Test Model", "status": "available"},
+        headers=test_user["headers"],
+    )
+    scooter_id = scooter_response.json()["id"]
+    response = client.post(
+        "/api/v1/rentals/",
+        json={"scooter_id": scooter_id, "rental_period": "1hr"},
+        headers=test_user["headers"],
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+    rental_id = response.json()["id"]
+    count_commits.clear()
+
+    try:
+        response = client.post(
+            f"/api/v1/rentals/{rental_id}/end", headers=test_user["headers"]
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["status"] == "completed"
+        assert len(count_commits) == 1
+        db.expire_all()
+        assert db.get(Scooter, scooter_id).status == "available"
+    finally:
+        db.query(Rental).filter(Rental.id == rental_id).delete()
+        db.commit()
+
+
+def test_export_payments(
+    client, test_user, successful_gateway, test_scooter_price, test_rental
+):
+    """测试按日期范围流式导出支付记录"""
+    payment = pay_rental(client, test_user["headers"], test_rental)
+    today = datetime.utcnow().date().isoformat()
+
+    response = client.get(
+        "/api/v1/payments/export",
+        params={"start_date": today, "end_date": today, "format": "ndjson"},
+        headers=test_user["headers"],
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert f"payments_{today}_{today}.ndjson" in response.headers["content-disposition"]
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    exported = next(row for row in rows if row["payment_id"] == payment["payment_id"])
+    assert exported["rental_id"] == test_rental["id"]
+    assert exported["payment_status"] == PaymentStatus.COMPLETED.value
+    # 只能导出自己的支付记录
+    assert {row["user_id"] for row in rows} == {exported["user_id"]}
+
+    response = client.get(
+        "/api/v1/payments/export",
+        params={"start_date": today, "end_date": today},
+        headers=test_user["headers"],
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("text/csv")
+    assert response.text.startswith("payment_id,payment_created_at,")
+
+
+def test_export_payments_invalid_range(client, test_user):
+    """测试导出时开始日期晚于结束日期"""
+    response = client.get(
+        "/api/v1/payments/export",
+        params={"start_date": "2025-04-10", "end_date": "2025-04-01"},
+        headers=test_user["headers"],
+    )
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
@@ -1,5 +1,6 @@
 import pytest
 from fastapi import status
+from app.models.rental import Rental
 from app.schemas.rental import RentalPeriod, RentalCreate
 from sqlalchemy.sql import text
 import uuid
@@ -224,3 +225,281 @@ def test_update_rental_invalid_json(auth_client):
     """测试使用无效的JSON格式更新租赁订单"""
     response = auth_client.patch("/api/v1/rentals/1", data="invalid json")
     assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+def test_quote_rentals(auth_client, test_scooter):
+    """测试批量询价"""
+    config_data = {
+        "base_hourly_rate": 20.0,
+        "period_discounts": {"1hr": 1.0, "4hrs": 0.9, "1day": 0.8, "1week": 0.7},
+    }
+    response = auth_client.post("/api/v1/rental-configs/", json=config_data)
+    assert response.status_code == status.HTTP_201_CREATED
+    response = auth_client.post(
+        "/api/v1/scooter-prices/",
+        json={"model": test_scooter["model"], "price_per_hour": 2.0},
+    )
+    assert response.status_code == status.HTTP_200_OK
+
+    items = [
+        {"scooter_id": test_scooter["id"], "rental_period": period.value}
+        for period in RentalPeriod
+    ]
+    items.append({"model": test_scooter["model"], "rental_period": "4hrs"})
+    response = auth_client.post("/api/v1/rentals/quotes", json={"items": items})
+    assert response.status_code == status.HTTP_200_OK
+    quotes = response.json()
+    assert [quote["cost"] for quote in quotes] == pytest.approx(
+        [40.0, 144.0, 768.0, 4704.0, 144.0]
+    )
+    assert all(quote["model"] == test_scooter["model"] for quote in quotes)
+    assert all(quote["discount_type"] == "none" for quote in quotes)
+
+
+def test_quote_reflects_updated_config(auth_client, test_scooter):
+    """测试修改租赁配置后，下一次询价立即使用新的费率"""
+    config_data = {
+        "base_hourly_rate": 20.0,
+        "period_discounts": {"1hr": 1.0, "4hrs": 0.9, "1day": 0.8, "1week": 0.7},
+    }
+    response = auth_client.post("/api/v1/rental-configs/", json=config_data)
+    config_id = response.json()["id"]
+    auth_client.post(
+        "/api/v1/scooter-prices/",
+        json={"model": test_scooter["model"], "price_per_hour": 2.0},
+    )
+    items = {"items": [{"scooter_id": test_scooter["id"], "rental_period": "1hr"}]}
+    response = auth_client.post("/api/v1/rentals/quotes", json=items)
+    assert response.json()[0]["cost"] == pytest.approx(40.0)
+
+    response = auth_client.put(
+        f"/api/v1/rental-configs/{config_id}", json={"base_hourly_rate": 30.0}
+    )
+    assert response.status_code == status.HTTP_200_OK
+
+    response = auth_client.post("/api/v1/rentals/quotes", json=items)
+    assert response.json()[0]["cost"] == pytest.approx(60.0)
+
+
+def test_create_rental_applies_user_discount(
+    client, auth_client, test_scooter, skip_email
+):
+    """测试创建租赁时与询价一样使用用户折扣（60岁以上打八折）"""
+    auth_client.post(
+        "/api/v1/rental-configs/",
+        json={"base_hourly_rate": 20.0, "period_discounts": {"1hr": 1.0}},
+    )
+    auth_client.post(
+        "/api/v1/scooter-prices/",
+        json={"model": test_scooter["model"], "price_per_hour": 2.0},
+    )
+    client.post(
+        "/api/v1/users/",
+        json={
+            "email": "senior_rental@example.com",
+            "password": "seniorpassword123",
+            "name": "Senior User",
+            "age": 70,
+        },
+    )
+    response = client.post(
+        "/api/v1/auth/login",
+        data={
+            "username": "senior_rental@example.com",
+            "password": "seniorpassword123",
+        },
+    )
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    booking = {"scooter_id": test_scooter["id"], "rental_period": "1hr"}
+    response = client.post(
+        "/api/v1/rentals/quotes", json={"items": [booking]}, headers=headers
+    )
+    quote = response.json()[0]
+    assert quote["discount_type"] == "old"
+    assert quote["cost"] == pytest.approx(32.0)
+
+    response = client.post(
+        "/api/v1/rentals/",
+        json={**booking, "start_time": "2030-08-01T10:00:00"},
+        headers=headers,
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+    try:
+        assert response.json()["cost"] == pytest.approx(quote["cost"])
+    finally:
+        client.delete(f"/api/v1/rentals/{response.json()['id']}")
+
+
+def test_quote_rentals_unknown_scooter(auth_client):
+    """测试询价时滑板车不存在"""
+    response = auth_client.post(
+        "/api/v1/rentals/quotes",
+        json={"items": [{"scooter_id": 999999, "rental_period": "1hr"}]},
+    )
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_quote_rentals_for_other_user(auth_client):
+    """测试不能按其他用户的身份询价"""
+    response = auth_client.post(
+        "/api/v1/rentals/quotes",
+        json={
+            "items": [
+                {"model": "Test Model", "rental_period": "1hr", "user_id": 999999}
+            ]
+        },
+    )
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+def test_quote_rentals_requires_scooter_or_model(auth_client):
+    """测试询价项缺少滑板车ID和型号"""
+    response = auth_client.post(
+        "/api/v1/rentals/quotes", json={"items": [{"rental_period": "1hr"}]}
+    )
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+def test_read_rentals_with_cursor(auth_client, db):
+    """测试使用游标分页读取租赁列表"""
+    rentals = [Rental(user_id=1, scooter_id=1, status="completed") for _ in range(5)]
+    db.add_all(rentals)
+    db.commit()
+    created_ids = [rental.id for rental in rentals]
+
+    try:
+        seen = []
+        params = {"limit": 2}
+        while True:
+            response = auth_client.get("/api/v1/rentals/", params=params)
+            assert response.status_code == status.HTTP_200_OK
+            seen.extend(rental["id"] for rental in response.json())
+            cursor = response.headers.get("X-Next-Cursor")
+            if cursor is None:
+                break
+            params = {"limit": 2, "cursor": cursor}
+        assert seen == sorted(seen)
+        assert set(created_ids) <= set(seen)
+        assert len(seen) == len(set(seen))
+    finally:
+        db.query(Rental).filter(Rental.id.in_(created_ids)).delete()
+        db.commit()
+
+
+def test_read_rentals_invalid_cursor(auth_client):
+    """测试使用无效的游标"""
+    response = auth_client.get("/api/v1/rentals/", params={"cursor": "invalid"})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.fixture
+def skip_email(monkeypatch):
+    """跳过租赁确认邮件的发送"""
+
+    async def skip(**kwargs):
+        return None
+
+    monkeypatch.setattr("app.api.v1.endpoints.rentals.send_rental_confirmation", skip)
+
+
+def test_create_rental_with_utc_start_time(auth_client, test_scooter, skip_email):
+    """测试带时区的开始时间转换为本地时间后再保存和建立索引"""
+    auth_client.post(
+        "/api/v1/rental-configs/",
+        json={"base_hourly_rate": 20.0, "period_discounts": {"1hr": 1.0}},
+    )
+    auth_client.post(
+        "/api/v1/scooter-prices/",
+        json={"model": test_scooter["model"], "price_per_hour": 2.0},
+    )
+    response = auth_client.post(
+        "/api/v1/rentals/",
+        json={
+            "scooter_id": test_scooter["id"],
+            "rental_period": "1hr",
+            "start_time": "2030-01-01T10:00:00Z",
+        },
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+    rental_id = response.json()["id"]
+
+    try:
+        response = auth_client.get(
+            "/api/v1/scooters/available",
+            params={"start": "2030-01-01T10:30:00Z", "end": "2030-01-01T12:00:00Z"},
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert test_scooter["id"] not in {s["id"] for s in response.json()}
+    finally:
+        auth_client.delete(f"/api/v1/rentals/{rental_id}")
+
+
+def test_create_future_rental_for_scooter_in_use(auth_client, test_scooter, skip_email):
+    """测试使用中的滑板车可以预订之后空闲的时间段，重叠的预订被拒绝"""
+    auth_client.post(
+        "/api/v1/rental-configs/",
+        json={"base_hourly_rate": 20.0, "period_discounts": {"1hr": 1.0}},
+    )
+    auth_client.post(
+        "/api/v1/scooter-prices/",
+        json={"model": test_scooter["model"], "price_per_hour": 2.0},
+    )
+    auth_client.put(f"/api/v1/scooters/{test_scooter['id']}", json={"status": "in_use"})
+    booking = {
+        "scooter_id": test_scooter["id"],
+        "rental_period": "1hr",
+        "start_time": "2030-06-01T10:00:00",
+    }
+
+    response = auth_client.post("/api/v1/rentals/", json=booking)
+    assert response.status_code == status.HTTP_201_CREATED
+    rental_id = response.json()["id"]
+
+    try:
+        overlapping = {**booking, "start_time": "2030-06-01T10:30:00"}
+        response = auth_client.post("/api/v1/rentals/", json=overlapping)
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        scooter = auth_client.get(f"/api/v1/scooters/{test_scooter['id']}").json()
+        assert scooter["status"] == "in_use"
+    finally:
+        auth_client.delete(f"/api/v1/rentals/{rental_id}")
+
+
+def test_update_rental_into_booked_window(auth_client, test_scooter, skip_email):
+    """测试修改租赁时间与同一辆车的其他预订重叠时返回 409，原时间段不变"""
+    auth_client.post(
+        "/api/v1/rental-configs/",
+        json={"base_hourly_rate": 20.0, "period_discounts": {"1hr": 1.0}},
+    )
+    auth_client.post(
+        "/api/v1/scooter-prices/",
+        json={"model": test_scooter["model"], "price_per_hour": 2.0},
+    )
+    booking = {
+        "scooter_id": test_scooter["id"],
+        "rental_period": "1hr",
+        "start_time": "2030-07-01T10:00:00",
+    }
+    first = auth_client.post("/api/v1/rentals/", json=booking).json()
+    second = auth_client.post(
+        "/api/v1/rentals/", json={**booking, "start_time": "2030-07-01T12:00:00"}
+    ).json()
+
+    try:
+        response = auth_client.patch(
+            f"/api/v1/rentals/{first['id']}",
+            json={"end_time": "2030-07-01T12:30:00"},
+        )
+        assert response.status_code == status.HTTP_409_CONFLICT
+        response = auth_client.get(f"/api/v1/rentals/{first['id']}")
+        assert response.json()["end_time"] == first["end_time"]
+
+        response = auth_client.put(
+            f"/api/v1/rentals/{first['id']}",
+            json={"end_time": "2030-07-01T12:00:00"},
+        )
+        assert response.status_code == status.HTTP_200_OK
+    finally:
+        auth_client.delete(f"/api/v1/rentals/{first['id']}")
+        auth_client.delete(f"/api/v1/rentals/{second['id']}")
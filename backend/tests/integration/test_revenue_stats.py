@@ -0,0 +1,116 @@
+import uuid
+
+import pytest
+from fastapi import status
+
+
+@pytest.fixture
+def auth_headers(client):
+    """创建测试用户并返回认证头"""
+    email = f"revenue_{uuid.uuid4().hex[:8]}@example.com"
+    client.post(
+        "/api/v1/users/",
+        json={"email": email, "password": "revenuepass123", "name": "Revenue User"},
+    )
+    response = client.post(
+        "/api/v1/auth/login", data={"username": email, "password": "revenuepass123"}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.mark.parametrize(
+    "start_date,end_date,granularity,points",
+    [
+        ("2025-01-01", "2025-03-31", "month", 3),
+        ("2025-04-07", "2025-04-20", "week", 2),
+        ("2025-04-07", "2025-04-10", "day", 4),
+        ("2025-04-10", "2025-04-10", "hour", 24),
+    ],
+)
+def test_revenue_series_picks_granularity(
+    client, auth_headers, start_date, end_date, granularity, points
+):
+    """测试未指定粒度时选择能覆盖日期范围的最粗粒度"""
+    response = client.get(
+        "/api/v1/revenue-stats/series",
+        params={"start_date": start_date, "end_date": end_date},
+        headers=auth_headers,
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert data["granularity"] == granularity
+    assert len(data["points"]) == points
+
+
+def test_revenue_series_explicit_granularity(client, auth_headers):
+    """测试指定更细的粒度"""
+    response = client.get(
+        "/api/v1/revenue-stats/series",
+        params={
+            "start_date": "2025-01-01",
+            "end_date": "2025-01-31",
+            "granularity": "day",
+        },
+        headers=auth_headers,
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.json()["points"]) == 31
+
+
+def test_revenue_series_unaligned_range(client, auth_headers):
+    """测试日期范围与粒度边界不一致时返回400"""
+    response = client.get(
+        "/api/v1/revenue-stats/series",
+        params={
+            "start_date": "2025-01-02",
+            "end_date": "2025-01-31",
+            "granularity": "month",
+        },
+        headers=auth_headers,
+    )
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert "month" in response.json()["detail"]
+
+
+@pytest.mark.parametrize(
+    "path",
+    [
+        "utilisation",
+        "revenue-by-model",
+        "demand-heatmap",
+        "ride-duration",
+    ],
+)
+def test_analytics_endpoints(client, auth_headers, path):
+    """测试车队分析接口"""
+    response = client.get(
+        f"/api/v1/revenue-stats/analytics/{path}",
+        params={"start_date": "2025-04-01", "end_date": "2025-04-30"},
+        headers=auth_headers,
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    if path == "demand-heatmap":
+        assert len(response.json()["counts"]) == 7
+    if path == "ride-duration":
+        assert [row["rental_period"] for row in response.json()] == [
+            "1hr",
+            "4hrs",
+            "1day",
+            "1week",
+        ]
+
+
+def test_analytics_invalid_range(client, auth_headers):
+    """测试开始日期晚于结束日期"""
+    response = client.get(
+        "/api/v1/revenue-stats/analytics/utilisation",
+        params={"start_date": "2025-04-30", "end_date": "2025-04-01"},
+        headers=auth_headers,
+    )
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
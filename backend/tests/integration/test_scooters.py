@@ -1,5 +1,13 @@
+from datetime import datetime, timedelta
+
 from fastapi import status
 
+from app.core.telemetry import telemetry_buffer
+from app.core.track import track_buffer
+from app.crud.scooter_track import scooter_track
+from app.crud.rental import rental
+from app.schemas.rental import RentalCreate
+
 
 def test_read_scooters(client):
     """测试获取滑板车列表"""
@@ -99,3 +107,424 @@ def test_delete_scooter(client):
     # 确认滑板车已被删除
     response = client.get(f"/api/v1/scooters/{scooter_id}")
     assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_read_available_scooters(client, db):
+    """测试按时间段查询可预订的滑板车"""
+    ids = {}
+    for name, scooter_status in [
+        ("free", "available"),
+        ("booked", "available"),
+        ("maintenance", "maintenance"),
+    ]:
+        response = client.post(
+            "/api/v1/scooters/",
+            json={"model": f"Window {name}", "status": scooter_status},
+        )
+        ids[name] = response.json()["id"]
+
+    start = datetime(2030, 1, 1, 9, 0)
+    booking = rental.create_with_scooter(
+        db=db,
+        rental_in=RentalCreate(
+            scooter_id=ids["booked"],
+            rental_period="4hrs",
+            end_time=start + timedelta(hours=4),
+        ),
+        start_time=start,
+        user_id=1,
+        cost=10.0,
+    )
+
+    def available(start_time, end_time):
+        response = client.get(
+            "/api/v1/scooters/available",
+            params={"start": start_time.isoformat(), "end": end_time.isoformat()},
+        )
+        assert response.status_code == status.HTTP_200_OK
+        return {scooter["id"] for scooter in response.json()}
+
+    try:
+        overlapping = available(start + timedelta(hours=3), start + timedelta(hours=5))
+        assert ids["free"] in overlapping
+        assert ids["booked"] not in overlapping
+        assert ids["maintenance"] not in overlapping
+
+        # 已预订的滑板车在预订结束后可以再次预订
+        later = available(start + timedelta(hours=4), start + timedelta(hours=6))
+        assert ids["booked"] in later
+    finally:
+        rental.delete_rental(db, rental_id=booking.id)
+
+
+def test_read_available_scooters_invalid_window(client):
+    """测试开始时间不早于结束时间"""
+    response = client.get(
+        "/api/v1/scooters/available",
+        params={"start": "2030-01-01T10:00:00", "end": "2030-01-01T09:00:00"},
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_batch_scooter_endpoints(client):
+    """测试批量创建、更新和删除滑板车"""
+    response = client.post(
+        "/api/v1/scooters/batch",
+        json={
+            "items": [
+                {"model": "Batch A", "location": {"lat": 39.9, "lng": 116.4}},
+                {"model": "Batch B", "battery_level": 60},
+            ]
+        },
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+    created = response.json()
+    assert [s["model"] for s in created] == ["Batch A", "Batch B"]
+    assert created[1]["location"] == {"lat": 0, "lng": 0}
+    ids = [s["id"] for s in created]
+
+    response = client.patch(
+        "/api/v1/scooters/batch",
+        json={
+            "items": [
+                {"id": ids[0], "status": "maintenance"},
+                {"id": ids[1], "battery_level": 30},
+            ]
+        },
+    )
+    assert response.status_code == status.HTTP_200_OK
+    updated = response.json()
+    assert updated[0]["status"] == "maintenance"
+    assert updated[0]["battery_level"] == 100
+    assert updated[1]["battery_level"] == 30
+
+    # 任何一个ID不存在时整批不做修改
+    response = client.patch(
+        "/api/v1/scooters/batch",
+        json={"items": [{"id": ids[1], "battery_level": 5}, {"id": 999999}]},
+    )
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    assert "999999" in response.json()["detail"]
+    response = client.delete("/api/v1/scooters/batch", params={"ids": [ids[0], 999999]})
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    assert client.get(f"/api/v1/scooters/{ids[1]}").json()["battery_level"] == 30
+
+    response = client.delete("/api/v1/scooters/batch", params={"ids": ids})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == sorted(ids)
+    for scooter_id in ids:
+        response = client.get(f"/api/v1/scooters/{scooter_id}")
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_batch_scooter_size_limit(client):
+    """测试批量请求的数量限制"""
+    response = client.post("/api/v1/scooters/batch", json={"items": []})
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+    items = [{"model": "Batch"}] * 1001
+    response = client.post("/api/v1/scooters/batch", json={"items": items})
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+    response = client.delete(
+        "/api/v1/scooters/batch", params={"ids": list(range(1, 1002))}
+    )
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+def test_read_nearby_scooters(client):
+    """测试按距离查询附近的滑板车"""
+    # 远离其他测试数据的位置
+    lat, lng = 10.0, 20.0
+    response = client.post(
+        "/api/v1/scooters/batch",
+        json={
+            "items": [
+                {"model": "Near", "location": {"lat": lat + 0.002, "lng": lng}},
+                {"model": "Near", "location": {"lat": lat + 0.001, "lng": lng}},
+                {"model": "Near", "location": {"lat": lat + 0.05, "lng": lng}},
+                {
+                    "model": "Near",
+                    "status": "maintenance",
+                    "location": {"lat": lat, "lng": lng},
+                },
+            ]
+        },
+    )
+    ids = [s["id"] for s in response.json()]
+
+    response = client.get(
+        "/api/v1/scooters/nearby", params={"lat": lat, "lng": lng, "radius": 1000}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    nearby = response.json()
+    assert [s["id"] for s in nearby] == [ids[1], ids[0]]
+    assert [round(s["distance"]) for s in nearby] == [111, 222]
+
+    response = client.get(
+        "/api/v1/scooters/nearby",
+        params={
+            "lat": lat,
+            "lng": lng,
+            "radius": 10000,
+            "k": 2,
+            "status": ["available", "maintenance"],
+        },
+    )
+    assert [s["id"] for s in response.json()] == [ids[3], ids[1]]
+
+    response = client.get(
+        "/api/v1/scooters/nearby", params={"lat": 91, "lng": lng, "radius": 1000}
+    )
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+    client.delete("/api/v1/scooters/batch", params={"ids": ids})
+    response = client.get(
+        "/api/v1/scooters/nearby", params={"lat": lat, "lng": lng, "radius": 10000}
+    )
+    assert response.json() == []
+
+
+def test_read_scooter_clusters(client):
+    """测试地图范围内的滑板车聚合和瓦片缓存"""
+    lat, lng = -20.0, -40.0
+    response = client.post(
+        "/api/v1/scooters/batch",
+        json={
+            "items": [
+                {"model": "Map", "location": {"lat": lat, "lng": lng}},
+                {
+                    "model": "Map",
+                    "status": "maintenance",
+                    "location": {"lat": lat + 0.0002, "lng": lng},
+                },
+                {"model": "Map", "location": {"lat": lat + 1, "lng": lng + 1}},
+            ]
+        },
+    )
+    ids = [s["id"] for s in response.json()]
+    bbox = f"{lng - 0.1},{lat - 0.1},{lng + 1.1},{lat + 1.1}"
+
+    response = client.get("/api/v1/scooters/clusters", params={"bbox": bbox, "zoom": 8})
+    assert response.status_code == status.HTTP_200_OK
+    clusters = sorted(response.json(), key=lambda c: c["count"])
+    assert [(c["count"], c["available"]) for c in clusters] == [(1, 1), (2, 1)]
+    assert abs(clusters[1]["lat"] - (lat + 0.0001)) < 1e-9
+
+    response = client.get(
+        "/api/v1/scooters/clusters", params={"bbox": bbox, "zoom": 18}
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    response = client.get(
+        "/api/v1/scooters/clusters", params={"bbox": "1,2,3", "zoom": 8}
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    response = client.get("/api/v1/scooters/clusters/0/0/0")
+    assert response.status_code == status.HTTP_200_OK
+    assert "max-age" in response.headers["cache-control"]
+    etag = response.headers["etag"]
+    response = client.get(
+        "/api/v1/scooters/clusters/0/0/0", headers={"If-None-Match": etag}
+    )
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    client.delete("/api/v1/scooters/batch", params={"ids": ids})
+    response = client.get(
+        "/api/v1/scooters/clusters/0/0/0", headers={"If-None-Match": etag}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["etag"] != etag
+
+    response = client.get("/api/v1/scooters/clusters/2/4/0")
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+def telemetry_start() -> datetime:
+    """一小时前的整分钟；遥测读数时间需在服务器时间附近，否则会被丢弃"""
+    return datetime.now().replace(second=0, microsecond=0) - timedelta(hours=1)
+
+
+def at(start: datetime, seconds: int = 0) -> str:
+    return (start + timedelta(seconds=seconds)).isoformat()
+
+
+def test_ingest_telemetry(client, db):
+    """测试批量上报遥测数据，写入前按滑板车合并"""
+    start = telemetry_start()
+    response = client.post("/api/v1/scooters/", json={"model": "Telemetry"})
+    scooter_id = response.json()["id"]
+    telemetry_buffer.clear()
+
+    response = client.post(
+        "/api/v1/scooters/telemetry",
+        json={
+            "items": [
+                {
+                    "scooter_id": scooter_id,
+                    "ts": at(start, 5),
+                    "lat": 1.5,
+                    "lng": 2.5,
+                    "battery": 70,
+                },
+                {
+                    "scooter_id": scooter_id,
+                    "ts": at(start),
+                    "lat": 1.0,
+                    "lng": 2.0,
+                    "battery": 71,
+                },
+            ]
+        },
+    )
+    assert response.status_code == status.HTTP_202_ACCEPTED
+    assert response.json() == {"accepted": 1, "buffered": 1}
+
+    assert telemetry_buffer.flush(db)["flushed_scooters"] == 1
+    scooter = client.get(f"/api/v1/scooters/{scooter_id}").json()
+    assert scooter["location"] == {"lat": 1.5, "lng": 2.5}
+    assert scooter["battery_level"] == 70
+
+    # 时间超前服务器时间的读数被丢弃
+    response = client.post(
+        "/api/v1/scooters/telemetry",
+        json={
+            "items": [
+                {
+                    "scooter_id": scooter_id,
+                    "ts": at(start, 2 * 86400),
+                    "lat": 1.0,
+                    "lng": 2.0,
+                    "battery": 60,
+                }
+            ]
+        },
+    )
+    assert response.json() == {"accepted": 0, "buffered": 0}
+
+    response = client.post(
+        "/api/v1/scooters/telemetry",
+        json={
+            "items": [
+                {
+                    "scooter_id": scooter_id,
+                    "ts": at(start),
+                    "lat": 1.0,
+                    "lng": 2.0,
+                    "battery": 101,
+                }
+            ]
+        },
+    )
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    telemetry_buffer.clear()
+    track_buffer.clear()
+
+
+def test_read_scooter_track(client, db):
+    """测试查询轨迹历史，包含已写入和还在缓存中的读数"""
+    start = telemetry_start()
+    response = client.post("/api/v1/scooters/", json={"model": "Track"})
+    scooter_id = response.json()["id"]
+    track_buffer.clear()
+
+    def post(ts: str, lat: float):
+        client.post(
+            "/api/v1/scooters/telemetry",
+            json={
+                "items": [
+                    {
+                        "scooter_id": scooter_id,
+                        "ts": ts,
+                        "lat": lat,
+                        "lng": 116.4,
+                        "battery": 80,
+                    }
+                ]
+            },
+        )
+
+    post(at(start), 39.9)
+    post(at(start, 30), 39.901)
+    scooter_track.append(db, track_buffer.drain())
+    post(at(start, 70), 39.902)
+    url = f"/api/v1/scooters/{scooter_id}/track"
+    window = {"from": at(start, -3600), "to": at(start, 3600)}
+
+    response = client.get(url, params=window)
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert data["resolution"] == 0
+    assert [p["lat"] for p in data["points"]] == [39.9, 39.901, 39.902]
+    assert data["points"][0] == {
+        "ts": at(start),
+        "lat": 39.9,
+        "lng": 116.4,
+        "battery": 80,
+    }
+
+    response = client.get(url, params={**window, "resolution": 60})
+    assert [p["ts"] for p in response.json()["points"]] == [
+        at(start, 30),
+        at(start, 70),
+    ]
+
+    response = client.get(url, params={"from": at(start, 3600), "to": at(start)})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    response = client.get("/api/v1/scooters/999999/track", params=window)
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    telemetry_buffer.clear()
+    track_buffer.clear()
+
+
+def test_read_scooter_changes(client, db):
+    """测试增量同步：只返回上次同步后修改或删除的滑板车"""
+    start = telemetry_start()
+    response = client.get("/api/v1/scooters/changes")
+    assert response.status_code == status.HTTP_200_OK
+    snapshot = response.json()
+    assert snapshot["full"] is True
+    since = snapshot["version"]
+
+    created = client.post("/api/v1/scooters/", json={"model": "Sync"}).json()
+    deleted = client.post("/api/v1/scooters/", json={"model": "Sync"}).json()
+    client.delete(f"/api/v1/scooters/{deleted['id']}")
+
+    response = client.get("/api/v1/scooters/changes", params={"since": since})
+    changes = response.json()
+    assert changes["full"] is False
+    assert [s["id"] for s in changes["changed"]] == [created["id"]]
+    assert changes["removed"] == [deleted["id"]]
+    since = changes["version"]
+
+    response = client.get("/api/v1/scooters/changes", params={"since": since})
+    assert response.json() == {
+        "version": since,
+        "full": False,
+        "changed": [],
+        "removed": [],
+    }
+
+    # 批量写入的遥测数据同样会产生变更
+    client.post(
+        "/api/v1/scooters/telemetry",
+        json={
+            "items": [
+                {
+                    "scooter_id": created["id"],
+                    "ts": at(start),
+                    "lat": 1.0,
+                    "lng": 2.0,
+                    "battery": 55,
+                }
+            ]
+        },
+    )
+    telemetry_buffer.flush(db)
+    response = client.get("/api/v1/scooters/changes", params={"since": since})
+    assert [s["battery_level"] for s in response.json()["changed"]] == [55]
+    telemetry_buffer.clear()
+    track_buffer.clear()
+
+    response = client.get("/api/v1/scooters/changes", params={"since": -1})
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
@@ -4,6 +4,11 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 
+from app.core.auth_cache import auth_cache
+from app.core.availability import availability_index
+from app.core.spatial import scooter_index
+from app.core.telemetry import telemetry_buffer
+from app.core.track import track_buffer
 from app.db.session import Base
 from app.main import app
 from app.api.deps import get_db
@@ -45,3 +50,31 @@ def client(db):
     with TestClient(app) as client:
         yield client
     app.dependency_overrides.clear()
+
+
+@pytest.fixture(autouse=True)
+def clear_availability_index():
+    """每个测试结束时数据会回滚，租赁时间段索引和滑板车空间索引也随之清空"""
+    availability_index.clear()
+    scooter_index.clear()
+    yield
+    availability_index.clear()
+    scooter_index.clear()
+
+
+@pytest.fixture(autouse=True)
+def clear_auth_cache():
+    """测试数据回滚后用户ID会被复用，缓存的令牌不能跨测试使用"""
+    auth_cache.clear()
+    yield
+    auth_cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def clear_telemetry_buffer():
+    """缓存的遥测数据和轨迹不能写入其他测试的数据"""
+    telemetry_buffer.clear()
+    track_buffer.clear()
+    yield
+    telemetry_buffer.clear()
+    track_buffer.clear()
@@ -0,0 +1,159 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app import analytics
+from app.models.payment import Payment, PaymentMethod, PaymentStatus
+from app.models.rental import Rental
+from app.models.scooter import Scooter
+from app.schemas.rental import RentalPeriod, RentalStatus
+
+# 2025-04-07 是周一
+WINDOW_START = datetime(2025, 4, 7)
+WINDOW_END = datetime(2025, 4, 9)
+
+
+@pytest.fixture
+def fleet_data(db: Session):
+    scooters = [
+        Scooter(model="Model A", status="available"),
+        Scooter(model="Model A", status="available"),
+        Scooter(model="Model B", status="available"),
+    ]
+    db.add_all(scooters)
+    db.flush()
+    a1, a2, b = (scooter.id for scooter in scooters)
+
+    def add_rental(scooter_id, start, hours, period, amount=None, status=None):
+        rental = Rental(
+            user_id=1,
+            scooter_id=scooter_id,
+            start_time=start,
+            end_time=start + timedelta(hours=hours) if hours is not None else None,
+            rental_period=period,
+            status=RentalStatus.PAID if amount else RentalStatus.ACTIVE,
+        )
+        db.add(rental)
+        db.flush()
+        if amount:
+            db.add(
+                Payment(
+                    user_id=1,
+                    rental_id=rental.id,
+                    amount=amount,
+                    status=status or PaymentStatus.COMPLETED,
+                    payment_method=PaymentMethod.CARD,
+                )
+            )
+
+    # 周一 9 点两笔，周二 18 点一笔
+    add_rental(a1, WINDOW_START + timedelta(hours=9), 1, RentalPeriod.ONE_HOUR, 10.0)
+    add_rental(a2, WINDOW_START + timedelta(hours=9), 4, RentalPeriod.FOUR_HOURS, 30.0)
+    add_rental(b, WINDOW_START + timedelta(hours=42), 2, RentalPeriod.ONE_HOUR, 15.0)
+    # 失败的支付不计入收入
+    add_rental(
+        b,
+        WINDOW_START + timedelta(hours=43),
+        1,
+        RentalPeriod.ONE_HOUR,
+        99.0,
+        PaymentStatus.FAILED,
+    )
+    # 窗口开始前开始、窗口内结束：只计入利用率
+    add_rental(a1, WINDOW_START - timedelta(hours=2), 4, RentalPeriod.FOUR_HOURS, 40.0)
+    # 未结束的租赁
+    add_rental(a2, WINDOW_END - timedelta(hours=3), None, RentalPeriod.ONE_DAY)
+    # 窗口之外
+    add_rental(b, WINDOW_END + timedelta(hours=1), 1, RentalPeriod.ONE_HOUR, 50.0)
+    db.commit()
+    return {"a1": a1, "a2": a2, "b": b}
+
+
+@pytest.fixture
+def fleet(db: Session, fleet_data):
+    return analytics.load_fleet_columns(db, start=WINDOW_START, end=WINDOW_END)
+
+
+def test_load_fleet_columns(fleet):
+    assert fleet.rental_count == 6
+    assert len(fleet.scooter_ids) == 3
+    assert sorted(fleet.rental_revenue.tolist()) == [0.0, 0.0, 10.0, 15.0, 30.0, 40.0]
+
+
+def test_scooter_utilisation(fleet, fleet_data):
+    now = WINDOW_END + timedelta(hours=5)
+    rows = {
+        row["scooter_id"]: row
+        for row in analytics.scooter_utilisation(
+            fleet, start=WINDOW_START, end=WINDOW_END, now=now
+        )
+    }
+
+    # 1 小时 + 窗口内的 2 小时
+    assert rows[fleet_data["a1"]]["busy_hours"] == pytest.approx(3)
+    # 4 小时 + 未结束租赁截至窗口结束的 3 小时
+    assert rows[fleet_data["a2"]]["busy_hours"] == pytest.approx(7)
+    assert rows[fleet_data["b"]]["busy_hours"] == pytest.approx(3)
+    assert rows[fleet_data["a2"]]["utilisation"] == pytest.approx(7 / 48)
+    assert rows[fleet_data["a1"]]["model"] == "Model A"
+
+
+def test_revenue_by_model(fleet):
+    rows = analytics.revenue_by_model(fleet, start=WINDOW_START, end=WINDOW_END)
+
+    assert rows == [
+        {"model": "Model A", "rental_count": 3, "revenue": 40.0},
+        {"model": "Model B", "rental_count": 2, "revenue": 15.0},
+    ]
+
+
+def test_demand_heatmap(fleet):
+    heatmap = analytics.demand_heatmap(fleet, start=WINDOW_START, end=WINDOW_END)
+
+    assert len(heatmap) == 7
+    assert all(len(row) == 24 for row in heatmap)
+    assert heatmap[0][9] == 2
+    assert heatmap[1][18] == 1
+    assert heatmap[1][19] == 1
+    assert sum(map(sum, heatmap)) == 5
+
+
+def test_average_duration_by_period(fleet):
+    rows = {
+        row["rental_period"]: row
+        for row in analytics.average_duration_by_period(
+            fleet, start=WINDOW_START, end=WINDOW_END
+        )
+    }
+
+    assert rows["1hr"]["rental_count"] == 3
+    assert rows["1hr"]["average_hours"] == pytest.approx((1 + 2 + 1) / 3)
+    assert rows["4hrs"] == {
+        "rental_period": "4hrs",
+        "rental_count": 1,
+        "average_hours": 4.0,
+    }
+    # 未结束的租赁不参与统计
+    assert rows["1day"]["rental_count"] == 0
+    assert rows["1week"]["average_hours"] == 0.0
+
+
+def test_empty_fleet(db: Session):
+    fleet = analytics.load_fleet_columns(db, start=WINDOW_START, end=WINDOW_END)
+
+    assert analytics.revenue_by_model(fleet, start=WINDOW_START, end=WINDOW_END) == []
+    assert (
+        analytics.scooter_utilisation(
+            fleet, start=WINDOW_START, end=WINDOW_END, now=WINDOW_END
+        )
+        == []
+    )
+    assert (
+        sum(
+            map(
+                sum, analytics.demand_heatmap(fleet, start=WINDOW_START, end=WINDOW_END)
+            )
+        )
+        == 0
+    )
@@ -0,0 +1,104 @@
+import time
+from datetime import timedelta
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_current_db_user, get_current_user
+from app.core.auth_cache import AuthCache, UserSnapshot, auth_cache
+from app.core.security import create_access_token
+from app.crud.user import user as crud_user
+from app.models.user import User
+
+
+def add_user(db: Session, **kwargs) -> User:
+    db_user = User(email="auth@example.com", name="Auth", hashed_password="x", **kwargs)
+    db.add(db_user)
+    db.commit()
+    return db_user
+
+
+def snapshot(user_id: int = 1) -> UserSnapshot:
+    return UserSnapshot(
+        id=user_id,
+        email="a@example.com",
+        name="A",
+        is_active=True,
+        age=None,
+        school=None,
+    )
+
+
+def test_entries_expire_with_token():
+    cache = AuthCache(maxsize=10, ttl=60)
+
+    cache.set("expired", snapshot(), expires_at=int(time.time()) - 1)
+    cache.set("valid", snapshot(), expires_at=int(time.time()) + 3600)
+
+    assert cache.get("expired") is None
+    assert cache.get("valid") == snapshot()
+
+
+def test_disabled_cache():
+    cache = AuthCache(maxsize=10, ttl=0)
+    cache.set("token", snapshot())
+    assert cache.get("token") is None
+
+
+def test_invalidate_user_drops_all_tokens():
+    cache = AuthCache(maxsize=10, ttl=60)
+    cache.set("a", snapshot(1))
+    cache.set("b", snapshot(1))
+    cache.set("c", snapshot(2))
+
+    assert cache.invalidate_user(1) == 2
+    assert cache.get("c") == snapshot(2)
+    assert len(cache) == 1
+
+
+def test_cached_token_skips_queries(db: Session, count_queries):
+    db_user = add_user(db, age=65)
+    token = create_access_token(db_user.id)
+
+    first = get_current_user(db=db, token=token)
+    count_queries.clear()
+    second = get_current_user(db=db, token=token)
+
+    assert second is first
+    assert count_queries == []
+    assert (second.id, second.age) == (db_user.id, 65)
+
+
+def test_update_and_remove_invalidate(db: Session):
+    db_user = add_user(db)
+    token = create_access_token(db_user.id, expires_delta=timedelta(minutes=5))
+    get_current_user(db=db, token=token)
+
+    crud_user.update(db, db_obj=db_user, obj_in={"name": "Renamed"})
+    assert len(auth_cache) == 0
+    assert get_current_user(db=db, token=token).name == "Renamed"
+
+    crud_user.update(db, db_obj=db_user, obj_in={"is_active": False})
+    with pytest.raises(HTTPException) as exc_info:
+        get_current_user(db=db, token=token)
+    assert exc_info.value.status_code == 400
+    assert len(auth_cache) == 0
+
+    crud_user.update(db, db_obj=db_user, obj_in={"is_active": True})
+    get_current_user(db=db, token=token)
+    crud_user.remove(db, id=db_user.id)
+    with pytest.raises(HTTPException) as exc_info:
+        get_current_user(db=db, token=token)
+    assert exc_info.value.status_code == 404
+
+
+def test_current_db_user_is_orm_object(db: Session):
+    db_user = add_user(db)
+    current = get_current_user(db=db, token=create_access_token(db_user.id))
+
+    assert get_current_db_user(db=db, current_user=current) is db_user
+    crud_user.remove(db, id=db_user.id)
+    with pytest.raises(HTTPException) as exc_info:
+        get_current_db_user(db=db, current_user=current)
+    assert exc_info.value.status_code == 404
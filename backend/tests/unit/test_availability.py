@@ -0,0 +1,244 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core.availability import AvailabilityIndex, availability_index, local_naive
+from app.crud.rental import rental
+from app.db.session import Base
+from app.models.rental import Rental
+from app.models.scooter import Scooter
+from app.schemas.rental import RentalCreate, RentalStatus, RentalUpdate
+
+T0 = datetime(2025, 5, 1, 8, 0)
+
+
+def hours(n: float) -> datetime:
+    return T0 + timedelta(hours=n)
+
+
+def test_is_free_checks_half_open_windows():
+    index = AvailabilityIndex()
+    index.add(1, 7, hours(2), hours(4))
+    index.add(2, 7, hours(6), hours(8))
+
+    assert index.is_free(7, hours(0), hours(2))
+    assert index.is_free(7, hours(4), hours(6))
+    assert index.is_free(7, hours(8), hours(10))
+    assert not index.is_free(7, hours(1), hours(3))
+    assert not index.is_free(7, hours(3), hours(5))
+    assert not index.is_free(7, hours(5), hours(9))
+    assert not index.is_free(7, hours(0), hours(10))
+    # 其他滑板车不受影响
+    assert index.is_free(8, hours(1), hours(3))
+
+
+def test_remove_frees_window():
+    index = AvailabilityIndex()
+    index.add(1, 7, hours(2), hours(4))
+    index.add(2, 7, hours(6), hours(8))
+
+    index.remove(1)
+    assert index.is_free(7, hours(1), hours(5))
+    assert not index.is_free(7, hours(5), hours(7))
+    assert len(index) == 1
+
+    index.remove_many([2, 3])
+    assert len(index) == 0
+    assert index.is_free(7, hours(0), hours(10))
+
+
+def test_free_scooters():
+    index = AvailabilityIndex()
+    index.add(1, 1, hours(0), hours(4))
+    index.add(2, 2, hours(4), hours(8))
+
+    assert index.free_scooters([1, 2, 3], hours(1), hours(2)) == [2, 3]
+    assert index.free_scooters([1, 2, 3], hours(3), hours(5)) == [3]
+
+
+def test_local_naive():
+    naive = datetime(2025, 5, 1, 8, 0)
+    assert local_naive(naive) is naive
+    aware = datetime(2025, 5, 1, 8, 0, tzinfo=timezone.utc)
+    assert local_naive(aware) == aware.astimezone().replace(tzinfo=None)
+
+
+def test_load_active_rentals(db: Session):
+    scooter = Scooter(model="Test Model", status="in_use")
+    db.add(scooter)
+    db.flush()
+    db.add_all(
+        [
+            Rental(
+                user_id=1,
+                scooter_id=scooter.id,
+                start_time=hours(0),
+                end_time=hours(4),
+                status=RentalStatus.ACTIVE,
+            ),
+            Rental(
+                user_id=1,
+                scooter_id=scooter.id,
+                start_time=hours(4),
+                end_time=hours(8),
+                status=RentalStatus.COMPLETED,
+            ),
+        ]
+    )
+    db.commit()
+
+    index = AvailabilityIndex()
+    assert index.load(db) == 1
+    assert not index.is_free(scooter.id, hours(3), hours(5))
+    assert index.is_free(scooter.id, hours(4), hours(8))
+
+
+def test_rental_writes_keep_index_in_sync(db: Session):
+    scooter = Scooter(model="Test Model", status="available")
+    db.add(scooter)
+    db.commit()
+
+    rental_in = RentalCreate(
+        scooter_id=scooter.id, rental_period="4hrs", end_time=hours(4)
+    )
+    created = rental.create_with_scooter(
+        db=db, rental_in=rental_in, user_id=1, cost=10.0, start_time=hours(0)
+    )
+    assert not availability_index.is_free(scooter.id, hours(1), hours(2))
+
+    rental.update_rental(db, rental=created, rental_in=RentalUpdate(status="completed"))
+    assert availability_index.is_free(scooter.id, hours(1), hours(2))
+
+    rental.update_rental(db, rental=created, rental_in=RentalUpdate(status="active"))
+    assert not availability_index.is_free(scooter.id, hours(1), hours(2))
+
+    rental.check_expired_rentals(db, now=hours(5))
+    assert availability_index.is_free(scooter.id, hours(1), hours(2))
+
+
+def test_delete_rental_frees_window(db: Session):
+    scooter = Scooter(model="Test Model", status="available")
+    db.add(scooter)
+    db.commit()
+    rental_in = RentalCreate(
+        scooter_id=scooter.id, rental_period="4hrs", end_time=hours(4)
+    )
+    created = rental.create_with_scooter(
+        db=db, rental_in=rental_in, user_id=1, cost=10.0, start_time=hours(0)
+    )
+
+    rental.delete_rental(db, rental_id=created.id)
+
+    assert len(availability_index) == 0
+
+
+@pytest.fixture
+def booking_db(tmp_path):
+    """预订失败时会回滚事务，使用单独的数据库，不影响外层测试事务"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'bookings.db'}")
+    Base.metadata.create_all(bind=engine)
+    with sessionmaker(autoflush=False, bind=engine)() as db:
+        yield db
+    engine.dispose()
+
+
+def book(db: Session, scooter: Scooter, start: float, end: float, now: float):
+    rental_in = RentalCreate(
+        scooter_id=scooter.id, rental_period="4hrs", end_time=hours(end)
+    )
+    return rental.create_with_scooter(
+        db=db,
+        rental_in=rental_in,
+        user_id=1,
+        cost=10.0,
+        start_time=hours(start),
+        now=hours(now),
+    )
+
+
+def test_future_bookings_checked_against_windows(booking_db: Session):
+    scooter = Scooter(model="Test Model", status="available")
+    booking_db.add(scooter)
+    booking_db.commit()
+
+    assert book(booking_db, scooter, 4, 8, now=0) is not None
+    booking_db.refresh(scooter)
+    # 将来的预订不占用滑板车，也不允许重叠的预订
+    assert scooter.status == "available"
+    assert book(booking_db, scooter, 6, 10, now=0) is None
+    assert book(booking_db, scooter, 8, 12, now=0) is not None
+
+    # 现在开始的租赁不能与之后的预订重叠
+    assert book(booking_db, scooter, 0, 5, now=0) is None
+    assert book(booking_db, scooter, 0, 4, now=0) is not None
+    booking_db.refresh(scooter)
+    assert scooter.status == "in_use"
+
+
+def test_due_bookings_take_scooter(db: Session):
+    scooter = Scooter(model="Test Model", status="available")
+    db.add(scooter)
+    db.commit()
+    book(db, scooter, 0, 2, now=0)
+    book(db, scooter, 3, 5, now=0)
+
+    assert rental.check_expired_rentals(db, now=hours(2.5)) == (1, 1)
+    db.refresh(scooter)
+    assert scooter.status == "available"
+
+    assert rental.start_due_rentals(db, now=hours(3)) == 1
+    db.refresh(scooter)
+    assert scooter.status == "in_use"
+
+
+def test_future_booking_skips_maintenance(booking_db: Session):
+    scooter = Scooter(model="Test Model", status="maintenance")
+    booking_db.add(scooter)
+    booking_db.commit()
+
+    assert book(booking_db, scooter, 4, 8, now=0) is None
+
+
+def test_update_rental_checked_against_windows(booking_db: Session):
+    scooter = Scooter(model="Test Model", status="available")
+    booking_db.add(scooter)
+    booking_db.commit()
+    first = book(booking_db, scooter, 4, 8, now=0)
+    second = book(booking_db, scooter, 8, 12, now=0)
+
+    # 延长到下一个预订的时间段内时拒绝修改，原时间段不变
+    assert (
+        rental.update_rental(
+            booking_db, rental=first, rental_in=RentalUpdate(end_time=hours(9))
+        )
+        is None
+    )
+    booking_db.refresh(first)
+    assert first.end_time == hours(8)
+    assert not availability_index.is_free(scooter.id, hours(7), hours(8))
+    assert availability_index.is_free(scooter.id, hours(2), hours(4))
+
+    # 与自身的时间段不算重叠
+    assert (
+        rental.update_rental(
+            booking_db, rental=first, rental_in=RentalUpdate(start_time=hours(2))
+        )
+        is not None
+    )
+    assert not availability_index.is_free(scooter.id, hours(2), hours(4))
+
+    # 取消后再恢复为进行中时同样检查重叠
+    rental.update_rental(
+        booking_db, rental=second, rental_in=RentalUpdate(status="cancelled")
+    )
+    rental.update_rental(
+        booking_db, rental=first, rental_in=RentalUpdate(end_time=hours(10))
+    )
+    assert (
+        rental.update_rental(
+            booking_db, rental=second, rental_in=RentalUpdate(status="active")
+        )
+        is None
+    )
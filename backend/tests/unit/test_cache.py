@@ -0,0 +1,45 @@
+from app.core import cache
+from app.core.cache import LRUCache
+
+
+def test_lru_evicts_least_recently_used():
+    lru = LRUCache(maxsize=2)
+    lru.set("a", 1)
+    lru.set("b", 2)
+    assert lru.get("a") == 1
+
+    lru.set("c", 3)
+
+    assert lru.get("b") is None
+    assert lru.get("a") == 1
+    assert lru.get("c") == 3
+    assert len(lru) == 2
+
+
+def test_ttl_expires_entries(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+    lru = LRUCache()
+    lru.set("short", 1, ttl=60)
+    lru.set("forever", 2)
+
+    now[0] += 59
+    assert lru.get("short") == 1
+
+    now[0] += 1
+    assert lru.get("short") is None
+    assert lru.get("short", "missing") == "missing"
+    assert lru.get("forever") == 2
+
+
+def test_invalidate_by_predicate():
+    lru = LRUCache()
+    for start, end in [(1, 3), (4, 6), (2, 5)]:
+        lru.set((start, end), f"{start}-{end}")
+
+    removed = lru.invalidate(lambda key: key[0] <= 3 <= key[1])
+
+    assert removed == 2
+    assert lru.get((4, 6)) == "4-6"
+    lru.clear()
+    assert len(lru) == 0
@@ -0,0 +1,75 @@
+import pytest
+
+from app.core.clusters import MAX_ZOOM, TileClusters, mercator, tile_range
+from app.core.spatial import SpatialIndex
+
+
+def tile_of(lat: float, lng: float, zoom: int):
+    x, y = mercator(lat, lng)
+    return int(x * (1 << zoom)), int(y * (1 << zoom))
+
+
+def test_mercator_tiles():
+    assert tile_of(0.0001, 0.0001, 1) == (1, 0)
+    assert tile_of(-0.0001, -0.0001, 1) == (0, 1)
+    # 超出 Web Mercator 范围的坐标落在边缘的瓦片上
+    assert tile_of(89.9, 180, 3) == (7, 0)
+    assert tile_of(-89.9, -180, 3) == (0, 7)
+
+    xs, ys = tile_range(116.3, 39.8, 116.5, 40.0, 12)
+    assert (xs[0], ys[0]) == tile_of(40.0, 116.3, 12)
+    assert (xs[-1], ys[-1]) == tile_of(39.8, 116.5, 12)
+
+
+def test_clusters_aggregate_per_zoom():
+    clusters = TileClusters()
+    clusters.add(39.9, 116.4, "available")
+    clusters.add(39.9002, 116.4002, "in_use")
+    clusters.add(-33.9, 151.2, "available")
+
+    # 缩放级别 0 只有一个瓦片，北京和悉尼在不同的格子里
+    world = clusters.tile(0, 0, 0)
+    assert sorted((c.count, c.available) for c in world) == [(1, 1), (2, 1)]
+    beijing = next(c for c in world if c.count == 2)
+    assert beijing.lat == pytest.approx(39.9001)
+    assert beijing.lng == pytest.approx(116.4001)
+
+    # 缩放级别足够大时两辆车分开
+    x, y = tile_of(39.9, 116.4, MAX_ZOOM)
+    assert [c.count for c in clusters.tile(MAX_ZOOM, x, y)] == [1]
+
+    assert clusters.tile(5, 0, 0) == []
+
+
+def test_cached_tiles_invalidated_on_change():
+    clusters = TileClusters()
+    clusters.add(39.9, 116.4, "available")
+    x, y = tile_of(39.9, 116.4, 10)
+    first = clusters.tile(10, x, y)
+    assert clusters.tile(10, x, y) is first
+
+    clusters.remove(39.9, 116.4, "available")
+    clusters.add(39.9, 116.4, "in_use")
+    assert [(c.count, c.available) for c in clusters.tile(10, x, y)] == [(1, 0)]
+
+    clusters.remove(39.9, 116.4, "in_use")
+    assert clusters.tile(10, x, y) == []
+    assert clusters.tile(0, 0, 0) == []
+
+
+def test_spatial_index_maintains_clusters():
+    index = SpatialIndex(clusters=TileClusters())
+    index.upsert(1, {"lat": 39.9, "lng": 116.4}, "available")
+    index.upsert(2, {"lat": 39.9, "lng": 116.4}, "available")
+
+    index.set_status(1, "in_use")
+    assert [(c.count, c.available) for c in index.clusters.tile(0, 0, 0)] == [(2, 1)]
+
+    index.upsert(2, {"lat": -33.9, "lng": 151.2}, "available")
+    assert sorted((c.count, c.available) for c in index.clusters.tile(0, 0, 0)) == [
+        (1, 0),
+        (1, 1),
+    ]
+
+    index.remove_many([1, 2])
+    assert index.clusters.tile(0, 0, 0) == []
@@ -0,0 +1,93 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.metrics import UNMATCHED_ROUTE, registry, track_external_call
+from app.main import app
+
+# 只请求不访问数据库的路由，不需要启动应用的后台任务
+client = TestClient(app)
+
+
+def sample(name: str, **labels) -> float:
+    return registry.get_sample_value(name, labels) or 0.0
+
+
+def test_requests_labelled_by_route_template():
+    route = "/api/v1/scooters/{scooter_id}"
+    before = sample("http_requests_total", method="GET", route=route, status="422")
+    unmatched = sample(
+        "http_requests_total", method="GET", route=UNMATCHED_ROUTE, status="404"
+    )
+
+    # 路径参数校验失败，不会访问数据库
+    client.get("/api/v1/scooters/abc")
+    client.get("/api/v1/scooters/def")
+    client.get("/no-such-path/1")
+
+    assert (
+        sample("http_requests_total", method="GET", route=route, status="422")
+        == before + 2
+    )
+    assert (
+        sample(
+            "http_request_duration_seconds_count",
+            method="GET",
+            route=route,
+            status="422",
+        )
+        >= 2
+    )
+    assert (
+        sample("http_requests_total", method="GET", route=UNMATCHED_ROUTE, status="404")
+        == unmatched + 1
+    )
+    assert sample("http_requests_in_progress", method="GET") == 0
+
+
+def test_metrics_endpoint_prometheus_format():
+    client.get("/")
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "# TYPE http_request_duration_seconds histogram" in response.text
+    assert 'http_requests_total{method="GET",route="/",status="200"}' in response.text
+    assert "db_pool_checkouts_total" in response.text
+
+
+def test_pool_checkouts_counted(db: Session):
+    before = sample("db_pool_checkouts_total")
+
+    with db.get_bind().engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+
+    assert sample("db_pool_checkouts_total") == before + 1
+
+
+def test_external_call_outcomes():
+    before_ok = sample(
+        "external_call_duration_seconds_count", service="smtp", outcome="ok"
+    )
+    before_error = sample(
+        "external_call_duration_seconds_count", service="smtp", outcome="error"
+    )
+
+    with track_external_call("smtp"):
+        pass
+    with pytest.raises(ConnectionError):
+        with track_external_call("smtp"):
+            raise ConnectionError
+    with track_external_call("smtp") as call:
+        call.outcome = "error"
+
+    assert (
+        sample("external_call_duration_seconds_count", service="smtp", outcome="ok")
+        == before_ok + 1
+    )
+    assert (
+        sample("external_call_duration_seconds_count", service="smtp", outcome="error")
+        == before_error + 2
+    )
@@ -0,0 +1,72 @@
+import pytest
+from sqlalchemy.orm import Session
+
+from app.core.pagination import Page, decode_cursor, encode_cursor
+from app.crud.payment import payment
+from app.models.payment import Payment, PaymentMethod, PaymentStatus
+
+
+def add_payments(db: Session, count: int, user_id: int = 1):
+    db.add_all(
+        Payment(
+            user_id=user_id,
+            amount=float(i),
+            status=PaymentStatus.COMPLETED,
+            payment_method=PaymentMethod.CARD,
+        )
+        for i in range(count)
+    )
+    db.commit()
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor(12345)
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == 12345
+
+
+@pytest.mark.parametrize("cursor", ["", "not-a-cursor", encode_cursor(1)[:-2], "W10"])
+def test_decode_invalid_cursor(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+def test_page_is_a_list():
+    page = Page([1, 2], next_cursor="abc")
+    assert page == [1, 2]
+    assert page.next_cursor == "abc"
+    assert Page().next_cursor is None
+
+
+def test_keyset_pages_cover_all_rows(db: Session):
+    add_payments(db, 7)
+    add_payments(db, 2, user_id=2)
+
+    seen = []
+    after_id = None
+    while True:
+        page = payment.get_by_user(db, user_id=1, limit=3, after_id=after_id)
+        seen.extend(p.amount for p in page)
+        if page.next_cursor is None:
+            break
+        after_id = decode_cursor(page.next_cursor)
+
+    assert seen == [float(i) for i in range(7)]
+
+
+def test_last_full_page_has_no_cursor(db: Session):
+    add_payments(db, 3)
+
+    page = payment.get_multi(db, limit=3)
+
+    assert len(page) == 3
+    assert page.next_cursor is None
+
+
+def test_skip_still_supported(db: Session):
+    add_payments(db, 5)
+
+    page = payment.get_by_user(db, user_id=1, skip=2, limit=2)
+
+    assert [p.amount for p in page] == [2.0, 3.0]
+    assert decode_cursor(page.next_cursor) == page[-1].id
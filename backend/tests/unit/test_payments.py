@@ -1,6 +1,16 @@
+import csv
+import io
+import json
+from datetime import datetime, timedelta
+
+import pyarrow as pa
 from sqlalchemy.orm import Session
 
+from app.core.export import EXPORT_COLUMNS, iter_arrow, iter_csv, iter_ndjson
 from app.crud.payment import payment
+from app.models.payment import Payment
+from app.models.rental import Rental
+from app.schemas.rental import RentalStatus
 from app.schemas.payment import PaymentCreate
 from app.models.payment import PaymentStatus, PaymentMethod
 from app.core.payment import process_payment
@@ -185,3 +195,90 @@ def test_process_payment_function():
 
     assert zero_amount_result["success"] is False
     assert zero_amount_result["status"] == PaymentStatus.FAILED
+
+
+def add_export_payments(db: Session, count: int, start: datetime, user_id: int = 1):
+    for i in range(count):
+        rental = Rental(
+            user_id=user_id,
+            scooter_id=1,
+            start_time=start + timedelta(minutes=i),
+            end_time=start + timedelta(minutes=i + 60),
+            status=RentalStatus.PAID,
+            cost=10.0 + i,
+        )
+        db.add(rental)
+        db.flush()
+        db.add(
+            Payment(
+                user_id=user_id,
+                rental_id=rental.id,
+                amount=10.0 + i,
+                status=PaymentStatus.COMPLETED,
+                payment_method=PaymentMethod.CARD,
+                created_at=start + timedelta(minutes=i + 60),
+            )
+        )
+    db.commit()
+
+
+def test_iter_export_batches(db: Session):
+    """测试按批次导出日期范围内的支付记录"""
+    start = datetime(2025, 4, 10)
+    add_export_payments(db, 25, start)
+    # 范围之外的支付记录
+    add_export_payments(db, 3, start + timedelta(days=2))
+
+    batches = list(
+        payment.iter_export_batches(
+            db, start=start, end=start + timedelta(days=1), batch_size=10
+        )
+    )
+
+    assert [len(batch) for batch in batches] == [10, 10, 5]
+    rows = [row for batch in batches for row in batch]
+    assert [row.amount for row in rows] == [10.0 + i for i in range(25)]
+    assert rows[0].rental_status == RentalStatus.PAID
+    assert rows[0].rental_start_time == start
+
+
+def test_iter_export_batches_for_user(db: Session):
+    """测试只导出指定用户的支付记录"""
+    start = datetime(2025, 4, 10)
+    add_export_payments(db, 3, start, user_id=1)
+    add_export_payments(db, 2, start, user_id=2)
+
+    batches = payment.iter_export_batches(
+        db, start=start, end=start + timedelta(days=1), user_id=2
+    )
+
+    rows = [row for batch in batches for row in batch]
+    assert [row.user_id for row in rows] == [2, 2]
+
+
+def test_export_formats(db: Session):
+    """测试CSV、NDJSON和Arrow导出的内容一致"""
+    start = datetime(2025, 4, 10)
+    add_export_payments(db, 5, start)
+
+    def batches():
+        return payment.iter_export_batches(
+            db, start=start, end=start + timedelta(days=1), batch_size=2
+        )
+
+    csv_rows = list(csv.DictReader(io.StringIO(b"".join(iter_csv(batches())).decode())))
+    ndjson_rows = [
+        json.loads(line)
+        for line in b"".join(iter_ndjson(batches())).decode().splitlines()
+    ]
+    table = pa.ipc.open_stream(b"".join(iter_arrow(batches()))).read_all()
+
+    assert list(csv_rows[0]) == EXPORT_COLUMNS
+    assert table.column_names == EXPORT_COLUMNS
+    assert len(csv_rows) == len(ndjson_rows) == table.num_rows == 5
+    assert [float(row["amount"]) for row in csv_rows] == table["amount"].to_pylist()
+    assert ndjson_rows[0]["payment_status"] == "completed"
+    assert ndjson_rows[0]["rental_start_time"] == start.isoformat()
+    assert csv_rows[0]["rental_period"] == ""
+    assert table["rental_status"].to_pylist() == ["paid"] * 5
+    assert table["payment_created_at"][0].as_py() == start + timedelta(minutes=60)
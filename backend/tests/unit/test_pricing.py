@@ -0,0 +1,145 @@
+import pytest
+from sqlalchemy.orm import Session
+
+from app.core import pricing
+from app.core.pricing import (
+    PricingCache,
+    PricingSnapshot,
+    pricing_cache,
+    quote_costs,
+    user_discount,
+)
+from app.crud.rental_config import rental_config
+from app.crud.scooter_price import scooter_price
+from app.models.user import User
+from app.schemas.rental import RentalPeriod
+from app.schemas.rental_config import RentalConfigCreate
+from app.schemas.scooter_price import ScooterPriceCreate
+
+
+def seed_pricing(db: Session):
+    rental_config.create_with_deactivate_others(
+        db=db,
+        obj_in=RentalConfigCreate(
+            base_hourly_rate=20.0, period_discounts={"1hr": 1.0, "4hrs": 0.9}
+        ),
+    )
+    scooter_price.create(
+        db, obj_in=ScooterPriceCreate(model="Pricing Model", price_per_hour=2.0)
+    )
+
+
+def test_cached_snapshot_skips_queries(db: Session, count_queries):
+    seed_pricing(db)
+    cache = PricingCache(ttl=60)
+
+    snapshot = cache.get(db)
+    assert snapshot.base_hourly_rate == 20.0
+    assert snapshot.period_discounts == {"1hr": 1.0, "4hrs": 0.9}
+    assert snapshot.price_per_hour["Pricing Model"] == 2.0
+
+    count_queries.clear()
+    assert cache.get(db) is snapshot
+    assert count_queries == []
+
+
+def test_writes_bump_version_and_reload(db: Session):
+    seed_pricing(db)
+    before = pricing_cache.get(db)
+
+    price = scooter_price.get_by_model(db, model="Pricing Model")
+    scooter_price.update(db, db_obj=price, obj_in={"price_per_hour": 3.5})
+
+    after = pricing_cache.get(db)
+    assert after is not before
+    assert after.version > before.version
+    assert after.price_per_hour["Pricing Model"] == 3.5
+
+
+def test_single_writes_bump_version_after_commit(db: Session):
+    seed_pricing(db)
+    version = pricing_cache.version
+    price = scooter_price.get_by_model(db, model="Pricing Model")
+
+    scooter_price.update(db, db_obj=price, obj_in={"price_per_hour": 4.0}, commit=False)
+    assert pricing_cache.version == version
+    db.commit()
+    assert pricing_cache.version == version + 1
+
+
+def test_batch_writes_bump_version_after_commit(db: Session):
+    version = pricing_cache.version
+    created = scooter_price.create_many(
+        db,
+        objs_in=[
+            ScooterPriceCreate(model=f"Batch {i}", price_per_hour=1.0 + i)
+            for i in range(3)
+        ],
+    )
+    assert [p.price_per_hour for p in created] == [1.0, 2.0, 3.0]
+    assert pricing_cache.version == version + 1
+
+    # 提交之前不会使缓存失效
+    scooter_price.update_many(
+        db, objs_in=[{"id": created[0].id, "price_per_hour": 9.0}], commit=False
+    )
+    assert pricing_cache.version == version + 1
+    db.commit()
+    assert pricing_cache.version == version + 2
+    assert pricing_cache.get(db).price_per_hour["Batch 0"] == 9.0
+
+    scooter_price.remove_many(db, ids=[p.id for p in created])
+    assert pricing_cache.version == version + 3
+    assert pricing_cache.get(db).price_per_hour == {}
+
+
+def test_snapshot_expires_after_ttl(db: Session, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(pricing.time, "monotonic", lambda: now[0])
+    seed_pricing(db)
+    cache = PricingCache(ttl=30)
+
+    snapshot = cache.get(db)
+    now[0] += 29
+    assert cache.get(db) is snapshot
+
+    now[0] += 1
+    assert cache.get(db) is not snapshot
+
+
+def test_snapshot_without_active_config(db: Session):
+    snapshot = PricingCache(ttl=60).get(db)
+    assert not snapshot.has_active_config
+    assert snapshot.period_discounts == {}
+
+
+def test_user_discount():
+    assert user_discount(User(age=65)) == (0.8, "old")
+    assert user_discount(User(age=20, school="UCL")) == (0.9, "student")
+    assert user_discount(User(age=20)) == (1.0, "none")
+    assert user_discount(User()) == (1.0, "none")
+
+
+def test_quote_costs_matches_single_rental_pricing():
+    snapshot = PricingSnapshot(
+        version=0,
+        base_hourly_rate=20.0,
+        period_discounts={"1hr": 1.0, "4hrs": 0.9, "1day": 0.8, "1week": 0.7},
+        price_per_hour={"A": 2.0, "B": 3.0},
+    )
+
+    costs = quote_costs(
+        snapshot,
+        ["A", "B", "A", "B"],
+        [
+            RentalPeriod.ONE_HOUR,
+            RentalPeriod.FOUR_HOURS,
+            RentalPeriod.ONE_DAY,
+            RentalPeriod.ONE_WEEK,
+        ],
+        [1.0, 0.9, 0.8, 1.0],
+    )
+
+    assert costs.tolist() == pytest.approx(
+        [40.0, 4 * 20 * 0.9 * 3 * 0.9, 24 * 20 * 0.8 * 2 * 0.8, 168 * 20 * 0.7 * 3]
+    )
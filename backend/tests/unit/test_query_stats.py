@@ -0,0 +1,84 @@
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from loguru import logger
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.query_stats import (
+    QUERY_COUNT_HEADER,
+    QUERY_TIME_HEADER,
+    QueryStats,
+    QueryStatsMiddleware,
+    statement_shape,
+    track_queries,
+)
+
+
+def test_statement_shape_ignores_param_count_and_whitespace():
+    assert statement_shape("SELECT *\n  FROM t WHERE id IN (?, ?, ?)") == (
+        "SELECT * FROM t WHERE id IN (?)"
+    )
+    assert statement_shape("SELECT * FROM t WHERE id IN (%(id_1)s)") == (
+        "SELECT * FROM t WHERE id IN (?)"
+    )
+    assert statement_shape("SELECT count(id) FROM t") == "SELECT count(id) FROM t"
+
+
+def test_repeated_shapes_above_threshold():
+    stats = QueryStats()
+    for _ in range(3):
+        stats.record("SELECT * FROM users WHERE id = ?", 0.001)
+    stats.record("SELECT * FROM feedbacks", 0.002)
+
+    assert stats.count == 4
+    assert stats.repeated(2) == [("SELECT * FROM users WHERE id = ?", 3)]
+    assert stats.repeated(3) == []
+    assert stats.repeated(0) == []
+
+
+def test_track_queries_counts_current_context(db: Session):
+    with track_queries() as stats:
+        db.execute(text("SELECT 1"))
+        db.execute(text("SELECT 2"))
+    db.execute(text("SELECT 3"))
+
+    assert stats.count == 2
+    assert stats.duration > 0
+
+
+def test_middleware_headers_and_n_plus_one_warning(db: Session):
+    app = FastAPI()
+    app.add_middleware(QueryStatsMiddleware, threshold=2, expose_headers=True)
+
+    # 同步接口在线程池中执行，统计仍然要计入本次请求
+    @app.get("/lazy")
+    def lazy(db: Session = Depends(lambda: db)):
+        for i in range(3):
+            db.execute(text("SELECT :i"), {"i": i})
+        return {}
+
+    warnings = []
+    sink = logger.add(warnings.append, level="WARNING", format="{message}")
+    try:
+        response = TestClient(app).get("/lazy")
+    finally:
+        logger.remove(sink)
+
+    assert response.headers[QUERY_COUNT_HEADER] == "3"
+    assert float(response.headers[QUERY_TIME_HEADER]) >= 0
+    assert len(warnings) == 1
+    assert "GET /lazy" in warnings[0] and "executed 3 times" in warnings[0]
+
+
+def test_middleware_hides_headers_outside_debug(db: Session):
+    app = FastAPI()
+    app.add_middleware(QueryStatsMiddleware, threshold=10, expose_headers=False)
+
+    @app.get("/")
+    def read(db: Session = Depends(lambda: db)):
+        db.execute(text("SELECT 1"))
+        return {}
+
+    response = TestClient(app).get("/")
+
+    assert QUERY_COUNT_HEADER not in response.headers
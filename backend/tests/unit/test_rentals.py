@@ -1,6 +1,9 @@
-from datetime import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
 
-from sqlalchemy.orm import Session
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session, sessionmaker
 
 
 from app.crud.rental import rental
@@ -11,6 +14,10 @@ from app.models.rental import Rental
 
 from app.models.scooter import Scooter
 
+from app.db.session import Base
+
+from app.schemas.rental import RentalStatus
+
 
 def test_create_rental(db: Session):
     # 创建一个滑板车
@@ -178,6 +185,25 @@ def test_update_rental(db: Session):
     assert updated_rental.user_id == rental_in.user_id
 
 
+def test_update_rental_status(db: Session):
+    scooter = Scooter(model="Test Model", status="available")
+    db.add(scooter)
+    db.commit()
+    rental_in = RentalCreate(
+        scooter_id=scooter.id, user_id=1, rental_period="1hr", status="active"
+    )
+    db_rental = rental.create_with_scooter(
+        db=db, rental_in=rental_in, user_id=1, cost=10.0, start_time=datetime.now()
+    )
+
+    updated_rental = rental.update_rental_status(
+        db, rental=db_rental, status=RentalStatus.PAID
+    )
+
+    assert updated_rental is db_rental
+    assert updated_rental.status == RentalStatus.PAID
+
+
 def test_delete_rental(db: Session):
     # 创建测试数据
 
@@ -210,3 +236,128 @@ def test_delete_rental(db: Session):
     fetched_rental = rental.get_by_id(db=db, rental_id=created_rental.id)
 
     assert fetched_rental is None
+
+
+def test_check_expired_rentals(db: Session):
+    now = datetime(2025, 4, 10, 12, 0)
+    scooters = [
+        Scooter(model="Test Model", status="in_use"),
+        Scooter(model="Test Model", status="in_use"),
+        Scooter(model="Test Model", status="maintenance"),
+        Scooter(model="Test Model", status="in_use"),
+    ]
+    db.add_all(scooters)
+    db.flush()
+    expired, active, maintenance, reused = scooters
+
+    def add_rental(scooter, end_time, status=RentalStatus.ACTIVE):
+        db_rental = Rental(
+            user_id=1,
+            scooter_id=scooter.id,
+            start_time=end_time - timedelta(hours=4),
+            end_time=end_time,
+            status=status,
+        )
+        db.add(db_rental)
+        return db_rental
+
+    overdue = add_rental(expired, now - timedelta(minutes=5))
+    on_time = add_rental(active, now + timedelta(hours=1))
+    # 处于维护中的滑板车不应被释放
+    add_rental(maintenance, now - timedelta(hours=1))
+    # 同一辆车还有进行中的租赁时不释放
+    add_rental(reused, now - timedelta(hours=1))
+    add_rental(reused, now + timedelta(hours=1))
+    add_rental(expired, now - timedelta(days=1), status=RentalStatus.COMPLETED)
+    db.commit()
+
+    statements = []
+
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = db.get_bind().engine
+    event.listen(engine, "before_cursor_execute", count_statement)
+    try:
+        result = rental.check_expired_rentals(db, now=now)
+    finally:
+        event.remove(engine, "before_cursor_execute", count_statement)
+
+    assert result == (3, 1)
+    # 结束租赁、更新滑板车变更序号、释放滑板车
+    assert len(statements) == 3
+    db.refresh(overdue)
+    db.refresh(on_time)
+    assert overdue.status == RentalStatus.COMPLETED
+    assert overdue.end_time == now - timedelta(minutes=5)
+    assert on_time.status == RentalStatus.ACTIVE
+    for scooter in scooters:
+        db.refresh(scooter)
+    assert [scooter.status for scooter in scooters] == [
+        "available",
+        "in_use",
+        "maintenance",
+        "in_use",
+    ]
+
+
+def test_check_expired_rentals_nothing_due(db: Session):
+    assert rental.check_expired_rentals(db, now=datetime(2000, 1, 1)) == (0, 0)
+
+
+def test_create_with_scooter_unavailable(db: Session):
+    scooter = Scooter(model="Test Model", status="in_use")
+    db.add(scooter)
+    db.commit()
+    rental_in = RentalCreate(scooter_id=scooter.id, rental_period="1hr")
+
+    created = rental.create_with_scooter(
+        db=db, rental_in=rental_in, user_id=1, cost=10.0, start_time=datetime.now()
+    )
+
+    assert created is None
+    assert rental.get_user_rentals(db=db, user_id=1) == []
+
+
+def test_concurrent_bookings_reserve_scooter_once(tmp_path):
+    """数百个并发请求预订同一辆滑板车，只有一个成功"""
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'bookings.db'}",
+        connect_args={"check_same_thread": False, "timeout": 60},
+        pool_size=50,
+    )
+    Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    with SessionLocal() as db:
+        scooter = Scooter(model="Test Model", status="available")
+        db.add(scooter)
+        db.commit()
+        scooter_id = scooter.id
+
+    attempts = 200
+    barrier = threading.Barrier(50)
+
+    def book(user_id):
+        with SessionLocal() as db:
+            if user_id < 50:
+                barrier.wait()
+            rental_in = RentalCreate(scooter_id=scooter_id, rental_period="1hr")
+            created = rental.create_with_scooter(
+                db=db,
+                rental_in=rental_in,
+                user_id=user_id,
+                cost=10.0,
+                start_time=datetime.now(),
+            )
+            return created is not None
+
+    try:
+        with ThreadPoolExecutor(max_workers=50) as executor:
+            results = list(executor.map(book, range(attempts)))
+
+        assert results.count(True) == 1
+        with SessionLocal() as db:
+            assert db.query(Rental).count() == 1
+            assert db.get(Scooter, scooter_id).status == "in_use"
+    finally:
+        engine.dispose()
@@ -0,0 +1,577 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core.availability import availability_index
+from app.core.config import settings
+from app.core.spatial import scooter_index
+from app.crud.rental import rental as crud_rental
+from app.crud.scooter import scooter as crud_scooter
+from app.db.session import Base
+from app.crud.revenue_stats import covers_range, pick_granularity, revenue_stats
+from app.models.payment import Payment, PaymentMethod, PaymentStatus
+from app.models.rental import Rental
+from app.models.scooter import Scooter
+from app.schemas.rental import RentalPeriod, RentalStatus
+from app.schemas.revenue_stats import RevenueGranularity
+
+STATS_DATE = date(2025, 4, 10)
+
+
+def legacy_daily_stats(db: Session, stats_date: date) -> dict:
+    """原先逐条查询租赁记录并在Python中分类的实现，用作对照"""
+    start_of_day = datetime.combine(stats_date, datetime.min.time())
+    end_of_day = datetime.combine(stats_date, datetime.max.time())
+    payments = (
+        db.query(Payment)
+        .filter(
+            Payment.status == PaymentStatus.COMPLETED,
+            Payment.created_at >= start_of_day,
+            Payment.created_at <= end_of_day,
+        )
+        .all()
+    )
+
+    total_revenue = 0.0
+    rental_count = 0
+    revenue_by_period = {
+        period.value: {"count": 0, "revenue": 0.0} for period in RentalPeriod
+    }
+    for payment in payments:
+        rental = db.query(Rental).filter(Rental.id == payment.rental_id).first()
+        if rental and rental.status in [RentalStatus.COMPLETED, RentalStatus.PAID]:
+            total_revenue += payment.amount
+            rental_count += 1
+            if rental.end_time and rental.start_time:
+                duration_hours = (
+                    rental.end_time - rental.start_time
+                ).total_seconds() / 3600
+                if duration_hours <= 1.5:
+                    rental_period = RentalPeriod.ONE_HOUR.value
+                elif duration_hours <= 5:
+                    rental_period = RentalPeriod.FOUR_HOURS.value
+                elif duration_hours <= 25:
+                    rental_period = RentalPeriod.ONE_DAY.value
+                else:
+                    rental_period = RentalPeriod.ONE_WEEK.value
+                revenue_by_period[rental_period]["count"] += 1
+                revenue_by_period[rental_period]["revenue"] += payment.amount
+
+    return {
+        "total_revenue": total_revenue,
+        "rental_count": rental_count,
+        "revenue_by_period": revenue_by_period,
+    }
+
+
+def add_paid_rental(
+    db: Session,
+    *,
+    hours,
+    amount: float,
+    paid_at: datetime,
+    rental_status: RentalStatus = RentalStatus.PAID,
+    payment_status: PaymentStatus = PaymentStatus.COMPLETED,
+) -> Payment:
+    start_time = paid_at - timedelta(hours=1)
+    rental = Rental(
+        user_id=1,
+        scooter_id=1,
+        start_time=start_time,
+        end_time=start_time + timedelta(hours=hours) if hours is not None else None,
+        status=rental_status,
+        cost=amount,
+    )
+    db.add(rental)
+    db.flush()
+    payment = Payment(
+        user_id=1,
+        rental_id=rental.id,
+        amount=amount,
+        status=payment_status,
+        payment_method=PaymentMethod.CARD,
+        created_at=paid_at,
+    )
+    db.add(payment)
+    db.flush()
+    return payment
+
+
+@pytest.fixture(autouse=True)
+def clear_summary_cache():
+    # 每个测试的数据都会回滚，缓存的汇总不能跨测试使用
+    revenue_stats.summary_cache.clear()
+    yield
+    revenue_stats.summary_cache.clear()
+
+
+@pytest.fixture
+def revenue_data(db: Session):
+    noon = datetime.combine(STATS_DATE, datetime.min.time()) + timedelta(hours=12)
+    add_paid_rental(db, hours=1, amount=10.0, paid_at=noon)
+    add_paid_rental(db, hours=1.2, amount=12.5, paid_at=noon)
+    add_paid_rental(db, hours=4, amount=36.0, paid_at=noon)
+    add_paid_rental(db, hours=24, amount=160.0, paid_at=noon)
+    add_paid_rental(db, hours=168, amount=840.0, paid_at=noon)
+    add_paid_rental(
+        db, hours=4, amount=36.0, paid_at=noon, rental_status=RentalStatus.COMPLETED
+    )
+    # 没有结束时间：计入总数但不参与分类
+    add_paid_rental(db, hours=None, amount=5.0, paid_at=noon)
+    # 以下记录不应被统计
+    add_paid_rental(
+        db, hours=1, amount=99.0, paid_at=noon, rental_status=RentalStatus.ACTIVE
+    )
+    add_paid_rental(
+        db, hours=1, amount=99.0, paid_at=noon, payment_status=PaymentStatus.PENDING
+    )
+    add_paid_rental(db, hours=1, amount=99.0, paid_at=noon + timedelta(days=1))
+    db.commit()
+
+
+def assert_stats_match(stats, expected: dict):
+    assert stats.total_revenue == pytest.approx(expected["total_revenue"])
+    assert stats.rental_count == expected["rental_count"]
+    assert set(stats.revenue_by_period) == set(expected["revenue_by_period"])
+    for period, data in expected["revenue_by_period"].items():
+        assert stats.revenue_by_period[period]["count"] == data["count"]
+        assert stats.revenue_by_period[period]["revenue"] == pytest.approx(
+            data["revenue"]
+        )
+
+
+def test_daily_stats_matches_legacy_implementation(db: Session, revenue_data):
+    expected = legacy_daily_stats(db, STATS_DATE)
+    stats = revenue_stats.create_or_update_daily_stats(db, stats_date=STATS_DATE)
+
+    assert_stats_match(stats, expected)
+    assert stats.rental_count == 7
+    assert stats.revenue_by_period["1hr"]["count"] == 2
+    assert stats.revenue_by_period["4hrs"]["count"] == 2
+
+
+def test_daily_stats_empty_day(db: Session):
+    empty_date = STATS_DATE - timedelta(days=30)
+    stats = revenue_stats.create_or_update_daily_stats(db, stats_date=empty_date)
+
+    assert_stats_match(stats, legacy_daily_stats(db, empty_date))
+    assert stats.total_revenue == 0.0
+    assert stats.rental_count == 0
+
+
+def test_daily_stats_update_existing(db: Session, revenue_data):
+    revenue_stats.create_or_update_daily_stats(db, stats_date=STATS_DATE)
+    noon = datetime.combine(STATS_DATE, datetime.min.time()) + timedelta(hours=12)
+    add_paid_rental(db, hours=1, amount=20.0, paid_at=noon)
+    db.commit()
+
+    stats = revenue_stats.create_or_update_daily_stats(db, stats_date=STATS_DATE)
+
+    assert_stats_match(stats, legacy_daily_stats(db, STATS_DATE))
+    assert stats.revenue_by_period["1hr"]["count"] == 3
+
+
+def test_backfill_date_range_uses_constant_number_of_queries(db: Session, revenue_data):
+    statements = []
+
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = db.get_bind().engine
+    event.listen(engine, "before_cursor_execute", count_statement)
+    try:
+        daily_stats = revenue_stats.backfill_date_range(
+            db,
+            start_date=STATS_DATE - timedelta(days=59),
+            end_date=STATS_DATE + timedelta(days=5),
+        )
+    finally:
+        event.remove(engine, "before_cursor_execute", count_statement)
+
+    assert len(daily_stats) == 65
+    assert [s.date for s in daily_stats] == sorted(s.date for s in daily_stats)
+    # 读取已有数据 + 一次分组聚合 + 批量写入 + 重新读取，与天数无关
+    assert len(statements) <= 5
+    by_date = {s.date: s for s in daily_stats}
+    assert_stats_match(by_date[STATS_DATE], legacy_daily_stats(db, STATS_DATE))
+    next_day = STATS_DATE + timedelta(days=1)
+    assert_stats_match(by_date[next_day], legacy_daily_stats(db, next_day))
+
+
+def test_backfill_keeps_existing_rows(db: Session, revenue_data):
+    existing = revenue_stats.create_or_update_daily_stats(db, stats_date=STATS_DATE)
+    existing_id = existing.id
+
+    daily_stats = revenue_stats.backfill_date_range(
+        db,
+        start_date=STATS_DATE - timedelta(days=1),
+        end_date=STATS_DATE + timedelta(days=1),
+    )
+
+    assert len(daily_stats) == 3
+    assert daily_stats[1].id == existing_id
+
+
+def test_weekly_and_custom_stats_share_summary(db: Session, revenue_data):
+    end_date = STATS_DATE + timedelta(days=2)
+    weekly = revenue_stats.generate_weekly_stats(db, end_date=end_date)
+    custom = revenue_stats.generate_custom_period_stats(
+        db, start_date=end_date - timedelta(days=6), end_date=end_date
+    )
+
+    assert weekly == custom
+    assert len(weekly.daily_stats) == 7
+    expected_total = legacy_daily_stats(db, STATS_DATE)["total_revenue"] + 99.0
+    assert weekly.total_revenue == pytest.approx(expected_total)
+    assert weekly.total_rentals == 8
+    assert weekly.daily_average == pytest.approx(expected_total / 7)
+    assert weekly.revenue_by_period["1hr"].count == 3
+    assert weekly.revenue_by_period["1hr"].average_daily == pytest.approx(
+        (10.0 + 12.5 + 99.0) / 7
+    )
+
+
+def test_custom_stats_swaps_reversed_dates(db: Session):
+    summary = revenue_stats.generate_custom_period_stats(
+        db, start_date=STATS_DATE, end_date=STATS_DATE - timedelta(days=2)
+    )
+
+    assert summary.start_date.date() == STATS_DATE - timedelta(days=2)
+    assert summary.end_date.date() == STATS_DATE
+    assert len(summary.daily_stats) == 3
+
+
+def test_apply_payment_creates_missing_day(db: Session, revenue_data):
+    noon = datetime.combine(STATS_DATE, datetime.min.time()) + timedelta(hours=12)
+    payment = add_paid_rental(db, hours=1, amount=20.0, paid_at=noon)
+    db.commit()
+
+    revenue_stats.apply_payment(db, payment=payment, rental=payment.rental)
+
+    stats = revenue_stats.get_by_date(db, date=STATS_DATE)
+    assert_stats_match(stats, legacy_daily_stats(db, STATS_DATE))
+
+
+def test_apply_payment_increments_existing_day(db: Session, revenue_data):
+    revenue_stats.create_or_update_daily_stats(db, stats_date=STATS_DATE)
+    noon = datetime.combine(STATS_DATE, datetime.min.time()) + timedelta(hours=12)
+    one_hour = add_paid_rental(db, hours=1, amount=20.0, paid_at=noon)
+    one_week = add_paid_rental(db, hours=168, amount=700.0, paid_at=noon)
+    db.commit()
+
+    revenue_stats.apply_payment(db, payment=one_hour, rental=one_hour.rental)
+    revenue_stats.apply_payment(db, payment=one_week, rental=one_week.rental)
+
+    stats = revenue_stats.get_by_date(db, date=STATS_DATE)
+    assert_stats_match(stats, legacy_daily_stats(db, STATS_DATE))
+    assert stats.revenue_by_period["1week"]["count"] == 2
+
+
+def test_apply_payment_refund_reverses_payment(db: Session, revenue_data):
+    before = revenue_stats.create_or_update_daily_stats(db, stats_date=STATS_DATE)
+    total_before = before.total_revenue
+    payment = (
+        db.query(Payment)
+        .filter(Payment.amount == 160.0, Payment.status == PaymentStatus.COMPLETED)
+        .first()
+    )
+    payment.status = PaymentStatus.REFUNDED
+    db.commit()
+
+    revenue_stats.apply_payment(db, payment=payment, rental=payment.rental, refund=True)
+
+    stats = revenue_stats.get_by_date(db, date=STATS_DATE)
+    assert_stats_match(stats, legacy_daily_stats(db, STATS_DATE))
+    assert stats.total_revenue == pytest.approx(total_before - 160.0)
+    assert stats.revenue_by_period["1day"] == {"count": 0, "revenue": 0.0}
+
+
+def test_apply_payment_ignores_unpaid_rental(db: Session, revenue_data):
+    before = revenue_stats.create_or_update_daily_stats(db, stats_date=STATS_DATE)
+    total_before = before.total_revenue
+    noon = datetime.combine(STATS_DATE, datetime.min.time()) + timedelta(hours=12)
+    payment = add_paid_rental(
+        db, hours=1, amount=20.0, paid_at=noon, rental_status=RentalStatus.ACTIVE
+    )
+    db.commit()
+
+    revenue_stats.apply_payment(db, payment=payment, rental=payment.rental)
+
+    assert revenue_stats.get_by_date(db, date=STATS_DATE).total_revenue == total_before
+
+
+def test_pick_granularity_uses_coarsest_aligned_buckets():
+    assert pick_granularity(date(2025, 1, 1), date(2025, 3, 31)) == (
+        RevenueGranularity.MONTH
+    )
+    # 2025-04-07 是周一
+    assert pick_granularity(date(2025, 4, 7), date(2025, 4, 20)) == (
+        RevenueGranularity.WEEK
+    )
+    assert pick_granularity(date(2025, 4, 7), date(2025, 4, 13)) == (
+        RevenueGranularity.DAY
+    )
+    assert pick_granularity(STATS_DATE, STATS_DATE) == RevenueGranularity.HOUR
+    assert not covers_range(RevenueGranularity.MONTH, date(2025, 1, 2), STATS_DATE)
+    assert covers_range(RevenueGranularity.HOUR, date(2025, 1, 2), STATS_DATE)
+
+
+@pytest.mark.parametrize(
+    "granularity,start_date,end_date,points",
+    [
+        (RevenueGranularity.HOUR, STATS_DATE, STATS_DATE, 24),
+        (RevenueGranularity.DAY, date(2025, 4, 7), date(2025, 4, 13), 7),
+        (RevenueGranularity.WEEK, date(2025, 4, 7), date(2025, 4, 20), 2),
+        (RevenueGranularity.MONTH, date(2025, 3, 1), date(2025, 4, 30), 2),
+    ],
+)
+def test_series_matches_daily_stats(
+    db: Session, revenue_data, granularity, start_date, end_date, points
+):
+    series = revenue_stats.get_series(
+        db, granularity=granularity, start_date=start_date, end_date=end_date
+    )
+
+    assert len(series.points) == points
+    daily = revenue_stats.generate_custom_period_stats(
+        db, start_date=start_date, end_date=end_date
+    )
+    assert series.total_revenue == pytest.approx(daily.total_revenue)
+    assert series.total_rentals == daily.total_rentals
+
+
+def test_series_buckets(db: Session, revenue_data):
+    hourly = revenue_stats.get_series(
+        db,
+        granularity=RevenueGranularity.HOUR,
+        start_date=STATS_DATE,
+        end_date=STATS_DATE,
+    )
+    by_hour = {point.bucket_start.hour: point for point in hourly.points}
+    assert by_hour[12].rental_count == 7
+    assert sum(point.rental_count for point in hourly.points) == 7
+
+    weekly = revenue_stats.get_series(
+        db,
+        granularity=RevenueGranularity.WEEK,
+        start_date=date(2025, 4, 7),
+        end_date=date(2025, 4, 20),
+    )
+    # 第二天中午的支付与统计日期属于同一周
+    assert [point.rental_count for point in weekly.points] == [8, 0]
+    assert weekly.points[0].revenue_by_period["1hr"].count == 3
+
+
+def series_values(series) -> list:
+    return [
+        (
+            point.bucket_start,
+            round(point.total_revenue, 6),
+            point.rental_count,
+            {
+                period: (data.count, round(data.revenue, 6))
+                for period, data in point.revenue_by_period.items()
+            },
+        )
+        for point in series.points
+    ]
+
+
+def test_apply_payment_keeps_rollups_consistent(db: Session, revenue_data):
+    revenue_stats.create_or_update_daily_stats(db, stats_date=STATS_DATE)
+    noon = datetime.combine(STATS_DATE, datetime.min.time()) + timedelta(hours=12)
+    payments = [
+        add_paid_rental(db, hours=1, amount=20.0, paid_at=noon),
+        # 该整点还没有统计数据，需要从支付记录计算
+        add_paid_rental(db, hours=4, amount=30.0, paid_at=noon + timedelta(hours=3)),
+    ]
+    db.commit()
+    for payment in payments:
+        revenue_stats.apply_payment(db, payment=payment, rental=payment.rental)
+    payments[0].status = PaymentStatus.REFUNDED
+    db.commit()
+    revenue_stats.apply_payment(
+        db, payment=payments[0], rental=payments[0].rental, refund=True
+    )
+
+    series_args = {"start_date": date(2025, 4, 1), "end_date": date(2025, 4, 30)}
+    incremental = {
+        granularity: revenue_stats.get_series(
+            db, granularity=granularity, **series_args
+        )
+        for granularity in RevenueGranularity
+    }
+    # 重新从支付记录计算后结果应一致
+    revenue_stats.create_or_update_daily_stats(db, stats_date=STATS_DATE)
+    for granularity, series in incremental.items():
+        rebuilt = revenue_stats.get_series(db, granularity=granularity, **series_args)
+        assert series_values(series) == series_values(rebuilt)
+        assert series.total_revenue == pytest.approx(
+            legacy_daily_stats(db, STATS_DATE)["total_revenue"] + 99.0
+        )
+
+
+def test_closed_range_summary_is_cached(db: Session, revenue_data):
+    args = {"start_date": STATS_DATE - timedelta(days=6), "end_date": STATS_DATE}
+    first = revenue_stats.generate_custom_period_stats(db, **args)
+
+    statements = []
+
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = db.get_bind().engine
+    event.listen(engine, "before_cursor_execute", count_statement)
+    try:
+        second = revenue_stats.generate_custom_period_stats(db, **args)
+        weekly = revenue_stats.generate_weekly_stats(db, end_date=STATS_DATE)
+    finally:
+        event.remove(engine, "before_cursor_execute", count_statement)
+
+    assert second is first
+    assert weekly is first
+    assert statements == []
+
+
+def test_refresh_and_refund_invalidate_summary(db: Session, revenue_data):
+    args = {"start_date": STATS_DATE, "end_date": STATS_DATE + timedelta(days=1)}
+    other = {
+        "start_date": STATS_DATE - timedelta(days=7),
+        "end_date": STATS_DATE - timedelta(days=1),
+    }
+    before = revenue_stats.generate_custom_period_stats(db, **args)
+    unaffected = revenue_stats.generate_custom_period_stats(db, **other)
+
+    # 刷新统计日期之前直接修改数据，缓存仍返回旧结果
+    noon = datetime.combine(STATS_DATE, datetime.min.time()) + timedelta(hours=12)
+    add_paid_rental(db, hours=1, amount=20.0, paid_at=noon)
+    db.commit()
+    assert revenue_stats.generate_custom_period_stats(db, **args) is before
+
+    revenue_stats.create_or_update_daily_stats(db, stats_date=STATS_DATE)
+    refreshed = revenue_stats.generate_custom_period_stats(db, **args)
+    assert refreshed.total_revenue == pytest.approx(before.total_revenue + 20.0)
+    assert revenue_stats.generate_custom_period_stats(db, **other) is unaffected
+
+    payment = db.query(Payment).filter(Payment.amount == 840.0).first()
+    payment.status = PaymentStatus.REFUNDED
+    db.commit()
+    revenue_stats.apply_payment(db, payment=payment, rental=payment.rental, refund=True)
+
+    refunded = revenue_stats.generate_custom_period_stats(db, **args)
+    assert refunded.total_revenue == pytest.approx(refreshed.total_revenue - 840.0)
+
+
+def test_apply_payment_without_commit_joins_caller_transaction(
+    db: Session, revenue_data
+):
+    args = {"start_date": STATS_DATE, "end_date": STATS_DATE + timedelta(days=1)}
+    before = revenue_stats.generate_custom_period_stats(db, **args)
+    noon = datetime.combine(STATS_DATE, datetime.min.time()) + timedelta(hours=12)
+    payment = add_paid_rental(db, hours=1, amount=20.0, paid_at=noon)
+    db.flush()
+
+    commits = []
+
+    def count_commit(session):
+        commits.append(session)
+
+    event.listen(db, "after_commit", count_commit)
+    try:
+        # 当天还没有统计数据，在保存点中完整计算
+        revenue_stats.apply_payment(
+            db, payment=payment, rental=payment.rental, commit=False
+        )
+        assert commits == []
+        # 提交前缓存不会被清除
+        assert revenue_stats.generate_custom_period_stats(db, **args) is before
+
+        db.commit()
+    finally:
+        event.remove(db, "after_commit", count_commit)
+
+    assert len(commits) == 1
+    after = revenue_stats.generate_custom_period_stats(db, **args)
+    assert after.total_revenue == pytest.approx(before.total_revenue + 20.0)
+    stats = revenue_stats.get_by_date(db, date=STATS_DATE)
+    assert_stats_match(stats, legacy_daily_stats(db, STATS_DATE))
+
+
+def test_range_including_today_expires(db: Session, monkeypatch):
+    ttls = []
+    original_set = revenue_stats.summary_cache.set
+
+    def record_set(key, value, ttl=None):
+        ttls.append(ttl)
+        original_set(key, value, ttl=ttl)
+
+    monkeypatch.setattr(revenue_stats.summary_cache, "set", record_set)
+    today = datetime.utcnow().date()
+    revenue_stats.generate_custom_period_stats(
+        db, start_date=today - timedelta(days=1), end_date=today
+    )
+    revenue_stats.generate_custom_period_stats(
+        db, start_date=today - timedelta(days=2), end_date=today - timedelta(days=1)
+    )
+
+    assert ttls == [settings.REVENUE_SUMMARY_CACHE_TTL, None]
+
+
+@pytest.fixture
+def savepoint_db(tmp_path):
+    """保存点回滚不能发生在外层测试事务中，使用单独的数据库"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'payments.db'}")
+    Base.metadata.create_all(bind=engine)
+    with sessionmaker(autoflush=False, bind=engine)() as db:
+        yield db
+    engine.dispose()
+
+
+def test_savepoint_rollback_keeps_after_commit_callbacks(
+    savepoint_db: Session, monkeypatch
+):
+    db = savepoint_db
+    noon = datetime.combine(STATS_DATE, datetime.min.time()) + timedelta(hours=12)
+    scooter = Scooter(
+        model="Test Model", status="in_use", location={"lat": 39.9, "lng": 116.4}
+    )
+    db.add(scooter)
+    db.flush()
+    payment = add_paid_rental(
+        db, hours=1, amount=20.0, paid_at=noon, rental_status=RentalStatus.ACTIVE
+    )
+    payment.rental.scooter_id = scooter.id
+    db.commit()
+    rental, scooter_id = payment.rental, scooter.id
+    availability_index.add(rental.id, scooter_id, rental.start_time, rental.end_time)
+    scooter_index.upsert(scooter_id, {"lat": 39.9, "lng": 116.4}, "in_use")
+
+    # 第一次创建当天统计时模拟并发冲突，走保存点回滚后重新计算的分支
+    create = revenue_stats.create_or_update_daily_stats
+    conflicts = []
+
+    def conflict_once(*args, **kwargs):
+        if not conflicts:
+            conflicts.append(True)
+            raise IntegrityError("INSERT", {}, Exception("UNIQUE constraint failed"))
+        return create(*args, **kwargs)
+
+    monkeypatch.setattr(revenue_stats, "create_or_update_daily_stats", conflict_once)
+
+    crud_rental.update_rental_status(
+        db, rental=rental, status=RentalStatus.PAID, commit=False
+    )
+    revenue_stats.apply_payment(db, payment=payment, rental=rental, commit=False)
+    crud_scooter.update_scooter_status(
+        db, scooter_id=scooter_id, status="available", commit=False
+    )
+    db.commit()
+
+    assert conflicts
+    assert availability_index.is_free(scooter_id, rental.start_time, rental.end_time)
+    assert scooter_index.nearby(
+        39.9, 116.4, radius=10, k=1, statuses=["available"]
+    ) == [(scooter_id, 0.0)]
@@ -0,0 +1,70 @@
+import asyncio
+
+from app.core.scheduler import PeriodicTask, Scheduler
+
+
+async def test_periodic_task_keeps_running_after_errors():
+    calls = []
+
+    def job():
+        calls.append(len(calls))
+        if len(calls) == 1:
+            raise RuntimeError("boom")
+        return len(calls)
+
+    task = PeriodicTask("job", job, interval=0.01)
+    task.start()
+    for _ in range(200):
+        if len(calls) >= 2:
+            break
+        await asyncio.sleep(0.01)
+    await task.stop()
+
+    assert len(calls) >= 2
+    count = len(calls)
+    await asyncio.sleep(0.03)
+    assert len(calls) == count
+
+
+async def test_periodic_task_waits_one_interval_before_first_run():
+    calls = []
+    task = PeriodicTask("job", lambda: calls.append(1), interval=10)
+    task.start()
+    await asyncio.sleep(0.05)
+    await task.stop()
+
+    assert calls == []
+    assert await task.run_once() is None
+    assert calls == [1]
+
+
+def test_scheduler_skips_disabled_tasks():
+    scheduler = Scheduler()
+    scheduler.add("enabled", lambda: None, 60)
+    scheduler.add("disabled", lambda: None, 0)
+
+    assert [task.name for task in scheduler.tasks] == ["enabled"]
+
+
+async def test_scheduler_runs_startup_tasks_once():
+    calls = []
+    scheduler = Scheduler()
+    scheduler.add("startup", lambda: calls.append("startup"), 60, run_at_start=True)
+    scheduler.add("periodic", lambda: calls.append("periodic"), 60)
+
+    await scheduler.run_startup()
+
+    assert calls == ["startup"]
+
+
+async def test_scheduler_runs_stop_tasks_after_stopping():
+    calls = []
+    scheduler = Scheduler()
+    scheduler.add("flush", lambda: calls.append("flush"), 60, run_at_stop=True)
+    scheduler.add("periodic", lambda: calls.append("periodic"), 60)
+    scheduler.start()
+
+    await scheduler.stop()
+
+    assert calls == ["flush"]
+    assert all(task._task is None for task in scheduler.tasks)
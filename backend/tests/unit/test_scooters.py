@@ -1,3 +1,5 @@
+from sqlalchemy import insert, update
+from sqlalchemy.dialects import postgresql
 from sqlalchemy.orm import Session
 
 from app.crud.scooter import scooter
@@ -311,4 +313,138 @@ def test_create_scooter_and_delete_twice(db: Session):
     
     # Second delete attempt should return None
     deleted_again = scooter.get(db=db, id=db_scooter.id)
-    assert deleted_again is None
\ No newline at end of file
+    assert deleted_again is None
+
+
+def test_create_many_scooters(db: Session):
+    created = scooter.create_many(
+        db=db,
+        objs_in=[
+            ScooterCreate(model="Batch A", location={"lat": 39.9, "lng": 116.4}),
+            ScooterCreate(model="Batch B", status="maintenance", battery_level=40),
+        ],
+    )
+
+    assert [s.model for s in created] == ["Batch A", "Batch B"]
+    assert all(s.id is not None for s in created)
+    assert created[0].location == {"lat": 39.9, "lng": 116.4}
+    # 与单个创建一样补全默认位置
+    assert created[1].location == {"lat": 0, "lng": 0}
+    assert created[1].status == "maintenance"
+    assert scooter.create_many(db=db, objs_in=[]) == []
+
+
+def test_update_many_scooters(db: Session):
+    first, second = scooter.create_many(
+        db=db,
+        objs_in=[ScooterCreate(model="Batch A"), ScooterCreate(model="Batch B")],
+    )
+
+    updated = scooter.update_many(
+        db=db,
+        objs_in=[
+            {"id": second.id, "battery_level": 10},
+            {"id": first.id, "status": "maintenance", "battery_level": 20},
+            {"id": first.id},
+        ],
+    )
+
+    assert [s.id for s in updated] == [second.id, first.id, first.id]
+    assert scooter.get(db=db, id=first.id).status == "maintenance"
+    assert scooter.get(db=db, id=first.id).battery_level == 20
+    assert scooter.get(db=db, id=second.id).battery_level == 10
+    assert scooter.get(db=db, id=second.id).model == "Batch B"
+
+
+def test_remove_many_scooters(db: Session):
+    created = scooter.create_many(
+        db=db, objs_in=[ScooterCreate(model=f"Batch {i}") for i in range(3)]
+    )
+    ids = [s.id for s in created]
+
+    assert scooter.missing_ids(db, [ids[0], 999]) == [999]
+    deleted = scooter.remove_many(db=db, ids=[ids[0], ids[2], 999])
+
+    assert sorted(deleted) == [ids[0], ids[2]]
+    assert scooter.missing_ids(db, ids) == [ids[0], ids[2]]
+
+
+def test_update_writes_only_changed_columns(db: Session, count_queries):
+    db_scooter = scooter.create(
+        db=db, obj_in=ScooterCreate(model="Lean Update", battery_level=90)
+    )
+
+    count_queries.clear()
+    scooter.update(
+        db=db,
+        db_obj=db_scooter,
+        obj_in=ScooterUpdate(model="Lean Update", battery_level=70),
+    )
+
+    # 一条 UPDATE ... RETURNING，提交后不再 refresh
+    updates = [s for s in count_queries if s.startswith("UPDATE scooters")]
+    assert len(updates) == 1
+    assert "battery_level" in updates[0] and "model" not in updates[0].split("WHERE")[0]
+    assert not any(s.startswith("SELECT") for s in count_queries)
+    assert db_scooter.battery_level == 70
+    assert db_scooter.location == {"lat": 0, "lng": 0}
+    assert not any(s.startswith("SELECT") for s in count_queries)
+
+    count_queries.clear()
+    scooter.update(db=db, db_obj=db_scooter, obj_in={"battery_level": 70})
+    assert not any(s.startswith("UPDATE") for s in count_queries)
+
+
+def test_update_keeps_unflushed_changes(db: Session):
+    db_scooter = scooter.create(db=db, obj_in=ScooterCreate(model="Lean Update"))
+
+    db_scooter.status = "maintenance"
+    scooter.update(db=db, db_obj=db_scooter, obj_in={"battery_level": 10})
+
+    db.expire_all()
+    assert db_scooter.status == "maintenance"
+    assert db_scooter.battery_level == 10
+
+
+def test_get_changes_since_version(db: Session):
+    first, second = scooter.create_many(
+        db=db,
+        objs_in=[ScooterCreate(model="Sync A"), ScooterCreate(model="Sync B")],
+    )
+    removed = scooter.create(db=db, obj_in=ScooterCreate(model="Sync C"))
+
+    snapshot = scooter.get_changes(db, since=0)
+    assert snapshot.full
+    assert {first.id, second.id, removed.id} <= {s.id for s in snapshot.changed}
+
+    assert scooter.get_changes(db, since=snapshot.version).changed == []
+    scooter.update(db=db, db_obj=first, obj_in={"battery_level": 42})
+    scooter.update_scooter_status(db, scooter_id=second.id, status="maintenance")
+    scooter.remove(db=db, id=removed.id)
+
+    changes = scooter.get_changes(db, since=snapshot.version)
+    assert not changes.full
+    assert changes.version > snapshot.version
+    assert [s.id for s in changes.changed] == [first.id, second.id]
+    assert changes.removed == [removed.id]
+
+    # 没有实际修改的更新不产生变更
+    scooter.update(db=db, db_obj=first, obj_in={"battery_level": 42})
+    assert scooter.get_changes(db, since=changes.version).changed == []
+
+    # 客户端的版本比服务器新（例如数据库重建），返回全部滑板车
+    assert scooter.get_changes(db, since=changes.version + 100).full
+
+
+def test_postgresql_versions_use_transaction_ids():
+    # PostgreSQL 不使用共享的计数行，写入的行直接记录事务ID
+    dialect = postgresql.dialect()
+    statements = [
+        insert(Scooter).values(model="Sync"),
+        update(Scooter).where(Scooter.id == 1).values(battery_level=10),
+    ]
+
+    for statement in statements:
+        sql = str(statement.compile(dialect=dialect))
+        assert "txid_current()" in sql
+        assert "scooter_change_counter" not in sql
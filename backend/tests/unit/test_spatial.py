@@ -0,0 +1,163 @@
+import math
+import random
+from datetime import datetime, timedelta
+
+from sqlalchemy.orm import Session
+
+from app.core.spatial import METERS_PER_DEGREE, SpatialIndex, scooter_index
+from app.crud.rental import rental
+from app.crud.scooter import scooter
+from app.schemas.rental import RentalCreate
+from app.schemas.scooter import ScooterCreate, ScooterStatus
+
+LAT, LNG = 39.9, 116.4
+
+
+def offset(north: float, east: float) -> dict:
+    """查询点向北、向东偏移指定米数后的位置"""
+    return {
+        "lat": LAT + north / METERS_PER_DEGREE,
+        "lng": LNG + east / (METERS_PER_DEGREE * math.cos(math.radians(LAT))),
+    }
+
+
+def test_nearby_orders_by_distance_within_radius():
+    index = SpatialIndex()
+    index.upsert(1, offset(300, 0), "available")
+    index.upsert(2, offset(0, -100), "available")
+    index.upsert(3, offset(-2000, 0), "available")
+    index.upsert(4, offset(50, 50), "in_use")
+
+    hits = index.nearby(LAT, LNG, radius=1000, k=10, statuses=["available"])
+
+    assert [id for id, _ in hits] == [2, 1]
+    assert [round(distance) for _, distance in hits] == [100, 300]
+    assert [id for id, _ in index.nearby(LAT, LNG, radius=1000, k=1)] == [4]
+    assert len(index.nearby(LAT, LNG, radius=5000, k=10)) == 4
+
+
+def test_upsert_moves_and_removes_points():
+    index = SpatialIndex()
+    index.upsert(1, offset(0, 0), ScooterStatus.AVAILABLE)
+    index.upsert(1, offset(5000, 0), ScooterStatus.AVAILABLE)
+
+    assert index.nearby(LAT, LNG, radius=1000, k=5) == []
+    assert len(index) == 1
+
+    index.set_status(1, ScooterStatus.MAINTENANCE)
+    assert index.nearby(LAT, LNG, radius=6000, k=5, statuses=["available"]) == []
+    assert len(index.nearby(LAT, LNG, radius=6000, k=5, statuses=["maintenance"])) == 1
+
+    index.upsert(1, None, "available")
+    assert len(index) == 0
+
+
+def test_nearby_matches_brute_force():
+    rng = random.Random(7)
+    index = SpatialIndex(cell_size=0.002)
+    points = {}
+    for scooter_id in range(2000):
+        point = offset(rng.uniform(-5000, 5000), rng.uniform(-5000, 5000))
+        status = rng.choice(["available", "in_use"])
+        points[scooter_id] = (point, status)
+        index.upsert(scooter_id, point, status)
+
+    for radius, k in [(300, 5), (1500, 20), (20000, 50)]:
+        expected = sorted(
+            (
+                math.hypot(
+                    (p["lat"] - LAT) * METERS_PER_DEGREE,
+                    (p["lng"] - LNG) * METERS_PER_DEGREE * math.cos(math.radians(LAT)),
+                ),
+                scooter_id,
+            )
+            for scooter_id, (p, status) in points.items()
+            if status == "available"
+        )
+        expected = [(id, d) for d, id in expected if d <= radius][:k]
+
+        hits = index.nearby(LAT, LNG, radius=radius, k=k, statuses=["available"])
+
+        assert [id for id, _ in hits] == [id for id, _ in expected]
+
+
+def test_crud_writes_sync_index(db: Session):
+    created = scooter.create(
+        db, obj_in=ScooterCreate(model="Near", location=offset(100, 0))
+    )
+    batch = scooter.create_many(
+        db,
+        objs_in=[
+            ScooterCreate(model="Near", location=offset(200, 0)),
+            ScooterCreate(model="Near", location=offset(300, 0)),
+        ],
+    )
+    ids = [created.id] + [s.id for s in batch]
+    assert [id for id, _ in scooter_index.nearby(LAT, LNG, radius=500, k=5)] == ids
+
+    scooter.update(db, db_obj=created, obj_in={"location": offset(5000, 0)})
+    scooter.update_many(
+        db, objs_in=[{"id": batch[0].id, "status": ScooterStatus.MAINTENANCE}]
+    )
+    hits = scooter_index.nearby(
+        LAT, LNG, radius=500, k=5, statuses=[ScooterStatus.AVAILABLE]
+    )
+    assert [id for id, _ in hits] == [batch[1].id]
+
+    scooter.remove(db, id=batch[1].id)
+    scooter.remove_many(db, ids=[batch[0].id])
+    assert scooter_index.nearby(LAT, LNG, radius=500, k=5) == []
+    assert len(scooter_index) == 1
+
+
+def test_uncommitted_writes_not_indexed(db: Session):
+    created = scooter.create(
+        db, obj_in=ScooterCreate(model="Near", location=offset(100, 0))
+    )
+
+    scooter.update_scooter_status(
+        db, scooter_id=created.id, status=ScooterStatus.MAINTENANCE, commit=False
+    )
+    assert scooter_index.nearby(
+        LAT, LNG, radius=500, k=5, statuses=[ScooterStatus.AVAILABLE]
+    )
+    db.commit()
+    assert not scooter_index.nearby(
+        LAT, LNG, radius=500, k=5, statuses=[ScooterStatus.AVAILABLE]
+    )
+
+
+def test_rentals_update_indexed_status(db: Session):
+    created = scooter.create(
+        db, obj_in=ScooterCreate(model="Near", location=offset(100, 0))
+    )
+    start = datetime.now() - timedelta(hours=2)
+
+    rental.create_with_scooter(
+        db,
+        rental_in=RentalCreate(
+            scooter_id=created.id,
+            end_time=start + timedelta(hours=1),
+            rental_period="1hr",
+        ),
+        start_time=start,
+        user_id=1,
+        cost=10,
+    )
+    available = [ScooterStatus.AVAILABLE]
+    assert not scooter_index.nearby(LAT, LNG, radius=500, k=5, statuses=available)
+
+    assert rental.check_expired_rentals(db) == (1, 1)
+    assert scooter_index.nearby(LAT, LNG, radius=500, k=5, statuses=available)
+
+
+def test_load_replaces_contents(db: Session):
+    created = scooter.create(
+        db, obj_in=ScooterCreate(model="Near", location=offset(100, 0))
+    )
+    scooter_index.upsert(999999, offset(0, 0), "available")
+
+    assert scooter_index.load(db) == 1
+    assert [id for id, _ in scooter_index.nearby(LAT, LNG, radius=500, k=5)] == [
+        created.id
+    ]
@@ -0,0 +1,173 @@
+import time
+
+import pytest
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from app.core.metrics import registry
+from app.core.spatial import scooter_index
+from app.core.telemetry import Reading, TelemetryBuffer
+from app.crud.scooter import scooter
+from app.schemas.scooter import ScooterCreate
+
+
+# 读数时间相对于此时刻，落在允许的时间范围内
+START = time.time() - 60
+
+
+def reading(ts: float, lat: float = 39.9, battery: int = 80) -> Reading:
+    return Reading(ts=START + ts, lat=lat, lng=116.4, battery=battery)
+
+
+def add_scooters(db: Session, count: int):
+    return scooter.create_many(
+        db,
+        objs_in=[
+            ScooterCreate(model="Telemetry", location={"lat": 0, "lng": 0})
+            for _ in range(count)
+        ],
+    )
+
+
+def test_keeps_latest_reading_per_scooter():
+    buffer = TelemetryBuffer()
+
+    accepted = buffer.add(
+        [(1, reading(10)), (1, reading(12)), (1, reading(11)), (2, reading(5))]
+    )
+
+    assert accepted == 3
+    assert len(buffer) == 2
+    assert buffer._pending[1].ts == START + 12
+
+
+def test_flush_writes_one_statement(db: Session, count_queries):
+    first, second = add_scooters(db, 2)
+    buffer = TelemetryBuffer()
+    buffer.add(
+        [
+            (first.id, reading(1, lat=10.0, battery=90)),
+            (first.id, reading(2, lat=10.5, battery=89)),
+            (second.id, reading(1, lat=20.0, battery=50)),
+            (999999, reading(1)),
+        ]
+    )
+    count_queries.clear()
+
+    result = buffer.flush(db)
+
+    updates = [s for s in count_queries if s.startswith("UPDATE scooters")]
+    assert len(updates) == 1
+    assert result["flushed_scooters"] == 2
+    assert len(buffer) == 0
+    assert set(buffer._flushed) == {first.id, second.id}
+    db.refresh(first)
+    db.refresh(second)
+    assert (first.location["lat"], first.battery_level) == (10.5, 89)
+    assert (second.location["lat"], second.battery_level) == (20.0, 50)
+
+
+def test_flush_moves_indexed_scooters(db: Session):
+    (created,) = add_scooters(db, 1)
+    buffer = TelemetryBuffer()
+    buffer.add([(created.id, reading(1, lat=39.9))])
+
+    buffer.flush(db)
+
+    assert [id for id, _ in scooter_index.nearby(39.9, 116.4, radius=10, k=1)] == [
+        created.id
+    ]
+
+
+def test_stale_readings_dropped_after_flush(db: Session):
+    (created,) = add_scooters(db, 1)
+    buffer = TelemetryBuffer()
+    stale = (
+        registry.get_sample_value("telemetry_readings_total", {"outcome": "stale"})
+        or 0.0
+    )
+    buffer.add([(created.id, reading(10))])
+    buffer.flush(db)
+
+    assert buffer.add([(created.id, reading(9)), (created.id, reading(10))]) == 0
+    assert len(buffer) == 0
+    assert (
+        registry.get_sample_value("telemetry_readings_total", {"outcome": "stale"})
+        == stale + 2
+    )
+
+
+def test_failed_flush_keeps_readings(db: Session, monkeypatch):
+    buffer = TelemetryBuffer()
+    buffer.add([(1, reading(10))])
+
+    def fail(*args, **kwargs):
+        raise OperationalError("UPDATE", {}, Exception("database is locked"))
+
+    monkeypatch.setattr(db, "execute", fail)
+    monkeypatch.setattr(db, "scalar", fail)
+    monkeypatch.setattr(db, "scalars", fail)
+    with pytest.raises(OperationalError):
+        buffer.flush(db)
+
+    assert buffer._pending[1].ts == START + 10
+    assert buffer._flushed == {}
+
+
+def test_older_readings_dropped_during_flush(db: Session, monkeypatch):
+    (created,) = add_scooters(db, 1)
+    buffer = TelemetryBuffer()
+    buffer.add([(created.id, reading(10))])
+    commit = db.commit
+    accepted = []
+
+    def add_then_commit():
+        # 提交前收到的乱序读数与正在写入的读数比较
+        accepted.append(buffer.add([(created.id, reading(9))]))
+        accepted.append(buffer.add([(created.id, reading(11))]))
+        commit()
+
+    monkeypatch.setattr(db, "commit", add_then_commit)
+    buffer.flush(db)
+
+    assert accepted == [0, 1]
+    assert buffer._pending == {created.id: reading(11)}
+    assert buffer._flushed == {created.id: START + 10}
+
+
+def test_drops_readings_outside_time_window():
+    buffer = TelemetryBuffer(max_skew=60, max_age=3600)
+    future = (
+        registry.get_sample_value("telemetry_readings_total", {"outcome": "future"})
+        or 0.0
+    )
+    now = time.time()
+
+    accepted = buffer.add(
+        [
+            (1, Reading(now + 3600, 39.9, 116.4, 80)),
+            (2, Reading(now - 7200, 39.9, 116.4, 80)),
+            (3, Reading(now + 30, 39.9, 116.4, 80)),
+        ]
+    )
+
+    assert accepted == 1
+    assert list(buffer._pending) == [3]
+    assert (
+        registry.get_sample_value("telemetry_readings_total", {"outcome": "future"})
+        == future + 1
+    )
+
+
+def test_flush_evicts_expired_write_times(db: Session, monkeypatch):
+    first, second = add_scooters(db, 2)
+    buffer = TelemetryBuffer(max_age=3600)
+    now = time.time()
+    buffer.add([(first.id, Reading(now - 3000, 39.9, 116.4, 80))])
+    buffer.flush(db)
+
+    monkeypatch.setattr(time, "time", lambda: now + 3600)
+    buffer.add([(second.id, Reading(now + 3000, 39.9, 116.4, 80))])
+    buffer.flush(db)
+
+    assert buffer._flushed == {second.id: now + 3000}
@@ -0,0 +1,137 @@
+from datetime import date, datetime, timedelta
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.telemetry import Reading, TelemetryBuffer
+from app.core.track import (
+    TrackBuffer,
+    TrackPoints,
+    concat,
+    decode,
+    downsample,
+    encode,
+    split_days,
+    target_resolution,
+    to_ms,
+)
+from app.crud.scooter import scooter
+from app.crud.scooter_track import scooter_track
+from app.models.scooter_track import ScooterTrackBlock
+from app.schemas.scooter import ScooterCreate
+
+
+def make_points(start: datetime, seconds, lat: float = 39.9) -> TrackPoints:
+    ts = to_ms(start) + np.asarray(seconds, np.int64) * 1000
+    return TrackPoints(
+        ts,
+        np.full(ts.size, lat, np.float32),
+        np.full(ts.size, 116.4, np.float32),
+        np.arange(ts.size, dtype=np.uint8),
+    )
+
+
+def add_scooter(db: Session):
+    return scooter.create(db, obj_in=ScooterCreate(model="Track"))
+
+
+def test_encode_round_trip():
+    points = make_points(datetime(2030, 1, 1, 10), [0, 2, 5, 3600])
+
+    decoded = decode(encode(points))
+
+    for original, restored in zip(points, decoded):
+        assert np.array_equal(original, restored)
+
+
+def test_downsample_keeps_last_point_per_interval():
+    points = make_points(datetime(2030, 1, 1, 10), [0, 30, 59, 60, 130])
+
+    kept = downsample(points, 60)
+
+    assert ((kept.ts - kept.ts[0]) // 1000).tolist() == [0, 1, 71]
+    assert downsample(points, 0) is points
+
+
+def test_split_days_at_local_midnight():
+    points = make_points(datetime(2030, 1, 1, 23, 59), [0, 30, 60, 90])
+
+    days = [(day, part.size) for day, part in split_days(points)]
+
+    assert days == [(date(2030, 1, 1), 2), (date(2030, 1, 2), 2)]
+
+
+def test_target_resolution():
+    today = date(2030, 2, 1)
+
+    assert target_resolution(today, today) == 0
+    assert target_resolution(today - timedelta(days=7), today) == 60
+    assert target_resolution(today - timedelta(days=30), today) == 300
+
+
+def test_telemetry_buffer_records_every_accepted_reading():
+    tracks = TrackBuffer()
+    buffer = TelemetryBuffer(tracks=tracks)
+    start = datetime.now().timestamp() - 60
+
+    buffer.add(
+        [
+            (1, Reading(start, 39.9, 116.4, 80)),
+            (1, Reading(start + 1, 39.91, 116.4, 79)),
+            (1, Reading(start, 39.9, 116.4, 80)),
+        ]
+    )
+
+    assert len(buffer) == 1
+    assert tracks.pending(1).size == 2
+    assert len(tracks.drain()[1].ts) == 2
+    assert len(tracks) == 0
+
+
+def test_append_and_get_track(db: Session):
+    created = add_scooter(db)
+    start = datetime(2030, 1, 1, 23, 0)
+
+    blocks = scooter_track.append(
+        db,
+        {
+            created.id: make_points(start, [0, 1800, 3599, 3600, 5400]),
+            999999: make_points(start, [0]),
+        },
+    )
+
+    assert blocks == 2
+    track = scooter_track.get_track(
+        db,
+        scooter_id=created.id,
+        start=start + timedelta(minutes=10),
+        end=start + timedelta(hours=1),
+    )
+    assert ((track.ts - to_ms(start)) // 1000).tolist() == [1800, 3599, 3600]
+
+
+def test_compact_merges_and_downsamples(db: Session):
+    created = add_scooter(db)
+    today = date(2030, 2, 1)
+    old = datetime(2030, 1, 20, 10)
+    recent = datetime(2030, 1, 31, 10)
+    scooter_track.append(db, {created.id: make_points(old, [0, 10, 20])})
+    scooter_track.append(db, {created.id: make_points(old, [70, 80])})
+    scooter_track.append(db, {created.id: make_points(recent, [0, 1])})
+    scooter_track.append(db, {created.id: make_points(recent, [2])})
+
+    result = scooter_track.compact(db, today=today)
+
+    assert result == {"compacted_days": 2, "skipped_days": 0}
+    blocks = db.scalars(
+        select(ScooterTrackBlock)
+        .where(ScooterTrackBlock.scooter_id == created.id)
+        .order_by(ScooterTrackBlock.day)
+    ).all()
+    assert [(b.day, b.resolution, b.point_count) for b in blocks] == [
+        (date(2030, 1, 20), 60, 2),
+        (date(2030, 1, 31), 0, 3),
+    ]
+    assert concat(decode(b.data) for b in blocks).size == 5
+    assert scooter_track.compact(db, today=today)["compacted_days"] == 0